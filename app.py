@@ -1,7 +1,7 @@
 import os
 import sys
 from const import *
-from train import entrenar
+from train import entrenar, es_modelo_guardado
 from PySide6.QtWidgets import QApplication, QStackedWidget
 from views.main_window import MainWindow
 from views.steam_apps_window import SteamAppsWindow
@@ -54,7 +54,8 @@ if __name__ == "__main__":
     model_found = False
     current_dir = os.scandir()
     for d in current_dir:
-        model_found = (d.is_dir and d.name.startswith(MODEL_DEFAULT_DIR_NAME))
+        # una carpeta con solo checkpoints es un entrenamiento sin terminar, no un modelo
+        model_found = (d.is_dir() and d.name.startswith(MODEL_DEFAULT_DIR_NAME) and es_modelo_guardado(d.path))
         if model_found:
             current_dir.close()
             break
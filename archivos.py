@@ -0,0 +1,89 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Iterator
+
+@contextmanager
+def escritura_atomica(ruta: str, modo: str = "w", sincronizar: bool = True) -> Iterator[IO[Any]]:
+    """
+    Abre un archivo temporal en la misma carpeta que 'ruta' y, si el bloque termina sin errores,
+    lo renombra sobre 'ruta'. Así el archivo destino siempre tiene la versión anterior completa
+    o la nueva completa, nunca una escritura a medias (aunque el proceso se corte).
+
+    El contenido se puede escribir de a partes dentro del bloque, sin armarlo entero en memoria.
+
+    Args:
+        ruta (str): Archivo destino.
+        modo (str): 'w' para texto (UTF-8) o 'wb' para binario.
+        sincronizar (bool): Si se fuerza la escritura a disco (fsync) antes de renombrar.
+                            Se puede desactivar para archivos descartables, como un caché.
+
+    Yields:
+        IO[Any]: El archivo temporal donde escribir.
+    """
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(prefix=f".{os.path.basename(ruta)}.", suffix=".tmp", dir=directorio)
+
+    try:
+        with os.fdopen(descriptor, modo, encoding=None if "b" in modo else "utf-8") as f:
+            yield f
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+
+        # mkstemp crea el temporal solo legible por el dueño; sin esto el destino perdería sus permisos
+        os.chmod(temporal, _permisos_destino(ruta))
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+    if sincronizar:
+        _sincronizar_directorio(directorio)
+
+# la umask solo se puede leer cambiándola, así que se lee una vez al importar el módulo y no mientras
+# otros hilos podrían estar creando archivos
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# los permisos que tiene el archivo destino, o los que tendría uno nuevo creado con open() según la umask
+def _permisos_destino(ruta: str) -> int:
+    try:
+        return stat.S_IMODE(os.stat(ruta).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+# descarta la última línea de un archivo de texto al que se le agregan líneas (JSONL) si quedó a medio
+# escribir (sin salto de línea al final), para que lo que se agregue al retomar no se pegue a ella
+def descartar_linea_incompleta(ruta: str) -> None:
+    with open(ruta, "rb+") as f:
+        fin = f.seek(0, os.SEEK_END)
+        posicion = fin
+        while posicion > 0:
+            inicio_bloque = max(0, posicion - 65536)
+            f.seek(inicio_bloque)
+            bloque = f.read(posicion - inicio_bloque)
+            salto = bloque.rfind(b"\n")
+            if salto != -1:
+                posicion = inicio_bloque + salto + 1
+                break
+            posicion = inicio_bloque
+        if posicion < fin:
+            f.truncate(posicion)
+
+def _sincronizar_directorio(directorio: str) -> None:
+    # para que el renombrado también sobreviva a un corte de luz; no se puede en Windows
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
@@ -0,0 +1,24 @@
+from typing import Callable, Dict, Any, Optional
+
+# callbacks con los que los módulos informan su avance a quien los llama (la interfaz o la consola):
+# 'log' (mensaje), 'progress' (porcentaje), 'error' (mensaje) y 'check_stop' (devuelve True para cancelar)
+Callbacks = Optional[Dict[str, Callable[..., Any]]]
+
+# sin callback de 'log' el mensaje se muestra por consola, para cuando los scripts se ejecutan solos
+def log(callbacks: Callbacks, msg: str) -> None:
+    if callbacks and 'log' in callbacks:
+        callbacks['log'](msg)
+    else:
+        print(msg)
+
+def progreso(callbacks: Callbacks, valor: float) -> None:
+    if callbacks and 'progress' in callbacks:
+        callbacks['progress'](valor)
+
+def detenido(callbacks: Callbacks) -> bool:
+    return bool(callbacks and 'check_stop' in callbacks and callbacks['check_stop']())
+
+# corta la tarea en curso si se pidió cancelarla
+def check_stop(callbacks: Callbacks) -> None:
+    if detenido(callbacks):
+        raise InterruptedError("Detenido por el usuario")
@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import itertools
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple, Union
+from archivos import escritura_atomica
+from avisos import Callbacks, log as _log, progreso as _progreso
+from const import DATASET_NAME, EPOCHS, LEARNING_RATE, TEST_SIZE
+
+# Barrido de hiperparámetros (epochs, learning_rate, test_size) del entrenamiento de train.py.
+# Cada combinación es una "prueba" que corre en su propio proceso con una cantidad fija de hilos,
+# y varias pruebas corren a la vez. Todas usan el mismo dataset tokenizado del caché de train.py,
+# que se prepara una sola vez antes de empezar. Se ejecuta desde la raíz del proyecto:
+#   python barrido.py --dataset steam_reviews.json --lr 1e-5 3e-5 5e-5 --epochs 2 4 --poda
+
+HILOS_POR_PRUEBA = 4   # hilos de torch de cada prueba si no se indica otra cantidad
+ETA = 3                # con poda, solo sigue el mejor tercio de las pruebas en cada escalón
+
+# valor de un hiperparámetro en el espacio de búsqueda: una lista de opciones, o (mínimo, máximo)
+# para el barrido aleatorio
+Valores = Union[List[Any], Tuple[Any, Any]]
+
+# un valor al azar entre 'minimo' y 'maximo': entero si los dos son enteros, y en escala logarítmica
+# si abarcan más de un orden de magnitud (como el learning rate)
+def _sortear(minimo, maximo, azar: random.Random):
+    if isinstance(minimo, int) and isinstance(maximo, int):
+        return azar.randint(minimo, maximo)
+    if minimo > 0 and maximo / minimo >= 10:
+        return math.exp(azar.uniform(math.log(minimo), math.log(maximo)))
+    return azar.uniform(minimo, maximo)
+
+# arma la lista de pruebas: todas las combinaciones ('grilla') o 'muestras' combinaciones al azar ('aleatorio').
+# los hiperparámetros que no están en 'espacio' toman los valores por defecto de const.py
+def generar_pruebas(espacio: Dict[str, Valores], modo: str = "grilla", muestras: int = 10,
+                    semilla: int = 0) -> List[Dict[str, Any]]:
+    base = {"epochs": EPOCHS, "learning_rate": LEARNING_RATE, "test_size": TEST_SIZE}
+
+    if modo == "grilla":
+        if any(isinstance(valores, tuple) for valores in espacio.values()):
+            raise ValueError("El barrido en grilla necesita una lista de valores para cada hiperparámetro.")
+        nombres = list(espacio)
+        return [{**base, **dict(zip(nombres, combinacion))}
+                for combinacion in itertools.product(*(espacio[nombre] for nombre in nombres))]
+
+    if modo == "aleatorio":
+        azar = random.Random(semilla)
+        pruebas = []
+        for _ in range(muestras):
+            prueba = dict(base)
+            for (nombre, valores) in espacio.items():
+                prueba[nombre] = _sortear(*valores, azar) if isinstance(valores, tuple) else azar.choice(valores)
+            pruebas.append(prueba)
+        return pruebas
+
+    raise ValueError(f"Modo de barrido desconocido: {modo}")
+
+# decide si una prueba sigue después de una evaluación (poda asíncrona por escalones, como ASHA).
+# los escalones son la 1.ª, ETA-ésima, ETA²-ésima... evaluación de cada prueba; al llegar a uno, la prueba
+# anota su loss de validación y solo sigue si está entre el mejor 1/ETA de las que ya pasaron por ese escalón.
+# el loss solo se compara entre pruebas del mismo 'grupo' (el test_size): con otro split la validación
+# es sobre otras reviews y los losses no son comparables.
+# las pruebas no se esperan entre sí, así que ningún proceso queda ocioso
+def _sigue(escalones, lock, grupo: Any, evaluacion: int, loss: float, eta: int) -> bool:
+    escalon = round(math.log(evaluacion, eta)) if evaluacion > 0 else -1
+    if escalon < 0 or eta ** escalon != evaluacion:
+        return True
+
+    with lock:
+        anotadas = escalones.get((grupo, escalon), []) + [loss]
+        escalones[(grupo, escalon)] = anotadas
+
+    mejores = sum(1 for otra in anotadas if otra < loss)
+    return mejores < math.ceil(len(anotadas) / eta)
+
+# limita los hilos de cada prueba. las variables de entorno tienen que estar antes de importar torch,
+# por eso 'train' se importa recién dentro de cada prueba
+def _configurar_proceso(hilos: int) -> None:
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(hilos)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    os.environ["TQDM_DISABLE"] = "1"
+
+# entrena una prueba en el proceso actual y devuelve su fila para la tabla de resultados
+def _ejecutar_prueba(numero: int, parametros: Dict[str, Any], archivo: str, carpeta: str, hilos: int,
+                     escalones=None, lock=None, eta: int = ETA) -> Dict[str, Any]:
+    import torch
+    import train
+    torch.set_num_threads(hilos)
+
+    resultado: Dict[str, Any] = {"prueba": numero, **parametros, "estado": "completada", "eval_loss": None,
+                                 "eval_accuracy": None, "eval_f1": None, "paso": 0, "carpeta": carpeta}
+    evaluaciones = [0]
+    podada = [False]
+
+    def registrar(metricas: Dict[str, Any]) -> None:
+        resultado["paso"] = metricas["paso"]
+        if "eval_loss" not in metricas:
+            return
+        evaluaciones[0] += 1
+        if resultado["eval_loss"] is None or metricas["eval_loss"] < resultado["eval_loss"]:
+            for clave in ("eval_loss", "eval_accuracy", "eval_f1"):
+                resultado[clave] = metricas.get(clave)
+        if escalones is not None and not _sigue(escalones, lock, parametros["test_size"], evaluaciones[0],
+                                                   metricas["eval_loss"], eta):
+            podada[0] = True
+
+    callbacks = {
+        'log': lambda msg: None,
+        'metrics': registrar,
+        'check_stop': lambda: podada[0],
+    }
+
+    inicio = time.perf_counter()
+    try:
+        if not train.entrenar(archivo, parametros["test_size"], parametros["epochs"], parametros["learning_rate"],
+                              output_dir=carpeta, callbacks=callbacks, reanudar=False):
+            resultado["estado"] = "error"
+    except InterruptedError:
+        resultado["estado"] = "podada"
+    except Exception as e:
+        resultado["estado"] = f"error: {e}"
+    resultado["segundos"] = time.perf_counter() - inicio
+
+    # de las pruebas podadas no se guarda nada (solo quedó el checkpoint para reanudar)
+    if resultado["estado"] != "completada":
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return resultado
+
+# ordena las pruebas de mejor a peor: primero las completadas por loss de validación, después las podadas
+def _ordenar(resultados: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def clave(r: Dict[str, Any]):
+        orden_estado = {"completada": 0, "podada": 1}.get(r["estado"], 2)
+        return orden_estado, r["eval_loss"] if r["eval_loss"] is not None else math.inf
+    return sorted(resultados, key=clave)
+
+def formatear(resultados: List[Dict[str, Any]]) -> str:
+    def numero(valor, formato: str) -> str:
+        # sin valor se muestra un guion con el mismo ancho (el formato sin la precisión)
+        return format(valor, formato) if valor is not None else format("-", formato.split(".")[0])
+
+    encabezado = (f"{'prueba':>6} {'epochs':>6} {'learning_rate':>13} {'test_size':>9} {'estado':<12} "
+                  f"{'eval_loss':>9} {'accuracy':>8} {'f1':>6} {'pasos':>6} {'seg':>8}")
+    lineas = [encabezado, "-" * len(encabezado)]
+    for r in resultados:
+        lineas.append(f"{r['prueba']:>6} {r['epochs']:>6} {r['learning_rate']:>13.3g} {r['test_size']:>9.2f} "
+                      f"{r['estado'][:12]:<12} {numero(r['eval_loss'], '>9.4f')} {numero(r['eval_accuracy'], '>8.3f')} "
+                      f"{numero(r['eval_f1'], '>6.3f')} {r['paso']:>6} {numero(r['segundos'], '>8.1f')}")
+    return "\n".join(lineas)
+
+# ejecuta el barrido: reparte las pruebas entre 'procesos' procesos de 'hilos_por_prueba' hilos cada uno
+# (por defecto, tantos como entren en los núcleos de la máquina). con 'poda' las pruebas que van peor
+# se cortan en cada escalón de evaluaciones. el modelo de cada prueba se guarda en '<carpeta>/prueba_<n>'
+# y, salvo con 'conservar_modelos', al final solo queda el de la mejor. la tabla de resultados se
+# escribe en '<carpeta>/resultados.txt' y '<carpeta>/resultados.json' a medida que terminan las pruebas.
+# devuelve los resultados ordenados de mejor a peor
+def barrer(archivo: str, pruebas: List[Dict[str, Any]], carpeta: Optional[str] = None, poda: bool = False,
+           eta: int = ETA, procesos: Optional[int] = None, hilos_por_prueba: Optional[int] = None,
+           conservar_modelos: bool = False, callbacks: Callbacks = None) -> List[Dict[str, Any]]:
+    if eta < 2:
+        raise ValueError(f"eta tiene que ser al menos 2 (se recibió {eta})")
+
+    import train
+    from transformers import AutoTokenizer
+
+    nucleos = os.cpu_count() or 1
+    hilos = hilos_por_prueba or max(1, min(HILOS_POR_PRUEBA, nucleos // max(procesos or 1, 1)))
+    procesos = procesos or max(1, min(len(pruebas), nucleos // hilos))
+    carpeta = carpeta or os.path.join("barridos", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(carpeta, exist_ok=True)
+
+    # el dataset se tokeniza una sola vez acá; las pruebas lo leen del caché
+    _log(callbacks, "Preparando el dataset tokenizado...")
+    train.cargar_dataset_tokenizado(archivo, AutoTokenizer.from_pretrained(train.BASE_MODEL_NAME))
+
+    _log(callbacks, f"Barrido de {len(pruebas)} pruebas en {procesos} procesos de {hilos} hilos"
+                    + (" (con poda)" if poda else "") + ".")
+
+    resultados: List[Dict[str, Any]] = []
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Manager() as manager:
+        escalones = manager.dict() if poda else None
+        lock = manager.Lock() if poda else None
+
+        # cada prueba en un proceso nuevo, así la memoria de una no pasa a la siguiente
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_configurar_proceso,
+                                 initargs=(hilos,), max_tasks_per_child=1) as executor:
+            futuros = {}
+            for (numero, parametros) in enumerate(pruebas, start=1):
+                carpeta_prueba = os.path.join(carpeta, f"prueba_{numero}")
+                futuro = executor.submit(_ejecutar_prueba, numero, parametros, archivo, carpeta_prueba, hilos,
+                                         escalones, lock, eta)
+                futuros[futuro] = (numero, parametros, carpeta_prueba)
+
+            for futuro in as_completed(futuros):
+                try:
+                    resultado = futuro.result()
+                except BrokenProcessPool:
+                    # un proceso murió (por ejemplo sin memoria): el pool queda roto y sus pruebas pendientes
+                    # también terminan acá, cada una como error, sin perder los resultados ya obtenidos
+                    (numero, parametros, carpeta_prueba) = futuros[futuro]
+                    resultado = {"prueba": numero, **parametros, "estado": "error: proceso terminado",
+                                 "eval_loss": None, "eval_accuracy": None, "eval_f1": None, "paso": 0,
+                                 "carpeta": carpeta_prueba, "segundos": None}
+                    shutil.rmtree(carpeta_prueba, ignore_errors=True)
+                resultados.append(resultado)
+                _log(callbacks, formatear([resultado]).splitlines()[-1])
+                _progreso(callbacks, len(resultados) * 100 / len(pruebas))
+                _guardar_tabla(carpeta, _ordenar(resultados))
+
+    resultados = _ordenar(resultados)
+    if not conservar_modelos:
+        for resultado in resultados[1:]:
+            shutil.rmtree(resultado["carpeta"], ignore_errors=True)
+
+    _guardar_tabla(carpeta, resultados)
+    if resultados and resultados[0]["estado"] == "completada":
+        _log(callbacks, f"Mejor prueba: {resultados[0]['prueba']} (modelo en {resultados[0]['carpeta']}).")
+    return resultados
+
+# se reescribe después de cada prueba: se reemplaza de forma atómica para que cortar el barrido
+# no deje una tabla a medio escribir
+def _guardar_tabla(carpeta: str, resultados: List[Dict[str, Any]]) -> None:
+    with escritura_atomica(os.path.join(carpeta, "resultados.txt")) as f:
+        f.write(formatear(resultados) + "\n")
+    with escritura_atomica(os.path.join(carpeta, "resultados.json")) as f:
+        json.dump(resultados, f, indent=2)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Barrido de hiperparámetros del entrenamiento en paralelo.")
+    parser.add_argument("--dataset", default=DATASET_NAME, help="archivo del dataset")
+    parser.add_argument("--epochs", type=int, nargs="+", default=[EPOCHS], help="cantidades de épocas a probar")
+    parser.add_argument("--lr", type=float, nargs="+", default=[LEARNING_RATE], help="learning rates a probar")
+    parser.add_argument("--rango-lr", type=float, nargs=2, default=None, metavar=("MIN", "MAX"),
+                        help="en el modo aleatorio, sortear el learning rate entre MIN y MAX (escala logarítmica)")
+    parser.add_argument("--test-size", type=float, nargs="+", default=[TEST_SIZE], help="tamaños de validación a probar")
+    parser.add_argument("--modo", choices=["grilla", "aleatorio"], default="grilla")
+    parser.add_argument("--muestras", type=int, default=10, help="pruebas a sortear en el modo aleatorio")
+    parser.add_argument("--semilla", type=int, default=0, help="semilla del modo aleatorio")
+    parser.add_argument("--poda", action="store_true", help="cortar las pruebas que van peor (escalones como ASHA)")
+    parser.add_argument("--eta", type=int, default=ETA, help="con poda, sigue 1 de cada ETA pruebas en cada escalón")
+    parser.add_argument("--procesos", type=int, default=None, help="pruebas simultáneas")
+    parser.add_argument("--hilos", type=int, default=None, help="hilos de cada prueba")
+    parser.add_argument("--carpeta", default=None, help="carpeta de los modelos y la tabla de resultados")
+    parser.add_argument("--conservar-modelos", action="store_true", help="no borrar los modelos de las pruebas que no ganaron")
+    args = parser.parse_args()
+
+    espacio: Dict[str, Valores] = {"epochs": args.epochs, "test_size": args.test_size,
+                                   "learning_rate": tuple(args.rango_lr) if args.rango_lr else args.lr}
+    if args.modo == "grilla" and args.rango_lr:
+        parser.error("--rango-lr solo se puede usar con --modo aleatorio")
+    if args.eta < 2:
+        parser.error("--eta tiene que ser al menos 2")
+
+    pruebas = generar_pruebas(espacio, args.modo, args.muestras, args.semilla)
+    resultados = barrer(args.dataset, pruebas, args.carpeta, args.poda, args.eta, args.procesos, args.hilos,
+                        args.conservar_modelos, callbacks={'log': lambda msg: print(msg, file=sys.stderr)})
+    print(formatear(resultados))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, Any, List, Optional
+from bench.mock_steam import ServidorSteamFalso
+from response_cache import CacheRespuestas
+import dataset
+import steam_client
+
+# Benchmark de la descarga de reviews (y opcionalmente de la lista de apps) contra el servidor
+# local de bench/mock_steam.py. Se ejecuta desde la raíz del proyecto:
+#   python -m bench.bench_fetch --juegos 1 5 20 --workers 1 4 8 --salida bench_output.txt
+
+def medir(funcion: Callable[[], int]) -> Dict[str, float]:
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        cantidad = funcion()
+    finally:
+        transcurrido = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"cantidad": cantidad, "segundos": transcurrido, "pico_mb": pico / (1024 * 1024)}
+
+def bench_reviews(servidor: ServidorSteamFalso, cantidad_juegos: int, limite: int, max_workers: int,
+                  modo: str, requests_por_segundo: float, directorio_cache: Optional[str] = None,
+                  etiqueta: str = "") -> Dict[str, Any]:
+
+    # cliente nuevo en cada corrida para que las métricas y el limitador no se mezclen
+    cache = CacheRespuestas(directorio_cache) if directorio_cache else None
+    steam_client.configurar_cliente(steam_client.SteamClient(requests_por_segundo=requests_por_segundo,
+                                                             rafaga=max(1, max_workers), cache=cache))
+    dataset.STEAM_STORE_URL = servidor.url
+    app_ids = list(range(1, cantidad_juegos + 1))
+
+    def descargar() -> int:
+        if modo == "lista":
+            return len(dataset.obtener_reviews(app_ids, limite, limite, max_workers=max_workers))
+
+        if modo == "balanceado":
+            return len(dataset.obtener_reviews(app_ids, limite, limite, max_workers=max_workers, max_diff=dataset.MAX_DIFF))
+
+        with tempfile.TemporaryDirectory() as directorio:
+            return dataset.descargar_reviews_jsonl(app_ids, limite, limite, archivo=os.path.join(directorio, "bench.jsonl"),
+                                                   max_workers=max_workers)
+
+    medicion = medir(descargar)
+    metricas = steam_client.obtener_cliente().metricas()
+
+    return {
+        "prueba": f"reviews/{modo}{etiqueta}",
+        "juegos": cantidad_juegos,
+        "workers": max_workers,
+        "cantidad": medicion["cantidad"],
+        "requests": metricas["requests"],
+        "reintentos": metricas["reintentos"],
+        "segundos": medicion["segundos"],
+        "por_segundo": medicion["cantidad"] / max(medicion["segundos"], 1e-9),
+        "pico_mb": medicion["pico_mb"]
+    }
+
+def bench_apps(servidor: ServidorSteamFalso, requests_por_segundo: float) -> Dict[str, Any]:
+    # SteamWorker necesita PySide6, pero se puede ejecutar 'run' directamente sin event loop
+    from workers import SteamWorker
+
+    steam_client.configurar_cliente(steam_client.SteamClient(requests_por_segundo=requests_por_segundo))
+
+    worker = SteamWorker("clave-de-prueba")
+    worker.url = f"{servidor.url}/IStoreService/GetAppList/v1/"
+    recibidas: List[int] = [0]
+    worker.signals.data_ready.connect(lambda apps: recibidas.__setitem__(0, len(apps)))
+
+    def descargar() -> int:
+        worker.run()
+        return recibidas[0]
+
+    medicion = medir(descargar)
+    metricas = steam_client.obtener_cliente().metricas()
+
+    return {
+        "prueba": "apps",
+        "juegos": "-",
+        "workers": 1,
+        "cantidad": medicion["cantidad"],
+        "requests": metricas["requests"],
+        "reintentos": metricas["reintentos"],
+        "segundos": medicion["segundos"],
+        "por_segundo": medicion["cantidad"] / max(medicion["segundos"], 1e-9),
+        "pico_mb": medicion["pico_mb"]
+    }
+
+def formatear(resultados: List[Dict[str, Any]]) -> str:
+    encabezado = f"{'prueba':<20} {'juegos':>6} {'workers':>7} {'items':>8} {'requests':>8} {'reintentos':>10} {'seg':>8} {'items/s':>10} {'pico MB':>8}"
+    lineas = [encabezado, "-" * len(encabezado)]
+    for r in resultados:
+        lineas.append(f"{r['prueba']:<20} {r['juegos']:>6} {r['workers']:>7} {r['cantidad']:>8} {r['requests']:>8} "
+                      f"{r['reintentos']:>10} {r['segundos']:>8.2f} {r['por_segundo']:>10.1f} {r['pico_mb']:>8.2f}")
+    return "\n".join(lineas)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de descarga contra un servidor de Steam simulado.")
+    parser.add_argument("--juegos", type=int, nargs="+", default=[1, 5, 20], help="cantidades de juegos a probar")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, dataset.MAX_WORKERS], help="descargas simultáneas a probar")
+    parser.add_argument("--modos", nargs="+", default=["lista", "balanceado", "jsonl"], choices=["lista", "balanceado", "jsonl"])
+    parser.add_argument("--limite", type=int, default=500, help="límite de reviews por tipo y juego")
+    parser.add_argument("--latencia", type=float, default=0.05, help="segundos por respuesta del servidor")
+    parser.add_argument("--errores", type=float, default=0.0, help="proporción de respuestas 500")
+    parser.add_argument("--tasa-429", type=float, default=0.0, help="proporción de respuestas 429")
+    parser.add_argument("--rps", type=float, default=1000.0, help="requests por segundo permitidos al cliente")
+    parser.add_argument("--apps", action="store_true", help="medir también la descarga de la lista de apps")
+    parser.add_argument("--cache", action="store_true", help="usar un caché de respuestas en disco (se repite cada prueba con caché caliente)")
+    parser.add_argument("--salida", default=None, help="archivo donde guardar la tabla de resultados")
+    args = parser.parse_args()
+
+    resultados: List[Dict[str, Any]] = []
+
+    with ServidorSteamFalso(latencia=args.latencia, tasa_errores=args.errores, tasa_429=args.tasa_429,
+                            reviews_por_juego=args.limite * 3) as servidor:
+        for cantidad_juegos in args.juegos:
+            for max_workers in args.workers:
+                for modo in args.modos:
+                    if not args.cache:
+                        corridas = [bench_reviews(servidor, cantidad_juegos, args.limite, max_workers, modo, args.rps)]
+                    else:
+                        with tempfile.TemporaryDirectory() as directorio_cache:
+                            corridas = [
+                                bench_reviews(servidor, cantidad_juegos, args.limite, max_workers, modo, args.rps,
+                                              directorio_cache, etiqueta)
+                                for etiqueta in ("/frio", "/caliente")
+                            ]
+
+                    for resultado in corridas:
+                        resultados.append(resultado)
+                        print(formatear([resultado]).splitlines()[-1], file=sys.stderr)
+
+        if args.apps:
+            resultados.append(bench_apps(servidor, args.rps))
+
+    tabla = formatear(resultados)
+    print(tabla)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(tabla + "\n")
+
+if __name__ == "__main__":
+    main()
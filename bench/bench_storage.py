@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from typing import Dict, Any, List
+from bench.mock_steam import PALABRAS
+from dataset_manager import DatasetManager
+from structs import Dataset
+
+# Benchmark de guardado y carga de un dataset de reviews en cada formato de DatasetManager.
+# Se ejecuta desde la raíz del proyecto:
+#   python -m bench.bench_storage --reviews 10000 100000 --formatos .json .jsonl .parquet
+
+def generar_reviews(cantidad: int, semilla: int = 0) -> Dataset:
+    generador = random.Random(semilla)
+    return [
+        {
+            "review_id": str(100_000_000 + i),
+            "review": " ".join(generador.choice(PALABRAS) for _ in range(generador.randint(1, 60))),
+            "voted_up": generador.random() < 0.7,
+            "language": "spanish"
+        }
+        for i in range(cantidad)
+    ]
+
+def bench_formato(reviews: Dataset, extension: str, directorio: str) -> Dict[str, Any]:
+    gestor = DatasetManager(os.path.join(directorio, f"bench{extension}"))
+
+    inicio = time.perf_counter()
+    gestor.guardar_datos(reviews)
+    guardado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    cargadas = gestor.cargar_datos()
+    carga = time.perf_counter() - inicio
+
+    assert len(cargadas) == len(reviews)
+
+    return {
+        "formato": extension,
+        "reviews": len(reviews),
+        "guardar": guardado,
+        "cargar": carga,
+        "mb": os.path.getsize(gestor.archivo_json) / (1024 * 1024)
+    }
+
+def formatear(resultados: List[Dict[str, Any]]) -> str:
+    encabezado = f"{'formato':<10} {'reviews':>9} {'guardar s':>10} {'cargar s':>10} {'MB':>8}"
+    lineas = [encabezado, "-" * len(encabezado)]
+    for r in resultados:
+        lineas.append(f"{r['formato']:<10} {r['reviews']:>9} {r['guardar']:>10.3f} {r['cargar']:>10.3f} {r['mb']:>8.2f}")
+    return "\n".join(lineas)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los formatos de almacenamiento de datasets.")
+    parser.add_argument("--reviews", type=int, nargs="+", default=[10000, 100000], help="tamaños de dataset a probar")
+    parser.add_argument("--formatos", nargs="+", default=[".json", ".jsonl", ".parquet"], help="extensiones a probar")
+    parser.add_argument("--salida", default=None, help="archivo donde guardar la tabla de resultados")
+    args = parser.parse_args()
+
+    resultados: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for cantidad in args.reviews:
+            reviews = generar_reviews(cantidad)
+            for extension in args.formatos:
+                resultado = bench_formato(reviews, extension, directorio)
+                resultados.append(resultado)
+                print(formatear([resultado]).splitlines()[-1], file=sys.stderr)
+
+    tabla = formatear(resultados)
+    print(tabla)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(tabla + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, Any, Optional, Tuple
+
+MODIFICACION_APPS = 1_600_000_000   # fecha de última modificación (Unix) de todas las apps sintéticas
+PALABRAS = ["juego", "muy", "bueno", "malo", "divertido", "aburrido", "gráficos", "historia",
+            "recomiendo", "no", "lo", "es", "un", "horas", "bugs", "precio", "excelente", "crashea"]
+
+class ServidorSteamFalso:
+    """
+    Servidor HTTP local que imita los endpoints de Steam que usa el proyecto, para medir
+    y probar la descarga sin depender de la API real.
+
+    - '/appreviews/<app_id>': paginación por cursor de reviews, con 'query_summary' en el primer cursor.
+    - '/IStoreService/GetAppList/v1/': lista de apps paginada por 'last_appid'. Las apps sintéticas no
+      cambian, así que con 'if_modified_since' posterior a su creación la lista viene vacía.
+
+    Las reviews son sintéticas y deterministas por juego, salvo que se indique un directorio con
+    páginas grabadas ('<app_id>_<review_type>_<n>.json', respuestas reales de la API).
+    Se puede configurar latencia, proporción de errores 500 y de respuestas 429.
+    """
+    def __init__(self, puerto: int = 0, latencia: float = 0.0, tasa_errores: float = 0.0,
+                 tasa_429: float = 0.0, reviews_por_juego: int = 2000, cantidad_apps: int = 150000,
+                 directorio_grabado: Optional[str] = None, semilla: int = 0):
+        """
+        Args:
+            puerto (int): Puerto donde escuchar. Con 0 se elige uno libre.
+            latencia (float): Segundos de espera promedio por respuesta (con ±50% de variación).
+            tasa_errores (float): Proporción de respuestas 500 (entre 0 y 1).
+            tasa_429 (float): Proporción de respuestas 429 (entre 0 y 1).
+            reviews_por_juego (int): Cantidad máxima de reviews sintéticas por juego y tipo.
+            cantidad_apps (int): Cantidad de apps que devuelve la lista de apps.
+            directorio_grabado (Optional[str]): Carpeta con páginas grabadas a servir en lugar de las sintéticas.
+            semilla (int): Semilla para que los errores simulados sean reproducibles.
+        """
+        self.latencia = latencia
+        self.tasa_errores = tasa_errores
+        self.tasa_429 = tasa_429
+        self.reviews_por_juego = reviews_por_juego
+        self.cantidad_apps = cantidad_apps
+        self.directorio_grabado = directorio_grabado
+        self.random = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.requests_atendidos = 0
+
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                servidor._atender(self)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", puerto), Handler)
+        self.httpd.daemon_threads = True
+        self.hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        URL base del servidor, para usar como STEAM_STORE_URL y STEAM_API_URL.
+        """
+        host, puerto = self.httpd.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self) -> "ServidorSteamFalso":
+        """
+        Empieza a atender requests en un hilo en segundo plano.
+        """
+        self.hilo = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.hilo.start()
+        return self
+
+    def detener(self) -> None:
+        """
+        Deja de atender requests y libera el puerto.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "ServidorSteamFalso":
+        return self.iniciar()
+
+    def __exit__(self, *args: Any) -> None:
+        self.detener()
+
+    def _atender(self, handler: BaseHTTPRequestHandler) -> None:
+        with self.lock:
+            self.requests_atendidos += 1
+            sorteo = self.random.random()
+
+        if self.latencia:
+            time.sleep(self.latencia * random.uniform(0.5, 1.5))
+
+        if sorteo < self.tasa_429:
+            self._responder(handler, 429, {}, {"Retry-After": "0"})
+            return
+        if sorteo < self.tasa_429 + self.tasa_errores:
+            self._responder(handler, 500, {})
+            return
+
+        url = urlparse(handler.path)
+        params = {clave: valores[0] for (clave, valores) in parse_qs(url.query).items()}
+        partes = [parte for parte in url.path.split("/") if parte]
+
+        if len(partes) == 2 and partes[0] == "appreviews" and partes[1].isdigit():
+            self._responder(handler, 200, self._pagina_reviews(int(partes[1]), params))
+        elif partes[:2] == ["IStoreService", "GetAppList"]:
+            self._responder(handler, 200, self._pagina_apps(params))
+        else:
+            self._responder(handler, 404, {})
+
+    def _responder(self, handler: BaseHTTPRequestHandler, codigo: int, cuerpo: Dict[str, Any],
+                   encabezados: Optional[Dict[str, str]] = None) -> None:
+        datos = json.dumps(cuerpo).encode("utf-8")
+        handler.send_response(codigo)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(datos)))
+        for (clave, valor) in (encabezados or {}).items():
+            handler.send_header(clave, valor)
+        handler.end_headers()
+        handler.wfile.write(datos)
+
+    def _totales(self, app_id: int) -> Tuple[int, int]:
+        # cada juego tiene una proporción de positivas distinta pero fija
+        proporcion = 0.55 + (zlib.crc32(str(app_id).encode()) % 40) / 100
+        positivas = int(self.reviews_por_juego * proporcion)
+        return positivas, self.reviews_por_juego - positivas
+
+    def _pagina_reviews(self, app_id: int, params: Dict[str, str]) -> Dict[str, Any]:
+        review_type = params.get("review_type", "all")
+        cursor = params.get("cursor", "*")
+        num_per_page = min(int(params.get("num_per_page", 20)), 100)
+        pagina = 0 if cursor == "*" else int(cursor)
+
+        if self.directorio_grabado:
+            respuesta = self._pagina_grabada(app_id, review_type, pagina)
+        else:
+            respuesta = self._pagina_sintetica(app_id, review_type, pagina, num_per_page, params.get("language", "all"))
+
+        if cursor == "*" and "query_summary" not in respuesta:
+            total_positive, total_negative = self._totales(app_id)
+            respuesta["query_summary"] = {"total_positive": total_positive, "total_negative": total_negative,
+                                          "total_reviews": total_positive + total_negative}
+        return respuesta
+
+    def _pagina_grabada(self, app_id: int, review_type: str, pagina: int) -> Dict[str, Any]:
+        ruta = os.path.join(self.directorio_grabado or "", f"{app_id}_{review_type}_{pagina}.json")
+        if not os.path.exists(ruta):
+            return {"success": 1, "reviews": [], "cursor": str(pagina)}
+
+        with open(ruta, "r", encoding="utf-8") as f:
+            respuesta = json.load(f)
+        respuesta["cursor"] = str(pagina + 1)
+        return respuesta
+
+    def _pagina_sintetica(self, app_id: int, review_type: str, pagina: int, num_per_page: int,
+                          idioma: str) -> Dict[str, Any]:
+        total_positive, total_negative = self._totales(app_id)
+        total = total_positive if review_type == "positive" else total_negative
+        desde = pagina * num_per_page
+        hasta = min(desde + num_per_page, total)
+
+        if review_type == "all" or desde >= total:
+            return {"success": 1, "reviews": [], "cursor": str(pagina)}
+
+        # como en Steam, los ids de las reviews no se repiten entre idiomas
+        base = (zlib.crc32(idioma.encode()) % 1000) * 10**12 + app_id * 10_000_000 + (0 if review_type == "positive" else 5_000_000)
+        generador = random.Random(base + pagina)
+        reviews = [
+            {
+                "recommendationid": str(base + i),
+                "review": " ".join(generador.choice(PALABRAS) for _ in range(generador.randint(1, 40))),
+                "voted_up": review_type == "positive"
+            }
+            for i in range(desde, hasta)
+        ]
+        return {"success": 1, "reviews": reviews, "cursor": str(pagina + 1)}
+
+    def _pagina_apps(self, params: Dict[str, str]) -> Dict[str, Any]:
+        max_results = int(params.get("max_results", 10000))
+        last_appid = int(params.get("last_appid", 0))
+        if_modified_since = int(params.get("if_modified_since", 0))
+
+        # los appid sintéticos son múltiplos de 10, como en Steam no son consecutivos
+        desde = last_appid // 10 + 1
+        hasta = min(desde + max_results, self.cantidad_apps + 1)
+        apps = [{"appid": i * 10, "name": f"Juego de prueba {i}", "last_modified": MODIFICACION_APPS}
+                for i in range(desde, hasta)]
+        apps = [app for app in apps if app["last_modified"] > if_modified_since]
+
+        respuesta: Dict[str, Any] = {"apps": apps}
+        if hasta <= self.cantidad_apps:
+            respuesta["have_more_results"] = True
+            respuesta["last_appid"] = (hasta - 1) * 10
+        return {"response": respuesta}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de Steam.")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--latencia", type=float, default=0.05, help="segundos por respuesta")
+    parser.add_argument("--errores", type=float, default=0.0, help="proporción de respuestas 500")
+    parser.add_argument("--tasa-429", type=float, default=0.0, help="proporción de respuestas 429")
+    parser.add_argument("--reviews", type=int, default=2000, help="reviews por juego")
+    parser.add_argument("--apps", type=int, default=150000, help="cantidad de apps del catálogo")
+    parser.add_argument("--grabado", default=None, help="carpeta con páginas grabadas")
+    args = parser.parse_args()
+
+    servidor = ServidorSteamFalso(args.puerto, args.latencia, args.errores, args.tasa_429,
+                                  args.reviews, args.apps, args.grabado)
+    print(f"Servidor escuchando en {servidor.url}")
+    print(f"Usar: STEAM_STORE_URL={servidor.url} STEAM_API_URL={servidor.url} python app.py")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+from typing import Dict, Any, Iterator, Tuple
+from steam_client import obtener_cliente
+from dataset_manager import DatasetManager
+from archivos import escritura_atomica, descartar_linea_incompleta
+from structs import SteamApp, SteamApps
+from avisos import Callbacks, log as _log, progreso as _progreso, check_stop as _check_stop
+from const import STEAM_API_URL, STEAM_APPS_CACHE
+
+URL_APPS = f"{STEAM_API_URL}/IStoreService/GetAppList/v1/"
+APPS_POR_PAGINA = 50_000            # máximo que acepta la API por página
+ULTIMO_APPID_ESTIMADO = 4_000_000   # solo para estimar el progreso cuando no se conoce el catálogo
+
+# junto al caché se guardan las apps recibidas en la sincronización en curso (una por línea, a medida
+# que llegan las páginas) y el estado: desde qué appid seguir y cuándo terminó la última sincronización
+def _rutas(archivo: str) -> Tuple[str, str]:
+    return archivo + ".parcial.jsonl", archivo + ".sync.json"
+
+def _cargar_estado(ruta: str) -> Dict[str, Any]:
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def _guardar_estado(ruta: str, estado: Dict[str, Any]) -> None:
+    with escritura_atomica(ruta) as f:
+        json.dump(estado, f)
+
+def _iterar_parcial(ruta: str) -> Iterator[SteamApp]:
+    if not os.path.exists(ruta):
+        return
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError:
+                # línea a medio escribir si el proceso se cortó; las siguientes siguen siendo válidas
+                continue
+
+# trae una página de la lista de apps. devuelve las apps, el appid desde donde seguir y si hay más páginas
+def _pedir_pagina(api_key: str, last_appid: int, desde: int) -> Tuple[SteamApps, int, bool]:
+    params = {
+        'key': api_key,
+        'max_results': APPS_POR_PAGINA,
+        'last_appid': last_appid,
+        'include_games': 'true'
+    }
+    if desde:
+        params['if_modified_since'] = desde
+
+    response = obtener_cliente().get(URL_APPS, params=params, timeout=10)
+
+    if response.status_code == 403:
+        raise PermissionError("La API Key es incorrecta o ha sido revocada (Error 403).")
+
+    response.raise_for_status()
+    datos = response.json().get('response', {})
+
+    apps: SteamApps = [{'appid': app['appid'], 'name': app['name']} for app in datos.get('apps', [])]
+    siguiente = datos.get('last_appid', apps[-1]['appid'] if apps else last_appid)
+    return apps, siguiente, bool(datos.get('have_more_results')) and siguiente != last_appid
+
+# sincroniza el caché de apps de Steam con la API, recorriendo todas las páginas hasta que no haya más.
+# la primera vez descarga el catálogo completo; después pide solo las apps modificadas desde la última
+# sincronización ('if_modified_since') y las combina con el caché por appid.
+# cada página se escribe en disco apenas llega junto con el appid desde donde seguir, así que si se
+# cancela o se corta, la próxima vez se retoma desde la última página recibida.
+# devuelve la cantidad de apps nuevas o modificadas
+def sincronizar_apps(api_key: str, archivo: str = STEAM_APPS_CACHE, callbacks: Callbacks = None) -> int:
+    ruta_parcial, ruta_estado = _rutas(archivo)
+    estado = _cargar_estado(ruta_estado)
+    existe_cache = os.path.exists(archivo)
+
+    en_curso = estado.get("en_curso")
+    if en_curso and os.path.exists(ruta_parcial):
+        last_appid = en_curso["last_appid"]
+        desde = en_curso["if_modified_since"]
+        inicio = en_curso["inicio"]
+        descartar_linea_incompleta(ruta_parcial)
+        _log(callbacks, f"Retomando la sincronización desde el appid {last_appid}...")
+    else:
+        last_appid = 0
+        # si se borró el caché hay que volver a descargar todo
+        desde = estado.get("ultima_sincronizacion", 0) if existe_cache else 0
+        inicio = int(time.time())
+        if os.path.exists(ruta_parcial):
+            os.remove(ruta_parcial)
+        _log(callbacks, "Buscando apps modificadas desde la última sincronización..." if desde
+                        else "Descargando la lista completa de apps...")
+
+    ultimo_appid = estado.get("ultimo_appid") or ULTIMO_APPID_ESTIMADO
+    recibidas = 0
+    hay_mas = True
+
+    while hay_mas:
+        _check_stop(callbacks)
+
+        apps, last_appid, hay_mas = _pedir_pagina(api_key, last_appid, desde)
+
+        # primero las apps y después el estado: si se corta entre ambos, la página se vuelve a pedir
+        # y las apps repetidas se pisan por appid al combinar
+        if apps:
+            with open(ruta_parcial, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(app, ensure_ascii=False) + "\n" for app in apps))
+                f.flush()
+                os.fsync(f.fileno())
+        elif not os.path.exists(ruta_parcial):
+            open(ruta_parcial, "a").close()
+
+        estado["en_curso"] = {"last_appid": last_appid, "if_modified_since": desde, "inicio": inicio}
+        _guardar_estado(ruta_estado, estado)
+
+        recibidas += len(apps)
+        _log(callbacks, f"Apps recibidas: {recibidas}")
+        _progreso(callbacks, min(99, int(last_appid * 100 / ultimo_appid)) if hay_mas else 99)
+
+    _check_stop(callbacks)
+
+    if existe_cache and os.path.getsize(ruta_parcial) == 0:
+        # no cambió nada: no hace falta reescribir el caché
+        _guardar_estado(ruta_estado, {"ultima_sincronizacion": inicio, "ultimo_appid": ultimo_appid})
+        os.remove(ruta_parcial)
+        _log(callbacks, "El catálogo ya estaba actualizado.")
+        _progreso(callbacks, 100)
+        return 0
+
+    # se combinan las apps recibidas con el caché; las modificadas reemplazan a las anteriores
+    manager = DatasetManager(archivo)
+    catalogo = {app['appid']: app['name'] for app in manager.obtener_apps_json()} if existe_cache else {}
+    for app in _iterar_parcial(ruta_parcial):
+        catalogo[app['appid']] = app['name']
+
+    manager.guardar_datos([{'appid': appid, 'name': nombre} for (appid, nombre) in sorted(catalogo.items())])
+    _guardar_estado(ruta_estado, {"ultima_sincronizacion": inicio, "ultimo_appid": max(catalogo, default=0)})
+    os.remove(ruta_parcial)
+
+    _log(callbacks, f"Catálogo actualizado: {len(catalogo)} apps ({recibidas} nuevas o modificadas).")
+    _progreso(callbacks, 100)
+
+    return recibidas
@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import threading
+from typing import Tuple
+from structs import Dataset
+from archivos import escritura_atomica, descartar_linea_incompleta
+
+class CheckpointReviews:
+    """
+    Guarda en disco el avance de una descarga de reviews a medida que llegan las páginas,
+    para poder reanudarla si se cancela o se corta.
+
+    Por cada cursor (app_id, tipo de review, idioma) se mantienen dos archivos dentro del directorio:
+    un '.jsonl' al que se agregan las reviews de cada página y un '.json' con el último cursor.
+    Primero se escriben las reviews y después el cursor, así que si el proceso se corta entre
+    ambos la página se vuelve a pedir y los duplicados se descartan por 'review_id'.
+
+    Si las reviews ya se están escribiendo en otro archivo (por ejemplo un JSONL de salida),
+    con 'guardar_reviews=False' solo se guardan el cursor y la cantidad descargada.
+    """
+    def __init__(self, directorio: str, guardar_reviews: bool = True):
+        """
+        Args:
+            directorio (str): Carpeta donde se guardan los archivos de avance de la descarga.
+            guardar_reviews (bool): Si además del cursor se guardan las reviews descargadas.
+        """
+        self.directorio = directorio
+        self.guardar_reviews = guardar_reviews
+        self.lock = threading.Lock()
+
+    def existe(self) -> bool:
+        """
+        Indica si hay una descarga previa guardada en el directorio.
+        """
+        return os.path.isdir(self.directorio) and any(os.scandir(self.directorio))
+
+    def cargar(self, app_id: int, review_type: str, idioma: str) -> Tuple[str, Dataset, bool, int]:
+        """
+        Recupera el avance guardado de un cursor.
+
+        Args:
+            app_id (int): ID del juego.
+            review_type (str): 'positive' o 'negative'.
+            idioma (str): Idioma de las reviews.
+
+        Returns:
+            Tuple[str, Dataset, bool, int]: El cursor desde donde continuar, las reviews ya descargadas
+                                            (vacío si no se guardan), si la API ya no tenía más reviews
+                                            para ese cursor y la cantidad de reviews ya descargadas.
+        """
+        ruta_reviews, ruta_estado = self._rutas(app_id, review_type, idioma)
+
+        reviews: Dataset = []
+        if os.path.exists(ruta_reviews):
+            # si el proceso se cortó a mitad de una página, la línea incompleta se descarta del archivo:
+            # si no, la primera review que se agregue al reanudar quedaría pegada a ella
+            with self.lock:
+                descartar_linea_incompleta(ruta_reviews)
+            with open(ruta_reviews, "r", encoding="utf-8") as f:
+                for linea in f:
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        reviews.append(json.loads(linea))
+                    except json.JSONDecodeError:
+                        # línea a medio escribir si el proceso se cortó; las siguientes siguen siendo válidas
+                        continue
+
+        cursor = "*"
+        agotado = False
+        cantidad = len(reviews)
+        if os.path.exists(ruta_estado):
+            with open(ruta_estado, "r", encoding="utf-8") as f:
+                estado = json.load(f)
+            cursor = estado.get("cursor", "*")
+            agotado = estado.get("agotado", False)
+            if not self.guardar_reviews:
+                cantidad = estado.get("cantidad", 0)
+
+        return cursor, reviews, agotado, cantidad
+
+    def guardar_pagina(self, app_id: int, review_type: str, idioma: str, reviews: Dataset,
+                       cursor: str, cantidad: int, agotado: bool = False) -> None:
+        """
+        Agrega las reviews de una página y actualiza el cursor guardado.
+
+        Args:
+            app_id (int): ID del juego.
+            review_type (str): 'positive' o 'negative'.
+            idioma (str): Idioma de las reviews.
+            reviews (Dataset): Reviews nuevas obtenidas en la página.
+            cursor (str): Cursor desde el cual continuar la próxima vez.
+            cantidad (int): Cantidad total de reviews descargadas hasta ahora para este cursor.
+            agotado (bool): True si la API no tiene más reviews para este cursor.
+        """
+        with self.lock:
+            os.makedirs(self.directorio, exist_ok=True)
+
+        ruta_reviews, ruta_estado = self._rutas(app_id, review_type, idioma)
+
+        if reviews and self.guardar_reviews:
+            with open(ruta_reviews, "a", encoding="utf-8") as f:
+                for review in reviews:
+                    f.write(json.dumps(review, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+        # el estado se reemplaza de forma atómica para no dejar nunca un cursor a medio escribir
+        with escritura_atomica(ruta_estado) as f:
+            json.dump({"cursor": cursor, "agotado": agotado, "cantidad": cantidad}, f)
+
+    def limpiar(self) -> None:
+        """
+        Elimina el avance guardado. Se llama cuando la descarga terminó correctamente.
+        """
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def _rutas(self, app_id: int, review_type: str, idioma: str) -> Tuple[str, str]:
+        base = os.path.join(self.directorio, f"{app_id}_{review_type}_{idioma}")
+        return base + ".jsonl", base + ".json"
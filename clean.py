@@ -1,37 +1,140 @@
 import os
 import json
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Callable, Dict, Any, Optional, Iterable, Iterator, Tuple, Deque, List
 from structs import Dataset
-from const import MAX_WORDS, MIN_WORDS
+from dataset_manager import DatasetManager
+from archivos import escritura_atomica
+from dedup import DetectorDuplicados, ClavesReview, claves_review
+from conteo_tokens import ContadorTokens
+from avisos import Callbacks, log as _log, progreso as _progreso, check_stop as _check_stop
+from const import MAX_WORDS, MIN_WORDS, MAX_LENGTH
 
 ARCHIVO_DATASET = "steam_reviews.json"
+TAMANIO_LOTE = 20_000   # reviews que procesa cada proceso por vez
+MAX_PROCESOS = max(1, (os.cpu_count() or 2) - 1)
 
-# filtra el dataset para eliminar reviews que contienen menos de 'MIN_WORDS' palabras ó mas de 'MAX_WORDS' palabras
-def limpiar_reviews_por_longitud(dataset: Dataset, min_words, max_words) -> Dataset:
-    reviews_iniciales = len(dataset)
-    reviews_conservadas: Dataset = []
-    reviews_eliminadas_min = 0
-    reviews_eliminadas_max = 0
+Estadisticas = Dict[str, int]
 
-    print(f"Iniciando limpieza. Total de reviews iniciales: {reviews_iniciales}")
-    print(f"Criterio: Conservar reviews entre {min_words} y {max_words} palabras.")
+def contar_palabras(texto: str) -> int:
+    return len(texto.strip().split())
+
+# devuelve un predicado que conserva los textos de entre 'min_words' y 'max_words' palabras.
+# se puede pasar como 'filtro' a las funciones de dataset.py para filtrar durante la descarga
+def filtro_por_longitud(min_words: int, max_words: int) -> Callable[[str], bool]:
+    def filtro(texto: str) -> bool:
+        return min_words <= contar_palabras(texto) <= max_words
+    return filtro
+
+# filtra un lote de reviews por cantidad de palabras y devuelve las conservadas y cuántas se eliminaron
+# por cortas y por largas. se ejecuta en los procesos de limpiar_archivo, por eso recibe y devuelve
+# solo datos simples. con 'crudo' el lote son líneas de un JSONL sin parsear: se parsean acá y se
+# devuelven las líneas conservadas tal cual, así el proceso principal no parsea ni serializa nada.
+# con 'deduplicar' también calcula las claves de cada review conservada para detectar duplicados, y con
+# 'con_textos' devuelve el id y el texto de cada una (para contar sus tokens en el proceso principal)
+def _limpiar_lote(lote: List[Any], min_words: int, max_words: int, crudo: bool = False,
+                  deduplicar: bool = False, con_textos: bool = False
+                  ) -> Tuple[List[Any], Estadisticas, List[ClavesReview], List[Tuple[str, str]]]:
+    conservadas: List[Any] = []
+    claves: List[ClavesReview] = []
+    textos: List[Tuple[str, str]] = []
+    estadisticas: Estadisticas = {"leidas": len(lote), "cortas": 0, "largas": 0, "invalidas": 0}
 
     # chequear que cada review tenga entre MIN_WORDS y MAX_WORDS palabras,
     # sino se descarta
-    for review_item in dataset:
-        review_text = review_item["review"].strip()
+    for item in lote:
+        if crudo:
+            try:
+                review_item = json.loads(item)
+            except json.JSONDecodeError:
+                # por ejemplo una última línea a medio escribir
+                estadisticas["invalidas"] += 1
+                continue
+        else:
+            review_item = item
 
-        word_count = len(review_text.split())
+        word_count = contar_palabras(review_item["review"])
 
         if word_count < min_words:
-            reviews_eliminadas_min += 1
+            estadisticas["cortas"] += 1
             continue
 
         if word_count > max_words:
-            reviews_eliminadas_max += 1
+            estadisticas["largas"] += 1
             continue
 
-        reviews_conservadas.append(review_item) # se conserva la palabra
+        conservadas.append(item) # se conserva la palabra
+        if deduplicar:
+            claves.append(claves_review(review_item["review"]))
+        if con_textos:
+            textos.append((str(review_item["review_id"]), review_item["review"]))
+
+    estadisticas["conservadas"] = len(conservadas)
+    return conservadas, estadisticas, claves, textos
+
+# devuelve las posiciones de las reviews del lote que no son duplicadas de alguna anterior (según 'detector',
+# que recuerda las ya vistas en lotes previos) y actualiza las estadísticas del lote
+def _descartar_duplicadas(claves: List[ClavesReview], estadisticas: Estadisticas,
+                          detector: DetectorDuplicados) -> List[int]:
+    unicas: List[int] = []
+    estadisticas["exactas"] = 0
+    estadisticas["similares"] = 0
+
+    for (i, claves_item) in enumerate(claves):
+        duplicada = detector.registrar(claves_item)
+        if duplicada == "exacta":
+            estadisticas["exactas"] += 1
+        elif duplicada == "similar":
+            estadisticas["similares"] += 1
+        else:
+            unicas.append(i)
+
+    estadisticas["conservadas"] = len(unicas)
+    return unicas
+
+# devuelve las posiciones de las reviews que tienen entre 'min_tokens' y 'max_tokens' tokens (contados con
+# el tokenizer del modelo) y suma en 'longitudes' la cantidad de tokens de las conservadas
+def _filtrar_por_tokens(textos: List[Tuple[str, str]], estadisticas: Estadisticas, contador: ContadorTokens,
+                        min_tokens: int, max_tokens: Optional[int], longitudes: Counter) -> List[int]:
+    conservadas: List[int] = []
+    estadisticas["tokens_cortas"] = 0
+    estadisticas["tokens_largas"] = 0
+
+    cantidades = contador.contar([review_id for (review_id, _) in textos], [texto for (_, texto) in textos])
+    for (i, cantidad) in enumerate(cantidades):
+        if cantidad < min_tokens:
+            estadisticas["tokens_cortas"] += 1
+        elif max_tokens is not None and cantidad > max_tokens:
+            estadisticas["tokens_largas"] += 1
+        else:
+            conservadas.append(i)
+            longitudes[cantidad] += 1
+
+    estadisticas["conservadas"] = len(conservadas)
+    return conservadas
+
+# percentil 'p' (entre 0 y 100) de las longitudes contadas en 'longitudes'
+def _percentil(longitudes: Counter, p: float) -> int:
+    limite = sum(longitudes.values()) * p / 100
+    acumuladas = 0
+    for (longitud, cantidad) in sorted(longitudes.items()):
+        acumuladas += cantidad
+        if acumuladas >= limite:
+            return longitud
+    return 0
+
+# filtra el dataset para eliminar reviews que contienen menos de 'MIN_WORDS' palabras ó mas de 'MAX_WORDS' palabras
+def limpiar_reviews_por_longitud(dataset: Dataset, min_words, max_words) -> Dataset:
+    reviews_iniciales = len(dataset)
+
+    print(f"Iniciando limpieza. Total de reviews iniciales: {reviews_iniciales}")
+    print(f"Criterio: Conservar reviews entre {min_words} y {max_words} palabras.")
 
+    reviews_conservadas, estadisticas, _, _ = _limpiar_lote(dataset, min_words, max_words)
+    reviews_eliminadas_min = estadisticas["cortas"]
+    reviews_eliminadas_max = estadisticas["largas"]
     reviews_eliminadas_total = reviews_eliminadas_min + reviews_eliminadas_max
 
     print("--- Resultados del Filtrado ---")
@@ -42,29 +145,182 @@ def limpiar_reviews_por_longitud(dataset: Dataset, min_words, max_words) -> Data
 
     return reviews_conservadas
 
+# elimina las reviews repetidas: las de texto idéntico (sin contar mayúsculas, signos ni espacios) y,
+# con 'similares', también las casi idénticas (MinHash/LSH). se conserva la primera de cada grupo
+def eliminar_duplicados(dataset: Dataset, similares: bool = True) -> Dataset:
+    detector = DetectorDuplicados(similares)
+    estadisticas: Estadisticas = {}
+    indices = _descartar_duplicadas([claves_review(r["review"]) for r in dataset], estadisticas, detector)
+    unicas = [dataset[i] for i in indices]
+
+    print("--- Resultados de la Deduplicación ---")
+    print(f"Reviews eliminadas (texto repetido): {estadisticas['exactas']}")
+    print(f"Reviews eliminadas (texto casi idéntico): {estadisticas['similares']}")
+    print(f"Reviews conservadas (final): {len(unicas)}")
+
+    return unicas
+
+def _lotes(items: Iterable[Any], tamanio: int) -> Iterator[List[Any]]:
+    lote: List[Any] = []
+    for item in items:
+        lote.append(item)
+        if len(lote) >= tamanio:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _iterar_lineas(ruta: str) -> Iterator[str]:
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                yield linea if linea.endswith("\n") else linea + "\n"
+
+# versión en streaming de limpiar_reviews_por_longitud para archivos grandes: lee 'entrada' de a lotes
+# (en JSONL y Parquet sin cargar el archivo entero), reparte los lotes entre varios procesos y va
+# escribiendo las reviews conservadas en 'salida', en el mismo orden y en el formato que indique su extensión.
+# como mucho hay 2 lotes por proceso en memoria a la vez, sin importar el tamaño del archivo.
+# 'salida' se reemplaza de forma atómica al final, así que puede ser el mismo archivo que 'entrada'.
+# con 'deduplicar' se descartan además las reviews repetidas o casi idénticas a una anterior
+# (las firmas se calculan en los procesos; la comparación, en el principal y sin comparar cada par).
+# con 'min_tokens' y/o 'max_tokens' se filtra además por la cantidad real de tokens del tokenizer del modelo:
+# se tokeniza en tandas en el proceso principal (el tokenizer rápido ya usa varios hilos) y los conteos
+# quedan guardados por review_id, así que en las siguientes limpiezas no se vuelve a tokenizar.
+# devuelve las estadísticas totales: leidas, conservadas, cortas, largas, invalidas, exactas, similares,
+# tokens_cortas y tokens_largas
+def limpiar_archivo(entrada: str, salida: str, min_words: int = MIN_WORDS, max_words: int = MAX_WORDS,
+                    callbacks: Callbacks = None, procesos: int = MAX_PROCESOS,
+                    tamanio_lote: int = TAMANIO_LOTE, deduplicar: bool = False,
+                    similares: bool = True, min_tokens: Optional[int] = None,
+                    max_tokens: Optional[int] = None, contador: Optional[ContadorTokens] = None) -> Estadisticas:
+
+    total_estimado = DatasetManager(entrada).contar_registros()
+    totales: Estadisticas = {"leidas": 0, "conservadas": 0, "cortas": 0, "largas": 0, "invalidas": 0,
+                             "exactas": 0, "similares": 0, "tokens_cortas": 0, "tokens_largas": 0}
+    detector = DetectorDuplicados(similares) if deduplicar else None
+    por_tokens = min_tokens is not None or max_tokens is not None
+    if por_tokens and contador is None:
+        contador = ContadorTokens()
+    longitudes: Counter = Counter()
+
+    # de JSONL a JSONL las líneas pasan sin parsear por el proceso principal (lo parsean los procesos)
+    crudo = entrada.lower().endswith(".jsonl") and salida.lower().endswith(".jsonl")
+    items = _iterar_lineas(entrada) if crudo else DatasetManager(entrada).iterar_datos()
+
+    _log(callbacks, f"Iniciando limpieza de {entrada} (~{total_estimado} reviews, {procesos} procesos).")
+    _log(callbacks, f"Criterio: Conservar reviews entre {min_words} y {max_words} palabras.")
+    if por_tokens:
+        _log(callbacks, f"Criterio: Conservar reviews entre {min_tokens or 0} y {max_tokens if max_tokens is not None else '∞'} "
+                        f"tokens ({len(contador)} conteos ya guardados).")
+
+    def registrar(numero_lote: int, resultado: Tuple[List[Any], Estadisticas, List[ClavesReview], List[Tuple[str, str]]]) -> List[Any]:
+        conservadas, estadisticas, claves, textos = resultado
+        if detector:
+            indices = _descartar_duplicadas(claves, estadisticas, detector)
+            conservadas = [conservadas[i] for i in indices]
+            textos = [textos[i] for i in indices] if por_tokens else textos
+        if por_tokens:
+            indices = _filtrar_por_tokens(textos, estadisticas, contador, min_tokens or 0, max_tokens, longitudes)
+            conservadas = [conservadas[i] for i in indices]
+
+        for (clave, valor) in estadisticas.items():
+            totales[clave] += valor
+
+        detalle = f"cortas: {estadisticas['cortas']}, largas: {estadisticas['largas']}"
+        if detector:
+            detalle += f", repetidas: {estadisticas['exactas']}, casi idénticas: {estadisticas['similares']}"
+        if por_tokens:
+            detalle += f", pocos tokens: {estadisticas['tokens_cortas']}, muchos tokens: {estadisticas['tokens_largas']}"
+        _log(callbacks, f"Lote {numero_lote}: {estadisticas['conservadas']}/{estadisticas['leidas']} conservadas ({detalle})")
+        if total_estimado:
+            _progreso(callbacks, min(100, int(totales["leidas"] * 100 / total_estimado)))
+
+        return conservadas
+
+    def limpiar_secuencial() -> Iterator[Any]:
+        for (i, lote) in enumerate(_lotes(items, tamanio_lote), start=1):
+            _check_stop(callbacks)
+            yield from registrar(i, _limpiar_lote(lote, min_words, max_words, crudo, deduplicar, por_tokens))
+
+    def limpiar_en_paralelo() -> Iterator[Any]:
+        # 'spawn' como en el entrenamiento: hacer fork de un proceso con hilos (la interfaz) no es seguro
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as executor:
+            pendientes: Deque[Future] = deque()
+            terminados = 0
+            try:
+                for lote in _lotes(items, tamanio_lote):
+                    _check_stop(callbacks)
+                    pendientes.append(executor.submit(_limpiar_lote, lote, min_words, max_words, crudo,
+                                                      deduplicar, por_tokens))
+
+                    # se espera al lote más viejo (así se mantiene el orden y se acota la memoria)
+                    # solo cuando todos los procesos ya tienen trabajo en cola
+                    while len(pendientes) >= 2 * procesos or (pendientes and pendientes[0].done()):
+                        terminados += 1
+                        yield from registrar(terminados, pendientes.popleft().result())
+
+                while pendientes:
+                    _check_stop(callbacks)
+                    terminados += 1
+                    yield from registrar(terminados, pendientes.popleft().result())
+            finally:
+                for futuro in pendientes:
+                    futuro.cancel()
+
+    limpias = limpiar_en_paralelo() if procesos > 1 else limpiar_secuencial()
+
+    if crudo:
+        with escritura_atomica(salida) as f:
+            f.writelines(limpias)
+    else:
+        DatasetManager(salida).guardar_datos(limpias)
+
+    _log(callbacks, "--- Resultados del Filtrado ---")
+    _log(callbacks, f"Reviews eliminadas (Menos de {min_words} palabras): {totales['cortas']}")
+    _log(callbacks, f"Reviews eliminadas (Más de {max_words} palabras): {totales['largas']}")
+    if totales["invalidas"]:
+        _log(callbacks, f"Líneas inválidas descartadas: {totales['invalidas']}")
+    if detector:
+        _log(callbacks, f"Reviews eliminadas (texto repetido): {totales['exactas']}")
+        _log(callbacks, f"Reviews eliminadas (texto casi idéntico): {totales['similares']}")
+    if por_tokens:
+        _log(callbacks, f"Reviews eliminadas (Menos de {min_tokens or 0} tokens): {totales['tokens_cortas']}")
+        if max_tokens is not None:
+            _log(callbacks, f"Reviews eliminadas (Más de {max_tokens} tokens): {totales['tokens_largas']}")
+    eliminadas = sum(totales[clave] for clave in ("cortas", "largas", "exactas", "similares", "tokens_cortas", "tokens_largas"))
+    _log(callbacks, f"Reviews eliminadas (Total): {eliminadas}")
+    _log(callbacks, f"Reviews conservadas (final): {totales['conservadas']}")
+    if longitudes:
+        truncadas = sum(cantidad for (longitud, cantidad) in longitudes.items() if longitud > MAX_LENGTH)
+        _log(callbacks, f"Tokens por review: mediana {_percentil(longitudes, 50)}, p95 {_percentil(longitudes, 95)}, "
+                        f"máximo {max(longitudes)}. Se truncarán al entrenar ({MAX_LENGTH} tokens): {truncadas}")
+    _progreso(callbacks, 100)
+
+    return totales
+
 # carga el dataset, lo limpia y lo guarda.
-def ejecutar_limpieza(min_words, max_words):
+# por defecto sobrescribe 'archivo'; con 'salida' el resultado se guarda en otro archivo
+def ejecutar_limpieza(min_words, max_words, archivo: str = ARCHIVO_DATASET, salida: Optional[str] = None,
+                      callbacks: Callbacks = None, procesos: int = MAX_PROCESOS,
+                      deduplicar: bool = False, min_tokens: Optional[int] = None,
+                      max_tokens: Optional[int] = None) -> Optional[Estadisticas]:
 
-    if not os.path.exists(ARCHIVO_DATASET):
-        print(f"Error: No se encontró el archivo de dataset: {ARCHIVO_DATASET}")
+    if not os.path.exists(archivo):
+        if callbacks and 'error' in callbacks:
+            callbacks['error'](f"No se encontró el archivo de dataset: {archivo}")
+            return None
+        print(f"Error: No se encontró el archivo de dataset: {archivo}")
         print("Ejecuta 'dataset.py' primero para crear el archivo.")
-        return
-
-    # cargar el dataset
-    print(f"Cargando dataset desde {ARCHIVO_DATASET}...")
-    with open(ARCHIVO_DATASET, "r", encoding="utf-8") as f:
-        dataset_crudo = json.load(f)
+        return None
 
-    # limpiar el dataset
-    dataset_limpio = limpiar_reviews_por_longitud(dataset_crudo, min_words, max_words)
+    destino = salida or archivo
+    estadisticas = limpiar_archivo(archivo, destino, min_words, max_words, callbacks, procesos, deduplicar=deduplicar,
+                                   min_tokens=min_tokens, max_tokens=max_tokens)
 
-    # guardar el dataset limpio (sobrescribe el archivo json original)
-    print(f"\nGuardando dataset limpio en {ARCHIVO_DATASET}...")
-    with open(ARCHIVO_DATASET, "w", encoding="utf-8") as f:
-        json.dump(dataset_limpio, f, ensure_ascii=False, indent=2)
+    _log(callbacks, f"Proceso de limpieza completado. Dataset limpio guardado en {destino}.")
+    _log(callbacks, f"Tamaño final del archivo: {estadisticas['conservadas']}")
 
-    print("Proceso de limpieza completado.")
-    print(f"Tamaño final del archivo: {len(dataset_limpio)}")
+    return estadisticas
 
 
 if __name__ == "__main__":
@@ -1,9 +1,21 @@
+import os
+
 MIN_WORDS = 2    # Mínimo de 2 palabras (para filtrar reviews de 1 sola palabra)
 MAX_WORDS = 25   # Máximo de 25 palabras
 STEAM_APPS_CACHE = 'steam_apps_cache.json'
 LEARNING_RATE =  0.00003
 TEST_SIZE = 0.2
 EPOCHS = 3
+EVALUACIONES_POR_EPOCA = 2 # evaluaciones sobre el conjunto de validación en cada época (con un checkpoint cada una)
+PACIENCIA = 2              # evaluaciones seguidas sin mejorar la loss de validación antes de cortar el entrenamiento
+MAX_CHECKPOINTS = 2        # checkpoints que se conservan en disco (siempre queda el mejor y el último)
 DATASET_NAME = "steam_reviews.json"
 MODEL_DEFAULT_DIR_NAME = "modelo_distilbert"
-MODEL_DEFAULT_DIR_PATH = "./modelo_distilbert"
\ No newline at end of file
+MODEL_DEFAULT_DIR_PATH = "./modelo_distilbert"
+BASE_MODEL_NAME = "distilbert-base-multilingual-cased" # modelo pre-entrenado (y tokenizer) que se ajusta
+MAX_LENGTH = 128 # tokens por review al entrenar; las más largas se truncan
+# se pueden redefinir con variables de entorno, por ejemplo para apuntar al servidor de bench/mock_steam.py
+STEAM_STORE_URL = os.environ.get("STEAM_STORE_URL", "https://store.steampowered.com")
+STEAM_API_URL = os.environ.get("STEAM_API_URL", "https://api.steampowered.com")
+# si está definida, al iniciar se actualiza la lista de apps en segundo plano (solo las modificadas)
+STEAM_API_KEY = os.environ.get("STEAM_API_KEY", "")
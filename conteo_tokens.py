@@ -0,0 +1,87 @@
+import os
+import re
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+from review_index import id_a_entero
+from const import BASE_MODEL_NAME
+
+DIRECTORIO_CONTEOS = ".cache_tokens"   # carpeta por defecto de los conteos de tokens guardados
+TAMANIO_TANDA = 2048                    # textos que se tokenizan por llamada al tokenizer
+_ENTRADA = struct.Struct("<qi")         # review_id (como entero de 64 bits) y cantidad de tokens
+
+class ContadorTokens:
+    """
+    Cuenta la cantidad de tokens de cada review con el mismo tokenizer que se usa para entrenar
+    (incluyendo los tokens especiales), tokenizando en tandas grandes con el tokenizer rápido.
+
+    Los conteos se guardan en disco por review_id (un archivo por modelo al que solo se le agregan
+    entradas de 12 bytes), así que una review solo se tokeniza la primera vez que se cuenta.
+    """
+    def __init__(self, modelo: str = BASE_MODEL_NAME, directorio: str = DIRECTORIO_CONTEOS):
+        """
+        Args:
+            modelo (str): Nombre o carpeta del modelo cuyo tokenizer se usa.
+            directorio (str): Carpeta donde se guardan los conteos.
+        """
+        self.modelo = modelo
+        self.archivo = os.path.join(directorio, re.sub(r"[^\w.-]+", "_", modelo) + ".bin")
+        self.lock = threading.Lock()
+        self.tokenizer: Optional[Any] = None
+        self.conteos: Dict[int, int] = {}
+
+        if os.path.exists(self.archivo):
+            with self.lock, open(self.archivo, "rb+") as f:
+                datos = f.read()
+                # si el proceso se cortó a mitad de una escritura, los bytes sobrantes se descartan también
+                # del archivo: si no, los conteos que se agreguen después quedarían desalineados
+                completos = len(datos) - len(datos) % _ENTRADA.size
+                if completos < len(datos):
+                    f.truncate(completos)
+            self.conteos = dict(_ENTRADA.iter_unpack(datos[:completos]))
+
+    def __len__(self) -> int:
+        return len(self.conteos)
+
+    def contar(self, review_ids: Sequence[str], textos: Sequence[str]) -> List[int]:
+        """
+        Devuelve la cantidad de tokens de cada review, tokenizando solo las que no estaban guardadas.
+
+        Args:
+            review_ids (Sequence[str]): IDs de las reviews.
+            textos (Sequence[str]): Textos de las reviews, en el mismo orden.
+
+        Returns:
+            List[int]: Cantidad de tokens de cada review, en el mismo orden.
+        """
+        claves = [id_a_entero(review_id) for review_id in review_ids]
+        faltantes = [i for (i, clave) in enumerate(claves) if clave not in self.conteos]
+
+        if faltantes:
+            nuevos: Dict[int, int] = {}
+            for inicio in range(0, len(faltantes), TAMANIO_TANDA):
+                tanda = faltantes[inicio:inicio + TAMANIO_TANDA]
+                cantidades = self._tokenizar([textos[i] for i in tanda])
+                for (i, cantidad) in zip(tanda, cantidades):
+                    nuevos[claves[i]] = cantidad
+            self._guardar(nuevos)
+
+        return [self.conteos[clave] for clave in claves]
+
+    def _tokenizar(self, textos: List[str]) -> List[int]:
+        # transformers se importa recién acá porque tarda en cargar y solo hace falta si hay textos nuevos
+        if self.tokenizer is None:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(self.modelo, use_fast=True)
+
+        codificados = self.tokenizer(textos, truncation=False, return_attention_mask=False,
+                                     return_token_type_ids=False)
+        return [len(ids) for ids in codificados["input_ids"]]
+
+    def _guardar(self, nuevos: Dict[int, int]) -> None:
+        with self.lock:
+            self.conteos.update(nuevos)
+
+            os.makedirs(os.path.dirname(self.archivo) or ".", exist_ok=True)
+            with open(self.archivo, "ab") as f:
+                f.write(b"".join(_ENTRADA.pack(clave, cantidad) for (clave, cantidad) in nuevos.items()))
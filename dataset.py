@@ -1,45 +1,95 @@
 import os
 import json
-import requests
-from typing import List, Union, Set, Optional, Dict, Callable, Any
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from typing import List, Union, Set, Optional, Dict, Callable, Any, Tuple, Iterator, Iterable, Generator
 from structs import Review, Dataset
+from steam_client import obtener_cliente
+from checkpoint import CheckpointReviews
+from dataset_manager import DatasetManager
+from archivos import descartar_linea_incompleta
+from review_index import IndiceReviews, id_a_entero
+from avisos import Callbacks, log as _log, progreso as _progreso, check_stop as _check_stop
+from const import STEAM_STORE_URL
 import random
+import numpy as np
 
 MAX_FETCH_LIMIT = 1000 # límite máximo de reviews de cada tipo
 MAX_DIFF = 50          # máxima diferencia permitida entre cant de reviews positivas y negativas
+MAX_WORKERS = 4        # cantidad máxima de descargas (juego, tipo) simultáneas por idioma
+IDIOMA_POR_DEFECTO = "spanish" # idioma asumido para reviews guardadas sin columna 'language'
+REVIEWS_POR_CUBETA = 200_000   # reviews que se mezclan en memoria a la vez al balancear un JSONL
+INTERVALO_PARADA = 0.5         # cada cuántos segundos se revisa si el usuario canceló mientras se espera a los hilos
+MARGEN_MAYORITARIA = 2         # con max_diff, cuántas veces su cuota se descarga de la clase mayoritaria para muestrear
+
+Filtro = Optional[Callable[[str], bool]] # decide si el texto de una review se conserva
+LimitesIdiomas = Dict[str, Tuple[int, int]] # idioma -> (límite de positivas, límite de negativas)
+
+# agrega a los callbacks una señal de parada compartida entre hilos, para que cuando
+# una descarga falla o el usuario cancela, el resto de las descargas se detenga también.
+# 'esperar' es la espera entre reintentos del cliente de Steam: se hace sobre la misma señal,
+# así una cancelación corta también un backoff en curso
+def _callbacks_con_parada(callbacks: Callbacks, detener: threading.Event) -> Dict[str, Callable[..., Any]]:
+    nuevos: Dict[str, Callable[..., Any]] = dict(callbacks) if callbacks else {}
+    check_stop_original = nuevos.get('check_stop')
+
+    def check_stop() -> bool:
+        if detener.is_set():
+            return True
+        if check_stop_original and check_stop_original():
+            detener.set()
+            return True
+        return False
+
+    nuevos['check_stop'] = check_stop
+    nuevos['esperar'] = detener.wait
+    return nuevos
+
+# busca las reviews dependiendo del tipo de valoración de la review, devolviendo una página
+# de reviews nuevas a la vez para poder procesarlas sin tenerlas todas en memoria.
+# si se pasa un checkpoint, continúa desde el último cursor guardado y, una vez procesada cada página,
+# guarda el nuevo cursor (si el proceso se corta antes, la página se vuelve a pedir).
+# si se pasan 'ids_conocidos', deja de paginar al encontrar la primera review ya conocida: como se
+# piden ordenadas por fecha ("recent"), todo lo que sigue ya está en el dataset.
+# si se pasa un 'filtro', las reviews que no lo cumplen se descartan antes de contar para 'limit',
+# así se sigue paginando hasta tener 'limit' reviews utilizables.
+# si se pasa un 'indice', se saltean las reviews que ya están en otro dataset o que otra descarga
+# en curso (otro juego, tipo o idioma) ya tomó
+def iterar_reviews_por_tipo(app_id: int, review_type: str, limit: int,
+                            idioma: str, callbacks: Callbacks = None,
+                            checkpoint: Optional[CheckpointReviews] = None,
+                            ids_conocidos: Optional[Set[str]] = None,
+                            filtro: Filtro = None,
+                            indice: Optional[IndiceReviews] = None) -> Generator[Dataset, None, int]:
 
-Callbacks = Optional[Dict[str, Callable[..., Any]]]
-
-def _error(callbacks: Callbacks, error: str) -> None:
-    if callbacks and 'error' in callbacks:
-        callbacks['error'](error)
-
-def _progreso(callbacks: Callbacks, valor: float) -> None:
-    if callbacks and 'progress' in callbacks:
-        callbacks['progress'](valor)
-
-def _check_stop(callbacks: Callbacks) -> None:
-    if callbacks and 'check_stop' in callbacks:
-        if callbacks['check_stop']():
-            raise InterruptedError("Detenido por el usuario")
-
-def _log(callbacks: Callbacks, msg: str) -> None:
-    if callbacks and 'log' in callbacks:
-        callbacks['log'](msg)
-
-# busca las reviews dependiendo del tipo de valoración de la review
-def obtener_reviews_por_tipo(app_id: int, review_type: str, limit: int,
-                             idioma: str, callbacks: Callbacks = None) -> Dataset:
-
-    resultado: Dataset = []
     seen_ids: Set[str] = set()
+    cantidad = 0
+    descartadas = 0
+    repetidas = 0
     cursor = "*"
+    agotado = False
 
-    url = f"https://store.steampowered.com/appreviews/{app_id}"
+    if checkpoint:
+        cursor, guardadas, agotado, cantidad = checkpoint.cargar(app_id, review_type, idioma)
+        if guardadas:
+            guardadas = list({r["review_id"]: r for r in guardadas}.values())[:limit]
+            seen_ids = {r["review_id"] for r in guardadas}
+            cantidad = len(guardadas)
+            if indice:
+                for review_id in seen_ids:
+                    indice.reservar(review_id)
+            yield guardadas
+        if cantidad:
+            _log(callbacks, f"[{app_id}] Reanudando '{review_type}' con {cantidad} reviews ya descargadas")
 
-    _log(callbacks, f"Buscando hasta {limit} reviews de tipo: '{review_type}'")
+    url = f"{STEAM_STORE_URL}/appreviews/{app_id}"
 
-    while len(resultado) < limit:
+    _log(callbacks, f"[{app_id}] Buscando hasta {limit} reviews de tipo: '{review_type}'")
+
+    while cantidad < limit and not agotado:
 
         _check_stop(callbacks)
 
@@ -54,146 +104,711 @@ def obtener_reviews_por_tipo(app_id: int, review_type: str, limit: int,
         }
 
         try:
-            # tiene un control de tiempo para evitar que se bloquee si la API está llena
-            response = requests.get(url, params=params, timeout=10).json()
+            # el cliente compartido limita la tasa, reintenta con backoff ante 429/5xx/timeouts
+            # (si igual falla es porque se agotaron los reintentos) y reutiliza páginas del caché en disco
+            # al refrescar se necesitan las páginas actuales, no las guardadas en el caché
+            response = obtener_cliente().get_json(url, params=params, timeout=10, usar_cache=ids_conocidos is None,
+                                                  esperar=callbacks.get('esperar') if callbacks else None)
+        except InterruptedError:
+            # se canceló mientras se esperaba para reintentar
+            raise
         except Exception as e:
-            _error(callbacks, f"Error de conexión: {e}")
-            break
+            # se corta toda la descarga: así no se escribe un dataset incompleto y el checkpoint
+            # queda intacto para reanudar desde esta página
+            raise ConnectionError(f"[{app_id}] Error de conexión: {e}") from e
 
         reviews = response.get("reviews", [])
         nuevo_cursor = response.get("cursor")
 
         if not reviews:
-            _log(callbacks, f"La API no devolvió más reviews de tipo '{review_type}'. Fin de la paginación.")
-            break
+            _log(callbacks, f"[{app_id}] La API no devolvió más reviews de tipo '{review_type}'. Fin de la paginación.")
+            agotado = True
 
-        if nuevo_cursor == cursor:
+        elif nuevo_cursor == cursor:
             # esto puede pasar si ya llegamos al final de todas las reviews
-            if len(reviews) == 0:
-                 _log(callbacks, "El cursor no cambió (sin más reviews).")
-            else:
-                 # pausa para evitar sobrecargar la API si el cursor se atasca
-                 import time; time.sleep(1)
+            _log(callbacks, f"[{app_id}] El cursor no cambió (sin más reviews).")
+            agotado = True
+
+        if agotado:
+            if checkpoint:
+                checkpoint.guardar_pagina(app_id, review_type, idioma, [], cursor, cantidad, agotado=True)
             break
 
+        cursor_pagina = cursor
         cursor = nuevo_cursor
+        nuevos: Dataset = []
+        pagina_completa = True
+        encontro_conocida = False
 
         for r in reviews:
-            if len(resultado) >= limit:
+            if cantidad >= limit:
+                pagina_completa = False
                 break
 
             review_id = str(r["recommendationid"])
 
+            if ids_conocidos and review_id in ids_conocidos:
+                encontro_conocida = True
+                break
+
             if review_id in seen_ids:
                 continue
 
+            if indice and not indice.reservar(review_id):
+                repetidas += 1
+                continue
+
             review_text = r["review"].strip()
 
             if not review_text:
                 continue
 
+            if filtro and not filtro(review_text):
+                descartadas += 1
+                continue
+
             item: Review = {
                 "review_id": review_id,
                 "review": review_text,
-                "voted_up": True if review_type == "positive" else False
+                "voted_up": True if review_type == "positive" else False,
+                "language": idioma
             }
 
-            resultado.append(item)
+            nuevos.append(item)
             seen_ids.add(review_id)
+            cantidad += 1
+
+        if nuevos:
+            yield nuevos
+
+        if checkpoint:
+            # si la página quedó a medias se guarda su propio cursor, para no saltear
+            # el resto si después se reanuda con un límite mayor
+            checkpoint.guardar_pagina(app_id, review_type, idioma, nuevos,
+                                      cursor if pagina_completa else cursor_pagina, cantidad)
+
+        if encontro_conocida:
+            _log(callbacks, f"[{app_id}] Se alcanzaron reviews '{review_type}' ya conocidas. Fin de la actualización.")
+            break
+
+    _log(callbacks, f"[{app_id}] Reviews encontradas para {review_type}: {cantidad}"
+                    + (f" (descartadas por el filtro: {descartadas})" if filtro else "")
+                    + (f" (ya guardadas en otro dataset o descarga: {repetidas})" if repetidas else ""))
+
+    # el total incluye las reviews que ya estaban en el checkpoint, aunque no se hayan vuelto a emitir
+    return cantidad
 
-    _log(callbacks, f"Reviews encontradas para {review_type}: {len(resultado)}")
+# busca las reviews dependiendo del tipo de valoración de la review y las devuelve todas juntas
+def obtener_reviews_por_tipo(app_id: int, review_type: str, limit: int,
+                             idioma: str, callbacks: Callbacks = None,
+                             checkpoint: Optional[CheckpointReviews] = None,
+                             ids_conocidos: Optional[Set[str]] = None,
+                             filtro: Filtro = None,
+                             indice: Optional[IndiceReviews] = None) -> Dataset:
+
+    resultado: Dataset = []
+    for pagina in iterar_reviews_por_tipo(app_id, review_type, limit, idioma, callbacks, checkpoint, ids_conocidos,
+                                          filtro, indice):
+        resultado.extend(pagina)
     return resultado
 
-# obtiene las max cant establecida de cada tipo de review por cada juego pasado como parámetro
+# igual que obtener_reviews_por_tipo, pero si hay 'al_recibir_pagina' le pasa cada página en vez de
+# acumularlas. devuelve las reviews acumuladas (vacío en ese caso) y la cantidad total obtenida, que
+# cuenta también las reviews de un checkpoint que solo guarda cursores (y por eso no se vuelven a emitir)
+def _descargar_tipo(app_id: int, review_type: str, limit: int, idioma: str, callbacks: Callbacks,
+                    checkpoint: Optional[CheckpointReviews], ids_conocidos: Optional[Set[str]],
+                    al_recibir_pagina: Optional[Callable[[Dataset], None]], filtro: Filtro,
+                    indice: Optional[IndiceReviews]) -> Tuple[Dataset, int]:
+
+    resultado: Dataset = []
+    paginas = iterar_reviews_por_tipo(app_id, review_type, limit, idioma, callbacks, checkpoint, ids_conocidos,
+                                      filtro, indice)
+    while True:
+        try:
+            pagina = next(paginas)
+        except StopIteration as fin:
+            return resultado, fin.value
+
+        if al_recibir_pagina is None:
+            resultado.extend(pagina)
+        else:
+            al_recibir_pagina(pagina)
+
+# consulta el resumen de reviews de un juego (solo viene con el primer cursor) para saber cuántas
+# reviews de cada tipo hay disponibles sin descargarlas. si falla devuelve un resumen vacío
+def obtener_resumen_reviews(app_id: int, idioma: str, callbacks: Callbacks = None) -> Dict[str, int]:
+
+    _check_stop(callbacks)
+
+    params = {
+        "json": 1,
+        "filter": "recent",
+        "language": idioma,
+        "review_type": "all",
+        "purchase_type": "all",
+        "num_per_page": 0,
+        "cursor": "*"
+    }
+
+    try:
+        respuesta = obtener_cliente().get_json(f"{STEAM_STORE_URL}/appreviews/{app_id}", params=params, timeout=10,
+                                               esperar=callbacks.get('esperar') if callbacks else None)
+        resumen = respuesta.get("query_summary", {})
+    except InterruptedError:
+        raise
+    except Exception as e:
+        _log(callbacks, f"[{app_id}] No se pudo obtener el resumen de reviews: {e}")
+        return {}
+
+    totales = {"positive": resumen.get("total_positive"), "negative": resumen.get("total_negative")}
+    return {tipo: total for (tipo, total) in totales.items() if isinstance(total, int)}
+
+# reparte 'cupo' entre los juegos en partes iguales sin pasarse de lo disponible en cada uno;
+# lo que un juego no puede cubrir se redistribuye entre los demás
+def _repartir_cupo(cupo: int, disponibles: Dict[int, int]) -> Dict[int, int]:
+
+    cuotas = {app_id: 0 for app_id in disponibles}
+    pendientes = [app_id for (app_id, disponible) in disponibles.items() if disponible > 0]
+
+    while cupo > 0 and pendientes:
+        parte = max(1, cupo // len(pendientes))
+
+        for app_id in list(pendientes):
+            asignar = min(parte, disponibles[app_id] - cuotas[app_id], cupo)
+            cuotas[app_id] += asignar
+            cupo -= asignar
+
+            if cuotas[app_id] >= disponibles[app_id]:
+                pendientes.remove(app_id)
+            if cupo == 0:
+                break
+
+    return cuotas
+
+# ejecuta las funciones de 'tareas' en un pool de hilos y devuelve sus resultados por clave.
+# si una falla (o el usuario cancela) se cancelan las que no empezaron y se avisa a las demás con 'detener'.
+# mientras espera revisa 'check_stop' (el de '_callbacks_con_parada', que activa 'detener'), así una
+# cancelación llega también a los hilos que están esperando para reintentar y no consultan nada
+def _ejecutar_en_paralelo(tareas: Dict[Any, Callable[[], Any]], max_workers: int, detener: threading.Event,
+                          check_stop: Callable[[], bool],
+                          al_terminar: Optional[Callable[[int, int], None]] = None) -> Dict[Any, Any]:
+
+    resultados: Dict[Any, Any] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futuros = {executor.submit(funcion): clave for (clave, funcion) in tareas.items()}
+
+        try:
+            pendientes = set(futuros)
+            while pendientes:
+                terminados, pendientes = wait(pendientes, timeout=INTERVALO_PARADA, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    resultados[futuros[futuro]] = futuro.result()
+                    if al_terminar:
+                        al_terminar(len(resultados), len(futuros))
+                check_stop()
+        except BaseException:
+            # cancelar lo que no empezó y avisar a las descargas en curso que se detengan
+            detener.set()
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+
+    return resultados
+
+# obtiene las max cant establecida de cada tipo de review por cada juego pasado como parámetro.
+# cada par (juego, tipo) tiene su propio cursor, así que se descargan en paralelo con un
+# pool de hilos limitado a 'max_workers' descargas simultáneas.
+# si se pasa 'al_recibir_pagina', cada página se entrega ahí (desde el hilo que la descargó)
+# en lugar de acumularse, y se devuelve un dataset vacío.
+# si se pasa 'max_diff', no se descarga lo que después el balanceo descartaría: primero se baja
+# completa la clase que según el resumen de cada juego es la minoritaria, y de la otra solo
+# hasta 'minoritaria + max_diff', repartido en partes iguales entre los juegos para que ninguno
+# domine la muestra. como los cursores solo avanzan de las más recientes a las más viejas, de cada juego
+# se bajan hasta MARGEN_MAYORITARIA veces su cuota y se elige al azar entre ellas: así la muestra no son
+# solo las últimas reviews (sigue limitada a las más recientes de ese margen; llegar a todas obligaría
+# a paginarlas todas). con 'al_recibir_pagina' las páginas ya se entregaron y el muestreo queda para
+# el balanceo posterior (balancear_jsonl elige al azar entre todas las descargadas).
+# con 'filtro' los límites cuentan solo reviews que lo cumplen (ver iterar_reviews_por_tipo)
 def obtener_reviews(
         app_ids: Union[int, List[int]],
         pos_limit: int = MAX_FETCH_LIMIT,
         neg_limit: int = MAX_FETCH_LIMIT,
-        idioma: str = "spanish",
-        callbacks: Callbacks = None
+        idioma: str = IDIOMA_POR_DEFECTO,
+        callbacks: Callbacks = None,
+        max_workers: int = MAX_WORKERS,
+        checkpoint: Optional[CheckpointReviews] = None,
+        ids_conocidos: Optional[Set[str]] = None,
+        al_recibir_pagina: Optional[Callable[[Dataset], None]] = None,
+        max_diff: Optional[int] = None,
+        filtro: Filtro = None,
+        indice: Optional[IndiceReviews] = None
     ) -> Dataset:
 
     if isinstance(app_ids, int):
         app_ids = [app_ids]
 
-    dataset_list: Dataset = []
+    # un juego repetido tendría dos cursores pisándose en los resultados
+    app_ids = list(dict.fromkeys(app_ids))
 
-    for (i, app_id) in enumerate(app_ids):
-        _check_stop(callbacks)
+    _check_stop(callbacks)
+
+    _log(callbacks, f"\n--- Procesando {len(app_ids)} juegos ({min(max_workers, 2 * len(app_ids))} descargas simultáneas) ---")
+
+    detener = threading.Event()
+    callbacks_hilos = _callbacks_con_parada(callbacks, detener)
+
+    limites_tipo = {"positive": pos_limit, "negative": neg_limit}
 
-        _log(callbacks, f"\n--- Procesando Juego ID: {app_id} ---")
+    def descargar(limites: Dict[Tuple[int, str], int], progreso_desde: float,
+                  progreso_hasta: float) -> Dict[Tuple[int, str], Tuple[Dataset, int]]:
+        tareas = {
+            (app_id, review_type): partial(_descargar_tipo, app_id, review_type, limit, idioma, callbacks_hilos,
+                                           checkpoint, ids_conocidos, al_recibir_pagina, filtro, indice)
+            for ((app_id, review_type), limit) in limites.items() if limit > 0
+        }
 
-        positivas = obtener_reviews_por_tipo(app_id, "positive", pos_limit, idioma, callbacks=callbacks)
-        negativas = obtener_reviews_por_tipo(app_id, "negative", neg_limit, idioma, callbacks=callbacks)
+        def al_terminar(i: int, total: int) -> None:
+            _progreso(callbacks, progreso_desde + (i / total) * (progreso_hasta - progreso_desde))
 
-        total_juego = positivas + negativas
-        dataset_list.extend(total_juego)
+        return _ejecutar_en_paralelo(tareas, max_workers, detener, callbacks_hilos['check_stop'], al_terminar)
 
-        _progreso(callbacks, (i/len(app_ids)) * 100)
+    if max_diff is None:
+        resultados = descargar({(app_id, review_type): limit for app_id in app_ids
+                                for (review_type, limit) in limites_tipo.items()}, 0, 100)
+    else:
+        resumenes = _ejecutar_en_paralelo(
+            {app_id: partial(obtener_resumen_reviews, app_id, idioma, callbacks_hilos) for app_id in app_ids},
+            max_workers, detener, callbacks_hilos['check_stop']
+        )
+
+        # si no hay resumen de un juego se asume que tiene hasta el límite
+        disponibles = {
+            review_type: {app_id: min(limit, resumenes[app_id].get(review_type, limit)) for app_id in app_ids}
+            for (review_type, limit) in limites_tipo.items()
+        }
 
-        _log(callbacks, f"Total agregado para este juego: {len(total_juego)} (Pos: {len(positivas)}, Neg: {len(negativas)})")
+        if sum(disponibles["negative"].values()) <= sum(disponibles["positive"].values()):
+            minoritaria, mayoritaria = "negative", "positive"
+        else:
+            minoritaria, mayoritaria = "positive", "negative"
+
+        _log(callbacks, f"Clase minoritaria estimada: '{minoritaria}', se descarga primero")
+
+        resultados = descargar({(app_id, minoritaria): limites_tipo[minoritaria] for app_id in app_ids}, 0, 50)
+        obtenidas = sum(cantidad for (_, cantidad) in resultados.values())
+
+        cuotas = _repartir_cupo(obtenidas + max_diff, disponibles[mayoritaria])
+        a_descargar = {app_id: min(cuota * MARGEN_MAYORITARIA, disponibles[mayoritaria][app_id])
+                       for (app_id, cuota) in cuotas.items()}
+        _log(callbacks, f"Se conservan hasta {sum(cuotas.values())} reviews '{mayoritaria}' "
+                        f"({obtenidas} '{minoritaria}' + diferencia máxima {max_diff}), "
+                        f"elegidas al azar entre hasta {sum(a_descargar.values())}")
+
+        resultados.update(descargar({(app_id, mayoritaria): a_descargar[app_id] for app_id in app_ids}, 50, 100))
+
+        if al_recibir_pagina is None:
+            for app_id in app_ids:
+                reviews, _ = resultados.get((app_id, mayoritaria), ([], 0))
+                if len(reviews) > cuotas[app_id]:
+                    reviews = random.sample(reviews, cuotas[app_id])
+                    resultados[(app_id, mayoritaria)] = (reviews, len(reviews))
+
+    # recombinar en el mismo orden en que se pasaron los juegos
+    dataset_list: Dataset = []
+    for app_id in app_ids:
+        positivas, cant_pos = resultados.get((app_id, "positive"), ([], 0))
+        negativas, cant_neg = resultados.get((app_id, "negative"), ([], 0))
+        dataset_list.extend(positivas)
+        dataset_list.extend(negativas)
+        _log(callbacks, f"[{app_id}] Total agregado para este juego: {cant_pos + cant_neg} (Pos: {cant_pos}, Neg: {cant_neg})")
 
     return dataset_list
 
+# arma los límites de cada idioma: 'idioma' puede ser uno o una lista, todos con pos_limit/neg_limit,
+# y 'limites_idiomas' permite darle límites propios a cada uno
+def normalizar_idiomas(idioma: Union[str, List[str]], pos_limit: int, neg_limit: int,
+                       limites_idiomas: Optional[LimitesIdiomas] = None) -> LimitesIdiomas:
+
+    idiomas = [idioma] if isinstance(idioma, str) else list(idioma)
+    limites: LimitesIdiomas = {i: (pos_limit, neg_limit) for i in idiomas}
+    limites.update(limites_idiomas or {})
+    return limites
+
+# descarga varios idiomas a la vez: cada idioma es una llamada a obtener_reviews con sus propios
+# cursores, límites y pool de descargas, así el tiempo total es el del idioma más lento y no la suma.
+# devuelve las reviews de cada idioma por separado para poder balancearlas por idioma
+def obtener_reviews_por_idioma(
+        app_ids: Union[int, List[int]],
+        limites: LimitesIdiomas,
+        callbacks: Callbacks = None,
+        max_workers: int = MAX_WORKERS,
+        checkpoint: Optional[CheckpointReviews] = None,
+        ids_conocidos: Optional[Set[str]] = None,
+        al_recibir_pagina: Optional[Callable[[Dataset], None]] = None,
+        max_diff: Optional[int] = None,
+        filtro: Filtro = None,
+        indice: Optional[IndiceReviews] = None
+    ) -> Dict[str, Dataset]:
+
+    detener = threading.Event()
+    callbacks_hilos = _callbacks_con_parada(callbacks, detener)
+
+    # el progreso total es el promedio del progreso de cada idioma
+    progresos: Dict[str, float] = {idioma: 0.0 for idioma in limites}
+    lock_progreso = threading.Lock()
+
+    def callbacks_idioma(idioma: str) -> Dict[str, Callable[..., Any]]:
+        def progreso(valor: float) -> None:
+            with lock_progreso:
+                progresos[idioma] = valor
+                promedio = sum(progresos.values()) / len(progresos)
+            _progreso(callbacks, promedio)
+
+        def log(msg: str) -> None:
+            _log(callbacks, f"({idioma}) {msg}" if len(limites) > 1 else msg)
+
+        return {**callbacks_hilos, 'progress': progreso, 'log': log}
+
+    tareas = {
+        idioma: partial(obtener_reviews, app_ids, pos_limit, neg_limit, idioma, callbacks_idioma(idioma),
+                        max_workers, checkpoint, ids_conocidos, al_recibir_pagina, max_diff, filtro, indice)
+        for (idioma, (pos_limit, neg_limit)) in limites.items()
+    }
+
+    return _ejecutar_en_paralelo(tareas, len(tareas), detener, callbacks_hilos['check_stop'])
+
+# calcula cuántas reviews de cada clase conservar para que la diferencia no supere max_diff
+def _limites_balanceo(len_pos: int, len_neg: int, max_diff: int, callbacks: Callbacks) -> Tuple[int, int]:
+
+    _log(callbacks, f"\n--- Balanceo de Clases ---")
+    _log(callbacks, f"Datos crudos: Positivas: {len_pos}, Negativas: {len_neg}")
+
+    # aplicar balanceo si es necesario:
+    diff = abs(len_pos - len_neg)
+
+    if diff <= max_diff:
+        _log(callbacks, f"Diferencia ({diff}) está dentro del límite de {max_diff}. No se requiere downsampling.")
+        return len_pos, len_neg
+
+    _log(callbacks, f"Diferencia ({diff}) excede el límite de {max_diff}. Aplicando downsampling.")
+
+    min_len = min(len_pos, len_neg) # la clase menor define el límite base
+    nuevo_limite = min_len + max_diff
+
+    if len_pos > len_neg:
+        return nuevo_limite, len_neg # reducir positivas
+    return len_pos, nuevo_limite     # reducir negativas
+
+def _log_balanceo_final(len_pos: int, len_neg: int, callbacks: Callbacks) -> None:
+    _progreso(callbacks, 100)
+    _log(callbacks, f"Dataset final: Positivas: {len_pos}, Negativas: {len_neg}")
+    _log(callbacks, f"Cantidad total de reviews en el dataset final: {len_pos + len_neg}")
+
+# reduce la clase mayoritaria para que la diferencia entre positivas y negativas no supere max_diff
+def balancear_reviews(dataset_crudo: Dataset, max_diff: int = MAX_DIFF, callbacks: Callbacks = None) -> Dataset:
+
+    positivas = [r for r in dataset_crudo if r["voted_up"]]
+    negativas = [r for r in dataset_crudo if not r["voted_up"]]
+
+    limite_pos, limite_neg = _limites_balanceo(len(positivas), len(negativas), max_diff, callbacks)
+
+    if limite_pos < len(positivas):
+        positivas = random.sample(positivas, limite_pos)
+    if limite_neg < len(negativas):
+        negativas = random.sample(negativas, limite_neg)
+
+    # recombinar de nuevo
+    dataset_balanceado = positivas + negativas
+    random.shuffle(dataset_balanceado)
+
+    _log_balanceo_final(len(positivas), len(negativas), callbacks)
+
+    return dataset_balanceado
+
+# balancea por separado las reviews de cada idioma (así ningún idioma queda sesgado hacia una clase)
+# y las vuelve a juntar mezcladas
+def balancear_por_idioma(dataset_crudo: Dataset, max_diff: int = MAX_DIFF, callbacks: Callbacks = None) -> Dataset:
+
+    # al combinar un dataset existente con reviews nuevas no se cuenta dos veces la misma review
+    sin_repetidas = list({review["review_id"]: review for review in dataset_crudo}.values())
+    if len(sin_repetidas) < len(dataset_crudo):
+        _log(callbacks, f"Se descartaron {len(dataset_crudo) - len(sin_repetidas)} reviews repetidas")
+
+    por_idioma: Dict[str, Dataset] = {}
+    for review in sin_repetidas:
+        por_idioma.setdefault((review.get("language") or IDIOMA_POR_DEFECTO), []).append(review)
+
+    dataset_balanceado: Dataset = []
+    for (idioma, reviews) in por_idioma.items():
+        if len(por_idioma) > 1:
+            _log(callbacks, f"\n=== Idioma: {idioma} ===")
+        dataset_balanceado.extend(balancear_reviews(reviews, max_diff, callbacks))
+
+    random.shuffle(dataset_balanceado)
+
+    if len(por_idioma) > 1:
+        _log(callbacks, f"Cantidad total de reviews en el dataset final (todos los idiomas): {len(dataset_balanceado)}")
+
+    return dataset_balanceado
+
+# versión en streaming de balancear_por_idioma para archivos JSONL, en tres pasadas por las entradas:
+# la primera cuenta las reviews (sin repetidas) de cada idioma y clase, la segunda elige al azar cuáles
+# conservar con reservoir sampling (guardando solo su posición) y la tercera las reparte al azar en
+# archivos temporales de a lo sumo ~REVIEWS_POR_CUBETA reviews, que se mezclan de a uno al escribir la salida.
+# memoria: por cada review de las entradas su id como entero de 64 bits (como en IndiceReviews), su grupo
+# y dos marcas de un byte (unos 12 bytes, más lo que usa np.unique para ordenar los ids al descartar
+# repetidas); además 8 bytes por review conservada y las reviews de una sola cubeta a la vez
+def balancear_jsonl(entradas: List[str], salida: str, max_diff: int = MAX_DIFF, callbacks: Callbacks = None) -> int:
+
+    def iterar_entradas() -> Iterator[Review]:
+        for entrada in entradas:
+            yield from DatasetManager(entrada).iterar_jsonl()
+
+    def grupo(review: Review) -> Tuple[str, bool]:
+        return (review.get("language") or IDIOMA_POR_DEFECTO), bool(review["voted_up"])
+
+    # primera pasada: el id y el número de grupo de cada review, en arreglos compactos
+    numeros: Dict[Tuple[str, bool], int] = {}
+    ids = array("q")
+    grupos = array("H")
+    for review in iterar_entradas():
+        ids.append(id_a_entero(str(review["review_id"])))
+        grupos.append(numeros.setdefault(grupo(review), len(numeros)))
+
+    # de cada id se conserva solo su primera aparición
+    unicas = np.zeros(len(ids), dtype=bool)
+    unicas[np.unique(np.frombuffer(ids, dtype=np.int64), return_index=True)[1]] = True
+    del ids
+    conteos = np.bincount(np.frombuffer(grupos, dtype=np.uint16)[unicas], minlength=len(numeros))
+    cantidades = {clave: int(conteos[numero]) for (clave, numero) in numeros.items()}
+    del grupos
+
+    def iterar_sin_repetidas() -> Iterator[Tuple[int, Review]]:
+        for (posicion, review) in enumerate(iterar_entradas()):
+            if unicas[posicion]:
+                yield posicion, review
+
+    idiomas = sorted({idioma for (idioma, _) in cantidades})
+    limites: Dict[Tuple[str, bool], int] = {}
+    for idioma in idiomas:
+        if len(idiomas) > 1:
+            _log(callbacks, f"\n=== Idioma: {idioma} ===")
+        limite_pos, limite_neg = _limites_balanceo(cantidades.get((idioma, True), 0),
+                                                   cantidades.get((idioma, False), 0), max_diff, callbacks)
+        limites[(idioma, True)] = limite_pos
+        limites[(idioma, False)] = limite_neg
+
+    # segunda pasada: reservoir sampling de las posiciones de cada grupo
+    muestras: Dict[Tuple[str, bool], array] = {clave: array("q") for clave in limites}
+    vistas: Dict[Tuple[str, bool], int] = {clave: 0 for clave in limites}
+
+    for (posicion, review) in iterar_sin_repetidas():
+        clave = grupo(review)
+        vistas[clave] += 1
+
+        if len(muestras[clave]) < limites[clave]:
+            muestras[clave].append(posicion)
+        else:
+            j = random.randrange(vistas[clave])
+            if j < limites[clave]:
+                muestras[clave][j] = posicion
+
+    elegidas = np.zeros(len(unicas), dtype=bool)
+    for muestra in muestras.values():
+        elegidas[np.frombuffer(muestra, dtype=np.int64)] = True
+    total = int(elegidas.sum())
+    total_pos = sum(len(muestra) for ((_, clase), muestra) in muestras.items() if clase)
+    del muestras
+
+    # tercera pasada: cada review elegida va a una cubeta al azar; mezclar cada cubeta y concatenarlas
+    # da un orden al azar de todo el dataset sin tenerlo entero en memoria
+    cubetas = max(1, -(-total // REVIEWS_POR_CUBETA))
+    with tempfile.TemporaryDirectory(prefix=".balanceo.", dir=os.path.dirname(os.path.abspath(salida))) as temporal:
+        rutas = [os.path.join(temporal, f"{i}.jsonl") for i in range(cubetas)]
+        archivos = [open(ruta, "w", encoding="utf-8") for ruta in rutas]
+        try:
+            for (posicion, review) in iterar_sin_repetidas():
+                if elegidas[posicion]:
+                    archivos[random.randrange(cubetas)].write(json.dumps(review, ensure_ascii=False) + "\n")
+        finally:
+            for archivo in archivos:
+                archivo.close()
+
+        def iterar_mezcladas() -> Iterator[Review]:
+            for ruta in rutas:
+                cubeta = list(DatasetManager(ruta).iterar_jsonl())
+                random.shuffle(cubeta)
+                yield from cubeta
+
+        # 'salida' puede ser una de las entradas: se reemplaza recién ahora, ya leídas todas
+        DatasetManager(salida).guardar_jsonl(iterar_mezcladas())
+
+    _log_balanceo_final(total_pos, total - total_pos, callbacks)
+
+    return total
+
+# registra en el índice global las reviews que quedaron en el dataset final y libera las reservas
+# de las que no llegaron (por ejemplo las descartadas al balancear)
+def _actualizar_indice(indice: Optional[IndiceReviews], reviews: Iterable[Review], callbacks: Callbacks) -> None:
+    if indice is None:
+        return
+
+    agregadas = indice.agregar(review["review_id"] for review in reviews)
+    indice.liberar()
+    _log(callbacks, f"Índice de reviews: {agregadas} nuevas, {len(indice)} en total")
+
+# guarda el dataset final y recién después lo registra en el índice, así el índice nunca marca como
+# guardadas reviews de un archivo que no se llegó a escribir. si el usuario canceló no se guarda nada
+def _guardar_dataset(archivo: str, reviews: Dataset, indice: Optional[IndiceReviews], callbacks: Callbacks) -> None:
+    _check_stop(callbacks)
+    DatasetManager(archivo).guardar_datos(reviews)
+    _actualizar_indice(indice, reviews, callbacks)
+
+# métricas del cliente de Steam de esta descarga: 'inicio' son las tomadas al empezarla, porque el
+# cliente es compartido y sus contadores acumulan todas las descargas desde que se creó
+def _log_metricas(callbacks: Callbacks, inicio: Dict[str, float]) -> None:
+    metricas = obtener_cliente().metricas(desde=inicio)
+    _log(callbacks, f"Requests: {metricas['requests']} ({metricas['requests_por_segundo']:.2f}/s), "
+                    f"reintentos: {metricas['reintentos']}, errores: {metricas['errores']}, "
+                    f"desde caché: {metricas['aciertos_cache']}")
+
 # función de cache con balanceo
 def obtener_reviews_cache(
         app_ids: Union[int, List[int]],
         pos_limit: int = MAX_FETCH_LIMIT,
         neg_limit: int = MAX_FETCH_LIMIT,
-        idioma: str = "spanish",
+        idioma: Union[str, List[str]] = IDIOMA_POR_DEFECTO,
         archivo: str = "steam_reviews.json",
         max_diff: int = MAX_DIFF,
-        callbacks: Callbacks = None
+        callbacks: Callbacks = None,
+        max_workers: int = MAX_WORKERS,
+        checkpoint_dir: Optional[str] = None,
+        refrescar: bool = False,
+        filtro: Filtro = None,
+        limites_idiomas: Optional[LimitesIdiomas] = None,
+        indice: Optional[IndiceReviews] = None
     ) -> Dataset:
 
-    # Si el archivo existe, lo carga.
-    # Si no existe, descarga el dataset (maximizando), lo balancea con max_diff, y lo guarda.
+    # Si el archivo existe, lo carga (en el formato que indique su extensión: .json o .parquet).
+    # Si no existe, descarga el dataset (maximizando), lo balancea con max_diff, y lo guarda en 'archivo'.
+    # El avance de la descarga se guarda en 'checkpoint_dir' (por defecto '<archivo>.parcial'),
+    # así que si se corta, la próxima ejecución continúa desde los últimos cursores.
+    # Con 'refrescar', si el archivo existe solo se descargan las reviews más nuevas que las que
+    # ya tiene (hasta los límites por juego), se agregan y se vuelve a balancear.
+    # Con 'filtro' (por ejemplo clean.filtro_por_longitud) las reviews se filtran durante la descarga.
+    # 'idioma' puede ser una lista: cada idioma se descarga en paralelo y se balancea por separado;
+    # cada review queda marcada con su idioma en la columna 'language'.
+    # Con un 'indice' global no se descargan reviews que ya están en otro dataset, y las del
+    # dataset final se agregan al índice.
+
+    limites = normalizar_idiomas(idioma, pos_limit, neg_limit, limites_idiomas)
+    metricas_inicio = obtener_cliente().metricas()
 
     if os.path.exists(archivo):
         print(f"Cargando dataset desde {archivo}...")
-        with open(archivo, "r", encoding="utf-8") as f:
-            return json.load(f)
+        existentes: Dataset = DatasetManager(archivo).cargar_datos()
+
+        if not refrescar:
+            return existentes
+
+        _log(callbacks, f"Actualizando {archivo} ({len(existentes)} reviews), descargando solo reviews nuevas...")
+
+        ids_conocidos = {r["review_id"] for r in existentes}
+        nuevas_por_idioma = obtener_reviews_por_idioma(app_ids, limites, callbacks=callbacks, max_workers=max_workers,
+                                                       ids_conocidos=ids_conocidos, filtro=filtro, indice=indice)
+        nuevas = [review for reviews in nuevas_por_idioma.values() for review in reviews]
+
+        _log_metricas(callbacks, metricas_inicio)
+        _log(callbacks, f"Reviews nuevas encontradas: {len(nuevas)}")
+
+        dataset_actualizado = balancear_por_idioma(existentes + nuevas, max_diff, callbacks)
+        _guardar_dataset(archivo, dataset_actualizado, indice, callbacks)
+
+        return dataset_actualizado
 
     _log(callbacks, "No existe el dataset, descargando desde Steam (Maximizando)...")
 
-    dataset_crudo = obtener_reviews(app_ids, pos_limit, neg_limit, idioma, callbacks=callbacks)
+    checkpoint = CheckpointReviews(checkpoint_dir or f"{archivo}.parcial")
+    if checkpoint.existe():
+        _log(callbacks, f"Se encontró una descarga previa en {checkpoint.directorio}, reanudando...")
 
-    positivas = [r for r in dataset_crudo if r["voted_up"]]
-    negativas = [r for r in dataset_crudo if not r["voted_up"]]
+    crudo_por_idioma = obtener_reviews_por_idioma(app_ids, limites, callbacks=callbacks, max_workers=max_workers,
+                                                  checkpoint=checkpoint, max_diff=max_diff, filtro=filtro, indice=indice)
+    dataset_crudo = [review for reviews in crudo_por_idioma.values() for review in reviews]
 
-    len_pos = len(positivas)
-    len_neg = len(negativas)
+    _log_metricas(callbacks, metricas_inicio)
 
-    _log(callbacks, f"\n--- Balanceo de Clases ---")
-    _log(callbacks, f"Datos crudos: Positivas: {len_pos}, Negativas: {len_neg}")
+    dataset_balanceado = balancear_por_idioma(dataset_crudo, max_diff, callbacks)
+    _guardar_dataset(archivo, dataset_balanceado, indice, callbacks)
 
-    # aplicar balanceo si es necesario:
-    diff = abs(len_pos - len_neg)
+    # la descarga terminó, ya no hace falta poder reanudarla
+    checkpoint.limpiar()
 
-    if diff > max_diff:
-        _log(callbacks, f"Diferencia ({diff}) excede el límite de {max_diff}. Aplicando downsampling.")
+    return dataset_balanceado
 
-        min_len = min(len_pos, len_neg) # la clase menor define el límite base
-        nuevo_limite = min_len + max_diff
+# versión en streaming de obtener_reviews_cache para datasets grandes: cada página descargada se
+# agrega a '<archivo>.crudo' (JSONL) apenas llega, sin acumular reviews en memoria, y después se
+# balancea y mezcla en una segunda pasada que escribe 'archivo' en formato JSONL.
+# se puede reanudar igual que obtener_reviews_cache; devuelve la cantidad de reviews del dataset final
+def descargar_reviews_jsonl(
+        app_ids: Union[int, List[int]],
+        pos_limit: int = MAX_FETCH_LIMIT,
+        neg_limit: int = MAX_FETCH_LIMIT,
+        idioma: Union[str, List[str]] = IDIOMA_POR_DEFECTO,
+        archivo: str = "steam_reviews.jsonl",
+        max_diff: int = MAX_DIFF,
+        callbacks: Callbacks = None,
+        max_workers: int = MAX_WORKERS,
+        refrescar: bool = False,
+        filtro: Filtro = None,
+        limites_idiomas: Optional[LimitesIdiomas] = None,
+        indice: Optional[IndiceReviews] = None
+    ) -> int:
+
+    limites = normalizar_idiomas(idioma, pos_limit, neg_limit, limites_idiomas)
+    metricas_inicio = obtener_cliente().metricas()
+    existentes: List[str] = []
+    ids_conocidos: Optional[Set[str]] = None
 
-        if len_pos > len_neg:
-            positivas = random.sample(positivas, nuevo_limite) # reducir positivas
-        else:
-            negativas = random.sample(negativas, nuevo_limite) # reducir negativas
+    if os.path.exists(archivo):
+        if not refrescar:
+            _log(callbacks, f"El dataset {archivo} ya existe.")
+            return sum(1 for _ in DatasetManager(archivo).iterar_jsonl())
 
-        _log(callbacks, f"Tamaños ajustados: Positivas: {len(positivas)}, Negativas: {len(negativas)}")
+        _log(callbacks, f"Actualizando {archivo}, descargando solo reviews nuevas...")
+        existentes = [archivo]
+        ids_conocidos = {r["review_id"] for r in DatasetManager(archivo).iterar_jsonl()}
     else:
-        _log(callbacks, f"Diferencia ({diff}) está dentro del límite de {max_diff}. No se requiere downsampling.")
+        _log(callbacks, "No existe el dataset, descargando desde Steam (Maximizando)...")
 
-    # recombinar de nuevo
-    dataset_balanceado = positivas + negativas
-    random.shuffle(dataset_balanceado)
+    crudo = DatasetManager(f"{archivo}.crudo")
+    checkpoint = CheckpointReviews(f"{archivo}.parcial", guardar_reviews=False)
 
-    _progreso(callbacks, 100)
+    if checkpoint.existe():
+        _log(callbacks, f"Se encontró una descarga previa en {checkpoint.directorio}, reanudando...")
+        if os.path.exists(crudo.archivo_json):
+            # las páginas que se agreguen al reanudar no se pueden pegar a una última línea a medio escribir
+            descartar_linea_incompleta(crudo.archivo_json)
+    elif os.path.exists(crudo.archivo_json):
+        # sin checkpoint no se sabe hasta dónde llegó, así que se empieza de cero
+        os.remove(crudo.archivo_json)
 
-    len_pos_final = len(positivas)
-    len_neg_final = len(negativas)
-    _log(callbacks, f"Dataset final: Positivas: {len_pos_final}, Negativas: {len_neg_final}")
-    _log(callbacks, f"Cantidad total de reviews en el dataset final: {len(dataset_balanceado)}")
+    # al refrescar el balanceo depende también de las reviews existentes, así que no se limita la descarga
+    obtener_reviews_por_idioma(app_ids, limites, callbacks=callbacks, max_workers=max_workers, checkpoint=checkpoint,
+                               ids_conocidos=ids_conocidos, al_recibir_pagina=crudo.agregar_jsonl,
+                               max_diff=None if existentes else max_diff, filtro=filtro, indice=indice)
+
+    _log_metricas(callbacks, metricas_inicio)
+
+    # 'archivo' puede ser también una de las entradas: se reemplaza de forma atómica al final,
+    # después de haber leído todas las entradas
+    total = balancear_jsonl(existentes + [crudo.archivo_json], archivo, max_diff, callbacks)
+    _actualizar_indice(indice, DatasetManager(archivo).iterar_jsonl(), callbacks)
+
+    checkpoint.limpiar()
+    if os.path.exists(crudo.archivo_json):
+        os.remove(crudo.archivo_json)
+
+    return total
 
-    return dataset_balanceado
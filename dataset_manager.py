@@ -1,47 +1,407 @@
 import os
 import json
-from typing import List, Union, Any
-from structs import SteamApps, Dataset
+import threading
+from typing import List, Union, Any, Iterable, Iterator, Dict
+from structs import SteamApps, Dataset, Review
+from archivos import escritura_atomica
+
+class AlmacenamientoJSON:
+    """
+    Formato JSON clásico: una lista con todos los registros. Se carga entero en memoria,
+    así que conviene solo para archivos chicos o para intercambiar datos con otras herramientas.
+    """
+    def guardar(self, ruta: str, datos: Iterable[Any]) -> None:
+        """
+        Guarda los registros como una lista JSON, sobrescribiendo el archivo de forma atómica.
+        Los registros se escriben de a uno, sin armar todo el texto en memoria.
+
+        Args:
+            ruta (str): Archivo destino.
+            datos (Iterable[Any]): Registros a guardar.
+        """
+        with escritura_atomica(ruta) as f:
+            f.write("[")
+            for i, registro in enumerate(datos):
+                if i:
+                    f.write(",")
+                f.write(json.dumps(registro, ensure_ascii=False))
+            f.write("]")
+
+    def cargar(self, ruta: str) -> List[Any]:
+        """
+        Lee todos los registros del archivo.
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Returns:
+            List[Any]: Los registros guardados.
+        """
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def iterar(self, ruta: str) -> Iterator[Any]:
+        """
+        Recorre los registros del archivo (en JSON hace falta leerlo entero antes).
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Yields:
+            Any: Cada registro.
+        """
+        yield from self.cargar(ruta)
+
+    def contar(self, ruta: str) -> int:
+        """
+        Cuenta los registros del archivo (en JSON hace falta leerlo entero).
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Returns:
+            int: Cantidad de registros.
+        """
+        return len(self.cargar(ruta))
+
+class AlmacenamientoJSONL:
+    """
+    Formato JSON Lines: un registro por línea. Se puede escribir y leer de a un registro,
+    sin tener el archivo entero en memoria.
+    """
+    def guardar(self, ruta: str, datos: Iterable[Any]) -> None:
+        """
+        Guarda los registros de a uno, sobrescribiendo el archivo de forma atómica.
+
+        Args:
+            ruta (str): Archivo destino.
+            datos (Iterable[Any]): Registros a guardar.
+        """
+        with escritura_atomica(ruta) as f:
+            for registro in datos:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def cargar(self, ruta: str) -> List[Any]:
+        """
+        Lee todos los registros del archivo.
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Returns:
+            List[Any]: Los registros guardados.
+        """
+        return list(self.iterar(ruta))
+
+    def iterar(self, ruta: str) -> Iterator[Any]:
+        """
+        Recorre los registros de a uno. Ignora las líneas incompletas
+        (por ejemplo si el proceso se cortó al escribirlas).
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Yields:
+            Any: Cada registro.
+        """
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    yield json.loads(linea)
+                except json.JSONDecodeError:
+                    # línea a medio escribir si el proceso se cortó; las siguientes siguen siendo válidas
+                    continue
+
+    def contar(self, ruta: str) -> int:
+        """
+        Cuenta los registros contando saltos de línea, sin parsear el JSON de cada uno.
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Returns:
+            int: Cantidad de registros (aproximada si hay líneas vacías o una última línea incompleta).
+        """
+        cantidad = 0
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                cantidad += bloque.count(b"\n")
+        return cantidad
+
+class AlmacenamientoParquet:
+    """
+    Formato columnar binario Parquet (mediante pyarrow, dependencia opcional).
+    Los archivos son mucho más chicos que en JSON (cada columna se comprime por separado)
+    y se leen mapeados en memoria, sin parsear texto.
+    """
+    FILAS_POR_LOTE = 50_000
+
+    def guardar(self, ruta: str, datos: Iterable[Any]) -> None:
+        """
+        Guarda los registros en Parquet comprimido con zstd, de a lotes para no
+        tener que convertir todos los registros a la vez. El archivo se reemplaza de forma atómica.
+
+        Args:
+            ruta (str): Archivo destino.
+            datos (Iterable[Any]): Registros a guardar (diccionarios). Las reviews y apps pueden no tener
+                                   todos los campos; cualquier otra columna tiene que aparecer en el primer lote.
+        """
+        pa, pq = self._pyarrow()
+
+        with escritura_atomica(ruta, "wb") as f:
+            escritor = None
+            lote: List[Any] = []
+            try:
+                for registro in datos:
+                    lote.append(registro)
+                    if len(lote) >= self.FILAS_POR_LOTE:
+                        escritor = self._escribir_lote(pa, pq, escritor, f, lote)
+                        lote = []
+
+                if lote or escritor is None:
+                    escritor = self._escribir_lote(pa, pq, escritor, f, lote)
+            finally:
+                if escritor is not None:
+                    escritor.close()
+
+    def cargar(self, ruta: str) -> List[Any]:
+        """
+        Lee todos los registros del archivo.
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Returns:
+            List[Any]: Los registros guardados, como diccionarios.
+        """
+        _, pq = self._pyarrow()
+        return pq.read_table(ruta, memory_map=True).to_pylist()
+
+    def iterar(self, ruta: str) -> Iterator[Any]:
+        """
+        Recorre los registros de a lotes, sin cargar el archivo entero.
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Yields:
+            Any: Cada registro, como diccionario.
+        """
+        _, pq = self._pyarrow()
+        with pq.ParquetFile(ruta, memory_map=True) as archivo:
+            for lote in archivo.iter_batches(batch_size=self.FILAS_POR_LOTE):
+                yield from lote.to_pylist()
+
+    def contar(self, ruta: str) -> int:
+        """
+        Cuenta los registros leyendo solo los metadatos del archivo.
+
+        Args:
+            ruta (str): Archivo a leer.
+
+        Returns:
+            int: Cantidad de registros.
+        """
+        _, pq = self._pyarrow()
+        with pq.ParquetFile(ruta, memory_map=True) as archivo:
+            return archivo.metadata.num_rows
+
+    def _escribir_lote(self, pa: Any, pq: Any, escritor: Any, destino: Any, lote: List[Any]) -> Any:
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, self._esquema(pa, lote), compression="zstd")
+        else:
+            nuevas = {clave for registro in lote for clave in registro} - set(escritor.schema.names)
+            if nuevas:
+                raise ValueError(f"Columnas que no estaban en los primeros registros: {', '.join(sorted(nuevas))}. "
+                                 "No se pueden agregar a un archivo Parquet ya empezado.")
+        escritor.write_table(pa.Table.from_pylist(lote, schema=escritor.schema))
+        return escritor
+
+    def _esquema(self, pa: Any, lote: List[Any]) -> Any:
+        # los campos de Review y SteamApp tienen tipo fijo (y admiten nulos): una columna puede estar vacía
+        # en el primer lote (por ejemplo 'language' en reviews viejas) y aparecer recién en los siguientes.
+        # si hay reviews, siempre se incluyen todos los campos de Review
+        tipos = {"review_id": pa.string(), "review": pa.string(), "voted_up": pa.bool_(), "language": pa.string(),
+                 "appid": pa.int64(), "name": pa.string()}
+        claves = list(dict.fromkeys(clave for registro in lote for clave in registro))
+        if any(clave in Review.__annotations__ for clave in claves):
+            claves += [clave for clave in Review.__annotations__ if clave not in claves]
+
+        campos = []
+        for clave in claves:
+            tipo = tipos.get(clave)
+            if tipo is None:
+                # otras columnas: el tipo se deduce del lote (texto si están vacías)
+                tipo = pa.array([registro.get(clave) for registro in lote]).type
+                if pa.types.is_null(tipo):
+                    tipo = pa.string()
+            campos.append(pa.field(clave, tipo, nullable=True))
+        return pa.schema(campos)
+
+    def _pyarrow(self) -> Any:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Para usar archivos .parquet hace falta instalar pyarrow (pip install pyarrow)") from e
+        return pyarrow, pyarrow.parquet
+
+# formato de almacenamiento según la extensión del archivo; se pueden registrar otros con 'registrar_formato'
+FORMATOS: Dict[str, Any] = {
+    ".json": AlmacenamientoJSON(),
+    ".jsonl": AlmacenamientoJSONL(),
+    ".parquet": AlmacenamientoParquet(),
+}
+
+def registrar_formato(extension: str, almacenamiento: Any) -> None:
+    """
+    Agrega (o reemplaza) el formato usado para los archivos con la extensión indicada.
+
+    Args:
+        extension (str): Extensión con punto, por ejemplo '.parquet'.
+        almacenamiento (Any): Objeto con los métodos 'guardar', 'cargar', 'iterar' y 'contar'.
+    """
+    FORMATOS[extension.lower()] = almacenamiento
 
 class DatasetManager:
     """
-    Clase utilitaria para gestionar la persistencia de datos en archivos JSON.
+    Clase utilitaria para gestionar la persistencia de datos en archivos.
     Se utiliza tanto para almacenar el caché de aplicaciones de Steam como para guardar
     los datasets de reseñas generados.
+
+    El formato se elige según la extensión del archivo: '.json', '.jsonl' o '.parquet'
+    (columnar, más chico y rápido de leer; requiere pyarrow). Con 'exportar' se puede
+    convertir un archivo de un formato a otro.
     """
     def __init__(self, archivo_json: str):
         """
         Inicializa el gestor con la ruta del archivo destino.
 
         Args:
-            archivo_json (str): Ruta o nombre del archivo JSON a gestionar.
+            archivo_json (str): Ruta o nombre del archivo a gestionar. Su extensión define el formato.
         """
         self.archivo_json = archivo_json
+        self.lock = threading.Lock()
+
+    @property
+    def almacenamiento(self) -> Any:
+        """
+        Formato correspondiente a la extensión del archivo (JSON si no es una extensión conocida).
+        """
+        extension = os.path.splitext(self.archivo_json)[1].lower()
+        return FORMATOS.get(extension, FORMATOS[".json"])
 
     def guardar_datos(self, datos: Union[SteamApps, Dataset, List[Any]]) -> None:
         """
-        Serializa y guarda los datos proporcionados en el archivo JSON configurado.
-        Sobrescribe el archivo si ya existe.
+        Serializa y guarda los datos proporcionados en el archivo configurado.
+        Sobrescribe el archivo si ya existe, de forma atómica: si el proceso se corta
+        a mitad de la escritura, el archivo anterior queda intacto.
 
         Args:
             datos (Union[SteamApps, Dataset, List[Any]]): La estructura de datos a guardar (lista de apps o lista de reviews).
         """
-        with open(self.archivo_json, 'w', encoding='utf-8') as f:
-            json.dump(datos, f, indent=4)
+        self.almacenamiento.guardar(self.archivo_json, datos)
 
-    def obtener_apps_json(self) -> SteamApps:
+    def cargar_datos(self) -> List[Any]:
         """
-        Lee el archivo JSON y recupera la lista de aplicaciones de Steam.
-        
+        Lee todos los registros del archivo, sea cual sea su formato.
+
         Returns:
-            SteamApps: Lista de diccionarios con la información de las apps. 
-                       Devuelve una lista vacía si el archivo no existe.
+            List[Any]: Los registros guardados. Devuelve una lista vacía si el archivo no existe.
         """
         if not os.path.exists(self.archivo_json):
             print(f"Error: El archivo {self.archivo_json} no existe.")
             return []
 
-        with open(self.archivo_json, 'r', encoding='utf-8') as archivo:
-            datos: SteamApps = json.load(archivo)
-        
-        return datos
\ No newline at end of file
+        return self.almacenamiento.cargar(self.archivo_json)
+
+    def iterar_datos(self) -> Iterator[Any]:
+        """
+        Recorre los registros del archivo de a uno. En JSONL y Parquet no se carga el archivo entero.
+
+        Yields:
+            Any: Cada registro. No devuelve nada si el archivo no existe.
+        """
+        if not os.path.exists(self.archivo_json):
+            return
+
+        yield from self.almacenamiento.iterar(self.archivo_json)
+
+    def contar_registros(self) -> int:
+        """
+        Cuenta los registros del archivo sin cargarlos (salvo en JSON, donde hace falta).
+
+        Returns:
+            int: Cantidad de registros, o 0 si el archivo no existe.
+        """
+        if not os.path.exists(self.archivo_json):
+            return 0
+
+        return self.almacenamiento.contar(self.archivo_json)
+
+    def exportar(self, destino: str) -> None:
+        """
+        Copia los datos a otro archivo, en el formato que indique su extensión
+        (por ejemplo de '.json' a '.parquet' o al revés).
+
+        Args:
+            destino (str): Archivo destino.
+        """
+        DatasetManager(destino).almacenamiento.guardar(destino, self.iterar_datos())
+
+    def obtener_apps_json(self) -> SteamApps:
+        """
+        Lee el archivo y recupera la lista de aplicaciones de Steam.
+
+        Returns:
+            SteamApps: Lista de diccionarios con la información de las apps.
+                       Devuelve una lista vacía si el archivo no existe.
+        """
+        datos: SteamApps = self.cargar_datos()
+        return datos
+
+    def agregar_jsonl(self, reviews: Dataset) -> None:
+        """
+        Agrega reseñas al final del archivo en formato JSONL (una reseña por línea).
+        Se puede llamar desde varios hilos a la vez.
+
+        Args:
+            reviews (Dataset): Reseñas a agregar.
+        """
+        if not reviews:
+            return
+
+        lineas = "".join(json.dumps(review, ensure_ascii=False) + "\n" for review in reviews)
+
+        with self.lock:
+            with open(self.archivo_json, 'a', encoding='utf-8') as f:
+                f.write(lineas)
+                f.flush()
+                # el checkpoint guarda el cursor después de esto: las reviews tienen que estar en disco antes
+                os.fsync(f.fileno())
+
+    def guardar_jsonl(self, datos: Iterable[Review]) -> None:
+        """
+        Guarda las reseñas en formato JSONL, escribiéndolas de a una sin armar el archivo en memoria.
+        Sobrescribe el archivo si ya existe.
+
+        Args:
+            datos (Iterable[Review]): Reseñas a guardar.
+        """
+        FORMATOS[".jsonl"].guardar(self.archivo_json, datos)
+
+    def iterar_jsonl(self) -> Iterator[Review]:
+        """
+        Recorre las reseñas de un archivo JSONL de a una, sin cargarlo entero en memoria.
+        Ignora las líneas incompletas (por ejemplo si el proceso se cortó al escribirlas).
+
+        Yields:
+            Review: Cada reseña del archivo. No devuelve nada si el archivo no existe.
+        """
+        if not os.path.exists(self.archivo_json):
+            return
+
+        yield from FORMATOS[".jsonl"].iterar(self.archivo_json)
@@ -0,0 +1,137 @@
+import re
+import zlib
+import hashlib
+import unicodedata
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+
+NUM_PERMUTACIONES = 64   # largo de la firma MinHash de cada review
+BANDAS = 8               # bandas del LSH; con 8 filas por banda, un par con similitud 0.9 coincide en alguna con prob. ~0.99
+TAMANIO_SHINGLE = 2      # largo (en palabras) de los fragmentos que se comparan entre reviews
+UMBRAL_SIMILITUD = 0.8   # similitud de Jaccard estimada desde la que dos reviews se consideran casi idénticas
+PRIMO = 4294967291       # primo menor a 2^32, para que (a * h + b) no desborde 64 bits
+
+# una review se representa por el hash de su texto normalizado (duplicados exactos), las claves de
+# las bandas de su firma MinHash (candidatas a duplicado aproximado) y la firma (para confirmarlas)
+ClavesReview = Tuple[int, List[int], np.ndarray]
+
+_generador = np.random.RandomState(0)
+_A = _generador.randint(1, PRIMO, size=NUM_PERMUTACIONES, dtype=np.uint64)
+_B = _generador.randint(0, PRIMO, size=NUM_PERMUTACIONES, dtype=np.uint64)
+
+_NO_ALFANUMERICO = re.compile(r"[\W_]+")
+
+# pasa a minúsculas, unifica caracteres equivalentes (ancho completo, ligaduras) y deja solo letras y
+# números separados por un espacio, así "10/10!!" y "10 / 10" quedan iguales. el arte ASCII queda vacío
+def normalizar_texto(texto: str) -> str:
+    texto = unicodedata.normalize("NFKC", texto).casefold()
+    return _NO_ALFANUMERICO.sub(" ", texto).strip()
+
+def _hash64(datos: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(datos, digest_size=8).digest(), "little")
+
+# firma MinHash de los shingles de palabras del texto normalizado: la proporción de posiciones
+# iguales entre dos firmas estima la similitud de Jaccard entre los textos. se usan palabras y no
+# caracteres para que agregar o cambiar una palabra en una review corta ya la haga distinta
+def firma_minhash(normalizado: str) -> np.ndarray:
+    palabras = normalizado.split()
+    if len(palabras) <= TAMANIO_SHINGLE:
+        shingles = {normalizado}
+    else:
+        shingles = {" ".join(palabras[i:i + TAMANIO_SHINGLE]) for i in range(len(palabras) - TAMANIO_SHINGLE + 1)}
+
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((np.outer(hashes, _A) + _B) % PRIMO).min(axis=0).astype(np.uint32)
+
+# calcula las claves con las que se detectan los duplicados de una review. es la parte costosa,
+# así que se puede hacer en otro proceso y pasarle el resultado a DetectorDuplicados
+def claves_review(texto: str) -> ClavesReview:
+    normalizado = normalizar_texto(texto)
+    firma = firma_minhash(normalizado)
+    filas = NUM_PERMUTACIONES // BANDAS
+
+    bandas = [_hash64(bytes([i]) + firma[i * filas:(i + 1) * filas].tobytes()) for i in range(BANDAS)]
+    return _hash64(normalizado.encode("utf-8")), bandas, firma
+
+# proporción de posiciones iguales entre dos firmas MinHash, que estima la similitud de Jaccard
+def similitud_estimada(firma: np.ndarray, otra: np.ndarray) -> float:
+    return float(np.count_nonzero(firma == otra)) / len(firma)
+
+class DetectorDuplicados:
+    """
+    Detecta reviews repetidas recorriendo el dataset una sola vez, sin comparar cada par de reviews:
+    los duplicados exactos (mismo texto normalizado) por hash y los aproximados por MinHash/LSH,
+    donde dos reviews son candidatas si coinciden en alguna banda de su firma y se confirman solo si
+    la similitud estimada entre sus firmas llega a 'UMBRAL_SIMILITUD'.
+
+    Se conserva la primera review de cada grupo de duplicados y se descartan las siguientes.
+    Solo se guardan en memoria los hashes y las firmas de las reviews conservadas.
+    """
+    def __init__(self, similares: bool = True):
+        """
+        Args:
+            similares (bool): Si además de los duplicados exactos se descartan los aproximados.
+        """
+        self.similares = similares
+        self.exactos: Set[int] = set()
+        self.firmas: List[np.ndarray] = []
+        self.bandas: Dict[int, List[int]] = {}  # clave de banda -> posiciones en 'firmas' de las reviews conservadas
+
+    def registrar(self, claves: ClavesReview) -> Optional[str]:
+        """
+        Indica si la review es duplicada de una ya registrada y, si no lo es, la registra.
+
+        Args:
+            claves (ClavesReview): Claves de la review, calculadas con 'claves_review'.
+
+        Returns:
+            Optional[str]: 'exacta' o 'similar' si es duplicada, None si es nueva.
+        """
+        exacta, bandas, firma = claves
+
+        if exacta in self.exactos:
+            return "exacta"
+
+        if self.similares and self._tiene_similar(bandas, firma):
+            return "similar"
+
+        self.exactos.add(exacta)
+        if self.similares:
+            posicion = len(self.firmas)
+            self.firmas.append(firma)
+            for banda in bandas:
+                self.bandas.setdefault(banda, []).append(posicion)
+        return None
+
+    def _tiene_similar(self, bandas: List[int], firma: np.ndarray) -> bool:
+        """
+        Busca entre las reviews conservadas que coinciden en alguna banda una cuya firma sea suficientemente parecida.
+
+        Args:
+            bandas (List[int]): Claves de las bandas de la review.
+            firma (np.ndarray): Firma MinHash de la review.
+
+        Returns:
+            bool: True si alguna candidata supera el umbral de similitud.
+        """
+        revisadas: Set[int] = set()
+        for banda in bandas:
+            for posicion in self.bandas.get(banda, ()):
+                if posicion in revisadas:
+                    continue
+                revisadas.add(posicion)
+                if similitud_estimada(firma, self.firmas[posicion]) >= UMBRAL_SIMILITUD:
+                    return True
+        return False
+
+    def es_duplicada(self, texto: str) -> Optional[str]:
+        """
+        Igual que 'registrar', calculando las claves a partir del texto.
+
+        Args:
+            texto (str): Texto de la review.
+
+        Returns:
+            Optional[str]: 'exacta' o 'similar' si es duplicada, None si es nueva.
+        """
+        return self.registrar(claves_review(texto))
@@ -1,7 +1,7 @@
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import numpy as np
-from const import MODEL_DEFAULT_DIR_PATH
+from const import MODEL_DEFAULT_DIR_PATH, MAX_LENGTH
 
 # carga el modelo al que ya se le aplico fine-tunning
 def load_model(model_dir: str = MODEL_DEFAULT_DIR_PATH):
@@ -18,7 +18,7 @@ def predict(text: str, tokenizer, model):
         return_tensors="pt",
         truncation=True,
         padding=True,
-        max_length=128
+        max_length=MAX_LENGTH
     )
 
     with torch.no_grad():
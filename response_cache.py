@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, Optional, Tuple, List
+from archivos import escritura_atomica
+
+DIRECTORIO_CACHE = ".cache_steam"       # carpeta por defecto del caché de respuestas
+TTL_CACHE = 12 * 60 * 60                # segundos que una respuesta se considera vigente
+MAX_BYTES_CACHE = 512 * 1024 * 1024     # tamaño máximo del caché en disco
+
+class CacheRespuestas:
+    """
+    Caché en disco de respuestas JSON de la API, direccionado por contenido: cada respuesta
+    se guarda en un archivo cuyo nombre es el hash de la URL y sus parámetros
+    (app_id, review_type, idioma, cursor, ...).
+
+    Las entradas vencen después de 'ttl' segundos y, si el caché supera 'max_bytes',
+    se eliminan las usadas hace más tiempo (LRU, según la fecha de modificación del archivo,
+    que se actualiza en cada lectura).
+    """
+    def __init__(self, directorio: str = DIRECTORIO_CACHE, ttl: float = TTL_CACHE, max_bytes: int = MAX_BYTES_CACHE):
+        """
+        Args:
+            directorio (str): Carpeta donde se guardan las respuestas.
+            ttl (float): Segundos durante los cuales una respuesta guardada es válida.
+            max_bytes (int): Tamaño máximo total de la carpeta.
+        """
+        self.directorio = directorio
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.tamanio_total: Optional[int] = None
+
+    def clave(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Calcula la clave de una request a partir de la URL y los parámetros ordenados.
+
+        Returns:
+            str: Hash SHA-256 en hexadecimal.
+        """
+        contenido = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def obtener(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        Devuelve la respuesta guardada para la request, si existe y no venció.
+
+        Returns:
+            Optional[Any]: El JSON guardado, o None si no hay una respuesta válida.
+        """
+        ruta = self._ruta(self.clave(url, params))
+
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entrada.get("creado", 0) > self.ttl:
+            with self.lock:
+                if self.tamanio_total is not None and os.path.exists(ruta):
+                    self.tamanio_total -= os.path.getsize(ruta)
+                self._eliminar(ruta)
+            return None
+
+        # marcar como usada recientemente para el LRU
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+
+        return entrada.get("datos")
+
+    def guardar(self, url: str, params: Optional[Dict[str, Any]], datos: Any) -> None:
+        """
+        Guarda la respuesta de una request y, si hace falta, libera espacio.
+
+        Args:
+            url (str): URL consultada.
+            params (Optional[Dict[str, Any]]): Parámetros de la request.
+            datos (Any): Respuesta JSON a guardar.
+        """
+        ruta = self._ruta(self.clave(url, params))
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+        contenido = json.dumps({"creado": time.time(), "url": url, "datos": datos}, ensure_ascii=False).encode("utf-8")
+
+        anterior = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+        # es un caché: si se pierde una entrada por un corte se vuelve a pedir, no hace falta fsync
+        with escritura_atomica(ruta, "wb", sincronizar=False) as f:
+            f.write(contenido)
+
+        with self.lock:
+            if self.tamanio_total is None:
+                self.tamanio_total = self._medir()
+            else:
+                self.tamanio_total += len(contenido) - anterior
+
+            if self.tamanio_total > self.max_bytes:
+                self._liberar_espacio()
+
+    def limpiar(self) -> None:
+        """
+        Elimina todas las respuestas guardadas.
+        """
+        with self.lock:
+            for (ruta, _, _) in self._entradas():
+                self._eliminar(ruta)
+            self.tamanio_total = 0
+
+    def _ruta(self, clave: str) -> str:
+        # dos niveles de carpetas para no tener cientos de miles de archivos en una sola
+        return os.path.join(self.directorio, clave[:2], f"{clave}.json")
+
+    def _entradas(self) -> List[Tuple[str, float, int]]:
+        entradas: List[Tuple[str, float, int]] = []
+        if not os.path.isdir(self.directorio):
+            return entradas
+
+        for subcarpeta in os.scandir(self.directorio):
+            if not subcarpeta.is_dir():
+                continue
+            for archivo in os.scandir(subcarpeta.path):
+                if archivo.name.endswith(".json"):
+                    estado = archivo.stat()
+                    entradas.append((archivo.path, estado.st_mtime, estado.st_size))
+        return entradas
+
+    def _medir(self) -> int:
+        return sum(tamanio for (_, _, tamanio) in self._entradas())
+
+    def _liberar_espacio(self) -> None:
+        # se baja hasta el 90% del máximo para no tener que volver a limpiar en la próxima escritura
+        objetivo = int(self.max_bytes * 0.9)
+        ahora = time.time()
+
+        for (ruta, modificado, tamanio) in sorted(self._entradas(), key=lambda entrada: entrada[1]):
+            if self.tamanio_total is not None and self.tamanio_total <= objetivo and ahora - modificado <= self.ttl:
+                break
+            self._eliminar(ruta)
+            self.tamanio_total = (self.tamanio_total or 0) - tamanio
+
+    def _eliminar(self, ruta: str) -> None:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
@@ -0,0 +1,105 @@
+import os
+import hashlib
+import threading
+from array import array
+from typing import Iterable, Set
+
+ARCHIVO_INDICE = "indice_reviews.bin"   # archivo por defecto del índice global de reviews
+
+# convierte un review_id en un entero de 64 bits con signo, para guardarlo en arreglos binarios.
+# los IDs de Steam son numéricos; cualquier otro se convierte con un hash
+def id_a_entero(review_id: str) -> int:
+    if review_id.isdigit() and int(review_id) < 2 ** 63:
+        return int(review_id)
+    return int.from_bytes(hashlib.blake2b(review_id.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+class IndiceReviews:
+    """
+    Índice persistente de los IDs de reviews ya guardadas en algún dataset, compartido entre
+    juegos, tipos de review, idiomas y ejecuciones, para no descargar ni guardar dos veces la misma review.
+
+    En disco es un arreglo de enteros de 64 bits al que solo se le agregan IDs (8 bytes por review);
+    en memoria se carga como un conjunto, así que consultar si un ID está es O(1).
+
+    Durante una descarga los IDs se "reservan" (solo en memoria) para que dos descargas simultáneas
+    no se queden con la misma review; recién al guardar el dataset se agregan al archivo con 'agregar'.
+    Las reservas que no llegaron al dataset (por ejemplo las descartadas al balancear) se liberan con 'liberar'.
+    """
+    def __init__(self, archivo: str = ARCHIVO_INDICE):
+        """
+        Args:
+            archivo (str): Ruta del archivo del índice. Si no existe, el índice empieza vacío.
+        """
+        self.archivo = archivo
+        self.lock = threading.Lock()
+        self.ids: Set[int] = set()
+        self.reservados: Set[int] = set()
+
+        if os.path.exists(archivo):
+            guardados = array("q")
+            with self.lock, open(archivo, "rb+") as f:
+                datos = f.read()
+                # si el proceso se cortó a mitad de una escritura, los bytes sobrantes se descartan también
+                # del archivo: si no, los IDs que se agreguen después quedarían desalineados
+                completos = len(datos) - len(datos) % guardados.itemsize
+                if completos < len(datos):
+                    f.truncate(completos)
+            guardados.frombytes(datos[:completos])
+            self.ids = set(guardados)
+
+    def __contains__(self, review_id: str) -> bool:
+        return id_a_entero(review_id) in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def reservar(self, review_id: str) -> bool:
+        """
+        Marca una review como tomada por la descarga en curso, si nadie la tenía.
+
+        Args:
+            review_id (str): ID de la review.
+
+        Returns:
+            bool: True si la review es nueva, False si ya está en el índice o ya fue reservada.
+        """
+        clave = id_a_entero(review_id)
+        with self.lock:
+            if clave in self.ids or clave in self.reservados:
+                return False
+            self.reservados.add(clave)
+            return True
+
+    def agregar(self, review_ids: Iterable[str]) -> int:
+        """
+        Agrega al índice (y al archivo) los IDs de reviews que se guardaron en un dataset.
+
+        Args:
+            review_ids (Iterable[str]): IDs de las reviews guardadas.
+
+        Returns:
+            int: Cantidad de IDs que no estaban en el índice.
+        """
+        with self.lock:
+            nuevos = array("q")
+            for review_id in review_ids:
+                clave = id_a_entero(review_id)
+                if clave not in self.ids:
+                    self.ids.add(clave)
+                    nuevos.append(clave)
+                self.reservados.discard(clave)
+
+            if nuevos:
+                with open(self.archivo, "ab") as f:
+                    nuevos.tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            return len(nuevos)
+
+    def liberar(self) -> None:
+        """
+        Descarta las reservas de la descarga en curso que no se agregaron al índice.
+        """
+        with self.lock:
+            self.reservados.clear()
@@ -0,0 +1,244 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, Callable
+from response_cache import CacheRespuestas
+
+REQUESTS_POR_SEGUNDO = 5.0   # tasa sostenida permitida contra la API de Steam
+RAFAGA_MAXIMA = 5            # cantidad de requests que se pueden hacer de golpe
+MAX_REINTENTOS = 5           # reintentos ante 429, 5xx o timeouts
+BACKOFF_BASE = 1.0           # segundos de espera del primer reintento
+BACKOFF_MAX = 30.0           # tope de espera entre reintentos
+POOL_CONEXIONES = 16         # conexiones keep-alive por host
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+# espera hasta los segundos indicados y devuelve True si mientras tanto se pidió cancelar,
+# como 'threading.Event.wait' del evento que detiene una descarga
+Esperar = Optional[Callable[[float], bool]]
+
+class LimitadorTasa:
+    """
+    Limitador de tasa de tipo token bucket, seguro para usar desde varios hilos.
+    Cada request consume un token; los tokens se reponen a 'tasa' por segundo
+    hasta un máximo de 'capacidad'.
+    """
+    def __init__(self, tasa: float, capacidad: int):
+        """
+        Args:
+            tasa (float): Tokens repuestos por segundo.
+            capacidad (int): Cantidad máxima de tokens acumulables (tamaño de la ráfaga).
+        """
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = float(capacidad)
+        self.ultima_reposicion = time.monotonic()
+        self.lock = threading.Lock()
+
+    def adquirir(self) -> None:
+        """
+        Bloquea hasta que haya un token disponible y lo consume.
+        """
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultima_reposicion) * self.tasa)
+                self.ultima_reposicion = ahora
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                espera = (1 - self.tokens) / self.tasa
+
+            time.sleep(espera)
+
+class SteamClient:
+    """
+    Cliente HTTP compartido para las llamadas a Steam.
+    Reutiliza conexiones mediante una sesión con pool keep-alive, respeta un limitador
+    de tasa común a todos los hilos y reintenta con backoff exponencial y jitter
+    ante respuestas 429/5xx, timeouts y errores de conexión.
+    Opcionalmente guarda las respuestas JSON en un caché en disco (ver 'get_json').
+    """
+    def __init__(self, requests_por_segundo: float = REQUESTS_POR_SEGUNDO, rafaga: int = RAFAGA_MAXIMA,
+                 max_reintentos: int = MAX_REINTENTOS, pool_conexiones: int = POOL_CONEXIONES,
+                 cache: Optional[CacheRespuestas] = None):
+        """
+        Args:
+            requests_por_segundo (float): Tasa sostenida de requests permitida.
+            rafaga (int): Cantidad de requests que se pueden hacer sin esperar.
+            max_reintentos (int): Cantidad máxima de reintentos por request.
+            pool_conexiones (int): Tamaño del pool de conexiones por host.
+            cache (Optional[CacheRespuestas]): Caché en disco para las respuestas de 'get_json'.
+        """
+        self.max_reintentos = max_reintentos
+        self.cache = cache
+        self.limitador = LimitadorTasa(requests_por_segundo, rafaga)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_conexiones, pool_maxsize=pool_conexiones)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.lock = threading.Lock()
+        self.inicio = time.monotonic()
+        self.total_requests = 0
+        self.total_reintentos = 0
+        self.total_errores = 0
+        self.total_aciertos_cache = 0
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10,
+            esperar: Esperar = None) -> requests.Response:
+        """
+        Realiza un GET respetando el limitador de tasa y la política de reintentos.
+
+        Args:
+            url (str): URL a consultar.
+            params (Optional[Dict[str, Any]]): Parámetros de la query string.
+            timeout (float): Tiempo máximo de espera por intento, en segundos.
+            esperar (Esperar): Con qué esperar entre reintentos (por ejemplo 'detener.wait'), para
+                               que una cancelación no tenga que esperar a que termine el backoff.
+
+        Returns:
+            requests.Response: La última respuesta obtenida. Si se agotaron los reintentos
+                               puede tener un código de error (429/5xx).
+
+        Raises:
+            requests.exceptions.RequestException: Si el último intento falló por timeout o conexión.
+            InterruptedError: Si se pidió cancelar mientras se esperaba para reintentar.
+        """
+        intento = 0
+        while True:
+            self.limitador.adquirir()
+            self._contar("total_requests")
+
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if intento >= self.max_reintentos:
+                    self._contar("total_errores")
+                    raise
+                self._esperar(intento, esperar=esperar)
+                intento += 1
+                continue
+
+            if response.status_code in CODIGOS_REINTENTABLES and intento < self.max_reintentos:
+                self._esperar(intento, response.headers.get("Retry-After"), esperar)
+                intento += 1
+                continue
+
+            if response.status_code >= 400:
+                self._contar("total_errores")
+
+            return response
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10,
+                 usar_cache: bool = True, esperar: Esperar = None) -> Any:
+        """
+        Realiza un GET y devuelve el JSON de la respuesta, usando el caché en disco si está configurado.
+        Solo se guardan en el caché las respuestas exitosas.
+
+        Args:
+            url (str): URL a consultar.
+            params (Optional[Dict[str, Any]]): Parámetros de la query string.
+            timeout (float): Tiempo máximo de espera por intento, en segundos.
+            usar_cache (bool): False para ignorar el caché y pedir siempre datos frescos.
+            esperar (Esperar): Con qué esperar entre reintentos (ver 'get').
+
+        Returns:
+            Any: El JSON de la respuesta.
+
+        Raises:
+            requests.exceptions.RequestException: Si la request falló o la respuesta tiene un código de error.
+            InterruptedError: Si se pidió cancelar mientras se esperaba para reintentar.
+        """
+        if self.cache and usar_cache:
+            datos = self.cache.obtener(url, params)
+            if datos is not None:
+                self._contar("total_aciertos_cache")
+                return datos
+
+        response = self.get(url, params=params, timeout=timeout, esperar=esperar)
+        response.raise_for_status()
+        datos = response.json()
+
+        if self.cache and usar_cache:
+            self.cache.guardar(url, params, datos)
+
+        return datos
+
+    def metricas(self, desde: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Devuelve las métricas acumuladas desde la creación del cliente o, con 'desde', solo las
+        posteriores a esa medición (por ejemplo, las de una descarga).
+
+        Args:
+            desde (Optional[Dict[str, float]]): Métricas tomadas antes con este mismo método.
+
+        Returns:
+            Dict[str, float]: Requests totales, reintentos, errores, respuestas servidas desde el caché,
+                              segundos transcurridos y requests por segundo.
+        """
+        with self.lock:
+            metricas = {
+                "requests": self.total_requests,
+                "reintentos": self.total_reintentos,
+                "errores": self.total_errores,
+                "aciertos_cache": self.total_aciertos_cache,
+                "segundos": time.monotonic() - self.inicio
+            }
+
+        if desde:
+            metricas = {clave: valor - desde.get(clave, 0) for (clave, valor) in metricas.items()}
+        metricas["requests_por_segundo"] = metricas["requests"] / max(metricas["segundos"], 1e-9)
+        return metricas
+
+    def _esperar(self, intento: int, retry_after: Optional[str] = None, esperar: Esperar = None) -> None:
+        self._contar("total_reintentos")
+
+        # si el servidor indica cuánto esperar se respeta, sino backoff exponencial con jitter completo
+        if retry_after and retry_after.isdigit():
+            espera = min(float(retry_after), BACKOFF_MAX)
+        else:
+            espera = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** intento)))
+
+        if esperar is None:
+            time.sleep(espera)
+        elif esperar(espera):
+            raise InterruptedError("Detenido por el usuario")
+
+    def _contar(self, contador: str) -> None:
+        with self.lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+_cliente: Optional[SteamClient] = None
+_cliente_lock = threading.Lock()
+
+def configurar_cliente(cliente: Optional[SteamClient]) -> None:
+    """
+    Reemplaza el cliente compartido, por ejemplo para usar otra tasa o empezar métricas nuevas.
+    Con None se vuelve a crear uno con la configuración por defecto en el próximo uso.
+
+    Args:
+        cliente (Optional[SteamClient]): Cliente a compartir desde ahora.
+    """
+    global _cliente
+    with _cliente_lock:
+        _cliente = cliente
+
+def obtener_cliente() -> SteamClient:
+    """
+    Devuelve el cliente compartido por todo el proceso, creándolo la primera vez.
+    Compartirlo hace que todos los hilos usen el mismo pool de conexiones, el mismo limitador
+    y el mismo caché de respuestas.
+
+    Returns:
+        SteamClient: Instancia única del cliente.
+    """
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = SteamClient(cache=CacheRespuestas())
+        return _cliente
@@ -1,4 +1,4 @@
-from typing import TypedDict, List, Union, Set
+from typing import TypedDict, List, Union, Set, NotRequired
 
 class Review(TypedDict):
     """
@@ -8,10 +8,13 @@ class Review(TypedDict):
         review_id (str): Identificador único de la reseña.
         review (str): El contenido textual de la reseña.
         voted_up (bool): True si la reseña es positiva, False si es negativa.
+        language (str): Idioma de la reseña según Steam (ej: 'spanish'). Los datasets
+                        anteriores a la descarga multi-idioma no lo tienen.
     """
     review_id: str
     review: str
     voted_up: bool
+    language: NotRequired[str]
 
 # Alias para una lista de reseñas
 Dataset = List[Review]
@@ -1,18 +1,22 @@
-from PySide6.QtWidgets import QWidget, QLineEdit, QPushButton, QSpinBox, QFormLayout
-import clean
-from const import MAX_WORDS, MIN_WORDS, DATASET_NAME
+import os
+from PySide6.QtWidgets import (QWidget, QLineEdit, QPushButton, QSpinBox, QFormLayout, QCheckBox,
+                               QProgressBar, QLabel, QMessageBox)
+from PySide6.QtCore import QThread
+from const import MAX_WORDS, MIN_WORDS, DATASET_NAME, MAX_LENGTH
+from clean import MAX_PROCESOS
+from workers import CleanWorker
 
 class CleanTab(QWidget):
     """
     Pestaña para la limpieza del dataset.
-    Permite configurar filtros de longitud de palabras (mínimo y máximo) y ejecutar
-    la función de limpieza sobre el archivo JSON especificado.
+    Permite configurar filtros de longitud de palabras (mínimo y máximo), elegir el archivo de entrada
+    y el de salida, y ejecutar la limpieza en segundo plano con un `CleanWorker`, con progreso y cancelación.
     """
 
     def __init__(self):
         """
-        Inicializa los controles de configuración (nombre de archivo, spinboxes de límites)
-        y el botón de acción para ejecutar la limpieza.
+        Inicializa los controles de configuración (archivos de entrada y salida, spinboxes de límites,
+        opciones de deduplicación y de filtrado por tokens) y el botón de acción para ejecutar la limpieza.
         """
         super().__init__()
 
@@ -20,18 +24,172 @@ class CleanTab(QWidget):
 
         self.line_edit_dataset_file = QLineEdit(placeholderText="steam_review.json")
         self.line_edit_dataset_file.setText(DATASET_NAME)
+        self.line_edit_dataset_file.textChanged.connect(self.sugerir_salida)
+        self.line_edit_output_file = QLineEdit(placeholderText="Vacío para sobrescribir el dataset")
+        self.sugerir_salida(DATASET_NAME)
         self.spinbox_min_words = QSpinBox()
         self.spinbox_min_words.setMinimum(MIN_WORDS)
         self.spinbox_min_words.valueChanged.connect(lambda: self.spinbox_max_words.setMinimum(self.spinbox_min_words.value()))
         self.spinbox_max_words = QSpinBox()
         self.spinbox_max_words.setMinimum(self.spinbox_min_words.value())
         self.spinbox_max_words.setValue(MAX_WORDS)
+
+        self.checkbox_deduplicar = QCheckBox("Eliminar reviews repetidas o casi idénticas")
+
+        self.checkbox_tokens = QCheckBox("Filtrar también por cantidad de tokens del modelo")
+        self.spinbox_min_tokens = QSpinBox()
+        self.spinbox_min_tokens.setRange(0, 100000)
+        self.spinbox_max_tokens = QSpinBox()
+        self.spinbox_max_tokens.setRange(1, 100000)
+        self.spinbox_max_tokens.setValue(MAX_LENGTH)
+        self.checkbox_tokens.toggled.connect(self.spinbox_min_tokens.setEnabled)
+        self.checkbox_tokens.toggled.connect(self.spinbox_max_tokens.setEnabled)
+        self.spinbox_min_tokens.setEnabled(False)
+        self.spinbox_max_tokens.setEnabled(False)
+
+        self.spinbox_procesos = QSpinBox()
+        self.spinbox_procesos.setRange(1, os.cpu_count() or 1)
+        self.spinbox_procesos.setValue(MAX_PROCESOS)
+
         self.button = QPushButton("Limpiar dataset")
-        self.button.clicked.connect(lambda: clean.ejecutar_limpieza(self.spinbox_min_words.value(), self.spinbox_max_words.value()))
+        self.button.clicked.connect(self.iniciar_limpieza)
+        self.button_cancelar = QPushButton("Cancelar")
+        self.button_cancelar.setVisible(False)
+        self.button_cancelar.clicked.connect(self.cancelar_limpieza)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(False)
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: gray; font-style: italic;")
+        self.status_label.setVisible(False)
+        self.stats_label = QLabel("")
+        self.stats_label.setVisible(False)
 
         layout.addRow("Introduzca el nombre del archivo del dataset", self.line_edit_dataset_file)
+        layout.addRow("Introduzca el nombre del archivo de salida", self.line_edit_output_file)
         layout.addRow("Introduzca la cantidad mínima de palabras en cada review", self.spinbox_min_words)
         layout.addRow("Introduzca la cantidad máxima de palabras en cada review", self.spinbox_max_words)
+        layout.addRow(self.checkbox_deduplicar)
+        layout.addRow(self.checkbox_tokens)
+        layout.addRow("Introduzca la cantidad mínima de tokens en cada review", self.spinbox_min_tokens)
+        layout.addRow("Introduzca la cantidad máxima de tokens en cada review", self.spinbox_max_tokens)
+        layout.addRow("Introduzca la cantidad de procesos", self.spinbox_procesos)
         layout.addRow(self.button)
+        layout.addRow(self.button_cancelar)
+        layout.addRow(self.status_label)
+        layout.addRow(self.progress_bar)
+        layout.addRow(self.stats_label)
+
+        self.setLayout(layout)
+
+    def sugerir_salida(self, entrada: str):
+        """
+        Propone como salida el nombre del dataset con el sufijo '_limpio', para no sobrescribirlo por defecto.
+        """
+        base, extension = os.path.splitext(entrada.strip())
+        self.line_edit_output_file.setText(f"{base}_limpio{extension}" if base else "")
+
+    def iniciar_limpieza(self):
+        """
+        Recopila la configuración de la UI, bloquea los controles y lanza el `CleanWorker`
+        en un hilo separado para limpiar el dataset.
+        """
+        entrada = self.line_edit_dataset_file.text().strip()
+        if not entrada:
+            return
+        salida = self.line_edit_output_file.text().strip() or entrada
+
+        rango_tokens = None
+        if self.checkbox_tokens.isChecked():
+            rango_tokens = (self.spinbox_min_tokens.value(), self.spinbox_max_tokens.value())
+
+        self.cambiar_estado_controles(False)
+        self.button.setText("Limpiando dataset...")
+        self.button_cancelar.setEnabled(True)
+        self.button_cancelar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText("Iniciando...")
+        self.status_label.setVisible(True)
+        self.stats_label.setVisible(False)
+
+        self.worker_thread = QThread()
+        self.worker = CleanWorker(entrada, salida, self.spinbox_min_words.value(), self.spinbox_max_words.value(),
+                                  self.spinbox_procesos.value(), self.checkbox_deduplicar.isChecked(), rango_tokens)
+        self.worker.moveToThread(self.worker_thread)
+
+        self.worker_thread.started.connect(self.worker.run)
+
+        self.worker.signals.error.connect(self.mostrar_error)
+        self.worker.signals.log.connect(self.status_label.setText)
+        self.worker.signals.progress.connect(self.progress_bar.setValue)
+        self.worker.signals.stats_ready.connect(self.mostrar_estadisticas)
+        self.worker.signals.file_ready.connect(self.procesar_archivo_guardado)
+        self.worker.signals.finished.connect(self.limpiar_thread)
+        self.worker.signals.finished.connect(self.restaurar_ui)
+
+        self.worker_thread.start()
+
+    def cancelar_limpieza(self):
+        """Pide al worker que se detenga; el archivo de salida no se modifica."""
+        self.button_cancelar.setEnabled(False)
+        self.status_label.setText("Cancelando...")
+        self.worker.stop()
+
+    def mostrar_error(self, mensaje_error):
+        """
+        Muestra un cuadro de diálogo con el mensaje de error.
+        """
+        QMessageBox.critical(self, "Error", mensaje_error)
+
+    def mostrar_estadisticas(self, estadisticas: dict):
+        """
+        Muestra el resumen de la limpieza: reviews leídas, conservadas y descartadas por cada motivo.
+        """
+        lineas = [f"Reviews leídas: {estadisticas['leidas']}",
+                  f"Reviews conservadas: {estadisticas['conservadas']}",
+                  f"Muy cortas: {estadisticas['cortas']} | Muy largas: {estadisticas['largas']}"]
+        if self.checkbox_deduplicar.isChecked():
+            lineas.append(f"Repetidas: {estadisticas['exactas']} | Casi idénticas: {estadisticas['similares']}")
+        if self.checkbox_tokens.isChecked():
+            lineas.append(f"Pocos tokens: {estadisticas['tokens_cortas']} | Muchos tokens: {estadisticas['tokens_largas']}")
+        if estadisticas["invalidas"]:
+            lineas.append(f"Líneas inválidas: {estadisticas['invalidas']}")
+
+        self.stats_label.setText("\n".join(lineas))
+        self.stats_label.setVisible(True)
+
+    def procesar_archivo_guardado(self, filename):
+        """
+        Callback ejecutado cuando el worker ya escribió el dataset limpio en disco.
+        """
+        QMessageBox.information(self, "Éxito", f"Dataset limpio guardado en {filename}")
+
+    def limpiar_thread(self):
+        """Limpia el hilo y el worker de memoria."""
+        self.worker_thread.quit()
+        self.worker_thread.wait()
+        self.worker_thread.deleteLater()
+        self.worker.deleteLater()
+
+    def cambiar_estado_controles(self, habilitados: bool):
+        """Habilita o deshabilita los controles de configuración."""
+        self.line_edit_dataset_file.setEnabled(habilitados)
+        self.line_edit_output_file.setEnabled(habilitados)
+        self.spinbox_min_words.setEnabled(habilitados)
+        self.spinbox_max_words.setEnabled(habilitados)
+        self.checkbox_deduplicar.setEnabled(habilitados)
+        self.checkbox_tokens.setEnabled(habilitados)
+        self.spinbox_min_tokens.setEnabled(habilitados and self.checkbox_tokens.isChecked())
+        self.spinbox_max_tokens.setEnabled(habilitados and self.checkbox_tokens.isChecked())
+        self.spinbox_procesos.setEnabled(habilitados)
+        self.button.setEnabled(habilitados)
 
-        self.setLayout(layout)
\ No newline at end of file
+    def restaurar_ui(self):
+        """Reactiva todos los controles de la interfaz después de finalizar el proceso."""
+        self.cambiar_estado_controles(True)
+        self.button.setText("Limpiar dataset")
+        self.button_cancelar.setVisible(False)
+        self.progress_bar.setVisible(False)
@@ -1,18 +1,31 @@
 from PySide6.QtWidgets import (QVBoxLayout, QWidget, QLineEdit, QPushButton, 
                                QSpinBox, QFormLayout, QCompleter, QHBoxLayout,
-                               QScrollArea, QLabel, QFrame, QMessageBox, QProgressBar)
-from PySide6.QtCore import Qt, QStringListModel, QThread, QRegularExpression
+                               QScrollArea, QLabel, QFrame, QMessageBox, QProgressBar, QCheckBox)
+from PySide6.QtCore import Qt, QStringListModel, QThread, QRegularExpression, QTimer, Signal
 from PySide6.QtGui import QRegularExpressionValidator
-from dataset import MAX_FETCH_LIMIT
+from dataset import MAX_FETCH_LIMIT, MAX_WORKERS, IDIOMA_POR_DEFECTO
+from const import MIN_WORDS, MAX_WORDS
 from dataset_manager import DatasetManager
-from workers import DatasetWorker
+from workers import DatasetWorker, BuscadorJuegos
+from typing import List, Dict, Tuple, Optional
+
+DEMORA_BUSQUEDA_MS = 150 # se busca cuando el usuario deja de escribir por este tiempo
+TEXTO_EJEMPLO = "Ej: 32330"
+TEXTO_CARGANDO = "Ej: 32330 (cargando lista de juegos...)"
 
 class DatasetTab(QWidget):
     """
     Pestaña encargada de la creación y configuración del dataset.
     Permite seleccionar múltiples juegos, definir límites de reseñas (positivas/negativas)
     y descargar la información utilizando un worker en segundo plano.
+
+    Attributes:
+        pedir_carga (Signal): Pide al `BuscadorJuegos` que cargue el índice del caché de apps.
+        pedir_busqueda (Signal): Envía una consulta del autocompletado al `BuscadorJuegos`.
     """
+    pedir_carga = Signal(str)
+    pedir_busqueda = Signal(int, str, list)
+
     def __init__(self, dataset_manager: DatasetManager):
         """
         Inicializa la interfaz de la pestaña de dataset.
@@ -20,12 +33,26 @@ class DatasetTab(QWidget):
         y conecta los validadores de entrada.
 
         Args:
-            dataset_manager (DatasetManager): Gestor para obtener la lista de juegos disponibles y guardar el resultado.
+            dataset_manager (DatasetManager): Gestor para obtener la lista de juegos disponibles.
         """
         super().__init__()
 
         self.dataset_manager = dataset_manager
-        self.todos_los_juegos = [] 
+        self.numero_consulta = 0
+        self.juegos_cargados = False
+        self.fila_consulta: Optional[FilaJuego] = None
+
+        # el índice de juegos se construye y se consulta en su propio hilo
+        self.buscador_thread = QThread()
+        self.buscador = BuscadorJuegos()
+        self.buscador.moveToThread(self.buscador_thread)
+        self.pedir_carga.connect(self.buscador.cargar)
+        self.pedir_busqueda.connect(self.buscador.buscar)
+        self.buscador.signals.suggestions_ready.connect(self.mostrar_sugerencias)
+        self.buscador.signals.index_ready.connect(self.activar_autocompletado)
+        self.buscador.signals.error.connect(self.mostrar_error)
+        self.buscador_thread.start()
+
         self.cargar_datos()
 
         self.scroll_area = QScrollArea()
@@ -45,7 +72,7 @@ class DatasetTab(QWidget):
         self.btn_agregar.clicked.connect(self.agregar_nueva_fila)
 
         self.line_edit_filename = QLineEdit("steam_reviews.json")
-        self.line_edit_filename.setPlaceholderText("nombre_del_archivo.json")
+        self.line_edit_filename.setPlaceholderText("nombre_del_archivo.json, .jsonl o .parquet")
 
         regex = QRegularExpression(r"^[\w\-. ]+$")
         validator = QRegularExpressionValidator(regex, self.line_edit_filename)
@@ -60,6 +87,31 @@ class DatasetTab(QWidget):
         self.spinbox_neg_limit = QSpinBox()
         self.spinbox_neg_limit.setMaximum(MAX_FETCH_LIMIT)
 
+        self.spinbox_max_workers = QSpinBox()
+        self.spinbox_max_workers.setRange(1, 16)
+        self.spinbox_max_workers.setValue(MAX_WORKERS)
+
+        self.checkbox_refrescar = QCheckBox("Si el dataset ya existe, agregar solo las reviews nuevas")
+
+        self.checkbox_indice = QCheckBox("No repetir reviews ya guardadas en otros datasets")
+
+        self.checkbox_filtrar = QCheckBox("Contar solo reviews con la cantidad de palabras indicada")
+        self.spinbox_min_words = QSpinBox()
+        self.spinbox_min_words.setMinimum(1)
+        self.spinbox_min_words.setValue(MIN_WORDS)
+        self.spinbox_max_words = QSpinBox()
+        self.spinbox_max_words.setMaximum(1000)
+        self.spinbox_max_words.setValue(MAX_WORDS)
+        self.spinbox_min_words.valueChanged.connect(lambda: self.spinbox_max_words.setMinimum(self.spinbox_min_words.value()))
+        self.checkbox_filtrar.toggled.connect(self.spinbox_min_words.setEnabled)
+        self.checkbox_filtrar.toggled.connect(self.spinbox_max_words.setEnabled)
+        self.spinbox_min_words.setEnabled(False)
+        self.spinbox_max_words.setEnabled(False)
+
+        self.line_edit_idiomas = QLineEdit("spanish")
+        self.line_edit_idiomas.setPlaceholderText("spanish, english:500:300 (idioma[:positivas:negativas])")
+        self.line_edit_idiomas.setValidator(QRegularExpressionValidator(QRegularExpression(r"^[a-z:0-9, ]*$"), self.line_edit_idiomas))
+
         form_layout = QFormLayout()
         form_layout.setLabelAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
         form_layout.setSpacing(10)
@@ -67,6 +119,13 @@ class DatasetTab(QWidget):
         form_layout.addRow("Límite positivas:", self.spinbox_pos_limit)
         form_layout.addRow("Límite negativas:", self.spinbox_neg_limit)
         form_layout.addRow("Máxima diferencia entre reviews:", self.spinbox_max_diff)
+        form_layout.addRow("Descargas simultáneas:", self.spinbox_max_workers)
+        form_layout.addRow("Idiomas:", self.line_edit_idiomas)
+        form_layout.addRow("Actualizar:", self.checkbox_refrescar)
+        form_layout.addRow("Índice global:", self.checkbox_indice)
+        form_layout.addRow("Filtrar al descargar:", self.checkbox_filtrar)
+        form_layout.addRow("Mínimo de palabras:", self.spinbox_min_words)
+        form_layout.addRow("Máximo de palabras:", self.spinbox_max_words)
 
         self.button = QPushButton("Crear dataset")
         self.button.clicked.connect(self.crear_dataset)
@@ -132,26 +191,82 @@ class DatasetTab(QWidget):
         Instancia y agrega un nuevo widget `FilaJuego` al layout vertical.
         Permite al usuario seleccionar un nuevo juego.
         """
-        fila = FilaJuego(self.modelo_completer, self.todos_los_juegos, self.obtener_juegos_seleccionados)
+        fila = FilaJuego(self.modelo_completer, self.buscar_juegos)
+        if not self.juegos_cargados:
+            fila.line_edit_appid.setPlaceholderText(TEXTO_CARGANDO)
         self.layout_items.addWidget(fila)
         fila.line_edit_appid.setFocus()
 
     def cargar_datos(self):
         """
-        Carga la lista completa de aplicaciones de Steam desde el caché local
-        para alimentar el autocompletado.
+        Pide al `BuscadorJuegos` que cargue, en su hilo, la lista de aplicaciones de Steam del caché
+        local para alimentar el autocompletado. No bloquea: el autocompletado se activa solo cuando
+        la lista está lista (ver `activar_autocompletado`). Se puede volver a llamar después de
+        sincronizar el caché.
+        """
+        self.pedir_carga.emit(self.dataset_manager.archivo_json)
+
+    def activar_autocompletado(self, cantidad: int) -> None:
+        """
+        Se ejecuta cuando el índice de juegos está listo. Si el usuario ya había empezado
+        a escribir en una fila, busca las sugerencias para ese texto.
         """
+        self.juegos_cargados = True
+
+        for i in range(self.layout_items.count()):
+            fila = self.layout_items.itemAt(i).widget()
+            if isinstance(fila, FilaJuego):
+                fila.line_edit_appid.setPlaceholderText(TEXTO_EJEMPLO)
+                if fila.line_edit_appid.hasFocus() and fila.obtener_texto():
+                    fila.actualizar_sugerencias()
+
+    def buscar_juegos(self, fila: "FilaJuego", texto: str) -> None:
+        """
+        Envía la búsqueda de una fila al `BuscadorJuegos`, sin sugerir juegos ya seleccionados en otras filas.
+        Solo se muestran las sugerencias de la última consulta.
+        """
+        if not texto.strip() or not self.juegos_cargados:
+            return
+
+        self.numero_consulta += 1
+        self.fila_consulta = fila
+        self.pedir_busqueda.emit(self.numero_consulta, texto, list(self.obtener_juegos_seleccionados()))
+
+    def mostrar_sugerencias(self, consulta: int, sugerencias: List[str]) -> None:
+        """
+        Muestra en el autocompletado de la fila las sugerencias recibidas, si siguen siendo
+        las de la última consulta y la fila todavía existe.
+        """
+        if consulta != self.numero_consulta or self.fila_consulta is None:
+            return
+
         try:
-            steamapps = self.dataset_manager.obtener_apps_json()
-            self.todos_los_juegos = [f"{app['appid']} ({app['name']})" for app in steamapps]
-        except:
-            self.todos_los_juegos = []
+            if not self.fila_consulta.line_edit_appid.hasFocus():
+                return
+        except RuntimeError:
+            # la fila se eliminó mientras se buscaba
+            return
+
+        self.modelo_completer.setStringList(sugerencias)
+        self.fila_consulta.completer.complete()
+
+    def detener_busquedas(self) -> None:
+        """Detiene el hilo del `BuscadorJuegos`. Se llama al cerrar la ventana."""
+        self.buscador_thread.quit()
+        self.buscador_thread.wait()
 
     def crear_dataset(self) -> None:
         """
         Recopila la configuración de la UI (IDs, límites, nombre de archivo),
         bloquea la interfaz y lanza el `DatasetWorker` en un hilo separado para generar el dataset.
         """
+        # los idiomas se validan antes de bloquear la interfaz, así un error de formato no la deja bloqueada
+        try:
+            idiomas, limites_idiomas = self.obtener_idiomas()
+        except ValueError as e:
+            QMessageBox.warning(self, "Idiomas inválidos", str(e))
+            return
+
         app_ids = []
         try:
             for i in range(self.layout_items.count()):
@@ -180,6 +295,24 @@ class DatasetTab(QWidget):
             max_diff = self.spinbox_max_diff.value()
             self.spinbox_max_diff.setEnabled(False)
 
+            max_workers = self.spinbox_max_workers.value()
+            self.spinbox_max_workers.setEnabled(False)
+
+            refrescar = self.checkbox_refrescar.isChecked()
+            self.checkbox_refrescar.setEnabled(False)
+
+            usar_indice = self.checkbox_indice.isChecked()
+            self.checkbox_indice.setEnabled(False)
+
+            rango_palabras = None
+            if self.checkbox_filtrar.isChecked():
+                rango_palabras = (self.spinbox_min_words.value(), self.spinbox_max_words.value())
+            self.checkbox_filtrar.setEnabled(False)
+            self.spinbox_min_words.setEnabled(False)
+            self.spinbox_max_words.setEnabled(False)
+
+            self.line_edit_idiomas.setEnabled(False)
+
             self.btn_agregar.setEnabled(False)
 
             self.button.setText("Creando dataset...")
@@ -191,13 +324,14 @@ class DatasetTab(QWidget):
             self.status_label.setVisible(True)
 
             self.worker_thread = QThread()
-            self.worker = DatasetWorker(app_ids, pos_limit, neg_limit, filename, max_diff)
+            self.worker = DatasetWorker(app_ids, pos_limit, neg_limit, filename, max_diff, max_workers, refrescar, rango_palabras,
+                                        idiomas, limites_idiomas, usar_indice)
             self.worker.moveToThread(self.worker_thread)
 
             self.worker_thread.started.connect(self.worker.run)
 
             self.worker.signals.error.connect(self.mostrar_error)
-            self.worker.signals.data_ready.connect(self.procesar_datos_exitosos)
+            self.worker.signals.file_ready.connect(self.procesar_archivo_guardado)
             self.worker.signals.log.connect(self.status_label.setText)
             self.worker.signals.progress.connect(self.actualizar_barra_progreso)
             self.worker.signals.finished.connect(self.limpiar_thread)
@@ -214,15 +348,11 @@ class DatasetTab(QWidget):
         """
         QMessageBox.critical(self, "Error", mensaje_error)
 
-    def procesar_datos_exitosos(self, datos):
+    def procesar_archivo_guardado(self, filename):
         """
-        Callback ejecutado cuando el worker finaliza exitosamente.
-        Guarda los datos generados y notifica al usuario.
+        Callback ejecutado cuando el worker ya escribió el dataset en disco.
         """
-        dataset = DatasetManager(self.line_edit_filename.text())
-        dataset.guardar_datos(datos)
-
-        QMessageBox.information(self, "Éxito", "Dataset creado exitosamente")
+        QMessageBox.information(self, "Éxito", f"Dataset guardado en {filename}")
     
     def actualizar_barra_progreso(self, valor):
         """Actualiza el valor de la barra de progreso."""
@@ -247,6 +377,18 @@ class DatasetTab(QWidget):
 
         self.spinbox_max_diff.setEnabled(True)
 
+        self.spinbox_max_workers.setEnabled(True)
+
+        self.line_edit_idiomas.setEnabled(True)
+
+        self.checkbox_refrescar.setEnabled(True)
+
+        self.checkbox_indice.setEnabled(True)
+
+        self.checkbox_filtrar.setEnabled(True)
+        self.spinbox_min_words.setEnabled(self.checkbox_filtrar.isChecked())
+        self.spinbox_max_words.setEnabled(self.checkbox_filtrar.isChecked())
+
         self.spinbox_pos_limit.setEnabled(True)
 
         self.spinbox_neg_limit.setEnabled(True)
@@ -263,14 +405,49 @@ class DatasetTab(QWidget):
 
         self.status_label.setVisible(False)
 
+    def obtener_idiomas(self) -> Tuple[List[str], Dict[str, Tuple[int, int]]]:
+        """
+        Interpreta el campo de idiomas: una lista separada por comas donde cada idioma puede
+        llevar límites propios con el formato 'idioma:positivas:negativas'.
+
+        Returns:
+            Tuple[List[str], Dict[str, Tuple[int, int]]]: Los idiomas a descargar y los límites propios de cada uno.
+
+        Raises:
+            ValueError: Si algún idioma no tiene exactamente dos límites o sus límites no son números enteros no negativos.
+        """
+        idiomas: List[str] = []
+        limites_idiomas: Dict[str, Tuple[int, int]] = {}
+
+        for entrada in self.line_edit_idiomas.text().split(","):
+            partes = [parte.strip() for parte in entrada.split(":")]
+            if not partes[0] and len(partes) > 1:
+                raise ValueError(f"'{entrada.strip()}': falta el nombre del idioma.")
+            if not partes[0] or partes[0] in idiomas:
+                continue
+
+            if len(partes) == 1:
+                idiomas.append(partes[0])
+                continue
+
+            if len(partes) != 3:
+                raise ValueError(f"'{entrada.strip()}': los límites se indican como 'idioma:positivas:negativas'.")
+            if not (partes[1].isdecimal() and partes[2].isdecimal()):
+                raise ValueError(f"'{entrada.strip()}': los límites deben ser números enteros no negativos.")
+
+            idiomas.append(partes[0])
+            limites_idiomas[partes[0]] = (min(int(partes[1]), MAX_FETCH_LIMIT), min(int(partes[2]), MAX_FETCH_LIMIT))
+
+        return idiomas or [IDIOMA_POR_DEFECTO], limites_idiomas
+
     def validar_extension_json(self):
-        """Asegura que el nombre del archivo termine en .json."""
+        """Asegura que el nombre del archivo termine en .json (o .jsonl para guardarlo en streaming, o .parquet)."""
         texto = self.line_edit_filename.text().strip()
         
         if not texto:
             return
         
-        if not texto.lower().endswith(".json"):
+        if not texto.lower().endswith((".json", ".jsonl", ".parquet")):
             nuevo_texto = f"{texto}.json"
             self.line_edit_filename.setText(nuevo_texto)
 
@@ -279,27 +456,30 @@ class FilaJuego(QWidget):
     Widget que representa una fila individual para la selección de un juego.
     Incluye un campo de texto con autocompletado y un botón para eliminarse a sí mismo.
     """
-    def __init__(self, modelo_juegos : QStringListModel, lista_juegos, callback_juegos_usados):
+    def __init__(self, modelo_juegos : QStringListModel, callback_buscar):
         """
         Inicializa la fila.
 
         Args:
             modelo_juegos (QStringListModel): Modelo de datos para el QCompleter.
-            lista_juegos (list): Lista completa de juegos disponibles para filtrar.
-            callback_juegos_usados (callable): Función para obtener los juegos ya seleccionados en otras filas.
+            callback_buscar (callable): Función que recibe la fila y el texto escrito y pide las sugerencias.
         """
         super().__init__()
 
         self.modelo_juegos = modelo_juegos
-        self.lista_juegos = lista_juegos
-        self.callback_juegos_usados = callback_juegos_usados
+        self.callback_buscar = callback_buscar
+
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(DEMORA_BUSQUEDA_MS)
+        self.temporizador.timeout.connect(self.actualizar_sugerencias)
 
         layout = QHBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(5)
 
         self.line_edit_appid = QLineEdit()
-        self.line_edit_appid.setPlaceholderText("Ej: 32330")
+        self.line_edit_appid.setPlaceholderText(TEXTO_EJEMPLO)
         self.line_edit_appid.setFixedWidth(250) 
 
         self.completer = QCompleter(self.modelo_juegos)
@@ -315,32 +495,15 @@ class FilaJuego(QWidget):
         layout.addWidget(self.btn_eliminar)
         layout.addStretch() 
 
-        self.line_edit_appid.textEdited.connect(self.actualizar_sugerencias)
+        self.line_edit_appid.textEdited.connect(lambda _: self.temporizador.start())
         self.btn_eliminar.clicked.connect(self.eliminar_fila)
 
-    def actualizar_sugerencias(self, texto_usuario):
+    def actualizar_sugerencias(self):
         """
-        Filtra la lista de juegos basándose en la entrada del usuario y actualiza el QCompleter.
-        Evita sugerir juegos que ya han sido seleccionados en otras filas.
+        Pide las sugerencias para el texto actual. Se llama cuando el usuario deja de escribir
+        por DEMORA_BUSQUEDA_MS; la búsqueda se hace en el hilo del `BuscadorJuegos`.
         """
-        if not texto_usuario:
-            return
-
-        texto_usuario = texto_usuario.lower()
-        coincidencias = []
-        contador = 0
-        LIMITE = 30
-
-        juegos_usados = self.callback_juegos_usados()
-
-        for juego in self.lista_juegos:
-            if texto_usuario in juego.lower() and juego not in juegos_usados:
-                coincidencias.append(juego)
-                contador += 1
-                if contador >= LIMITE:
-                    break
-        self.modelo_juegos.setStringList(coincidencias)
-        self.completer.complete()
+        self.callback_buscar(self, self.line_edit_appid.text())
 
     def eliminar_fila(self):
         """Elimina este widget de la interfaz."""
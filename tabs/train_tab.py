@@ -1,14 +1,21 @@
-from PySide6.QtWidgets import QWidget, QLineEdit, QPushButton, QSpinBox, QFormLayout, QDoubleSpinBox, QLabel, QApplication
-from PySide6.QtCore import Signal
+from PySide6.QtWidgets import (QWidget, QLineEdit, QPushButton, QSpinBox, QFormLayout, QDoubleSpinBox, QLabel,
+                               QProgressBar, QMessageBox)
+from PySide6.QtCore import Signal, QThread
 from const import LEARNING_RATE, TEST_SIZE, EPOCHS, DATASET_NAME, MODEL_DEFAULT_DIR_NAME
 from datetime import datetime
-import train
+from typing import Optional
+from workers import TrainWorker
+from train import ultimo_checkpoint, entrenamientos_pendientes
 
 class TrainTab(QWidget):
     """
     Pestaña de configuración y ejecución del entrenamiento del modelo.
     Permite ajustar hiperparámetros como epochs, learning rate y test size.
-    
+    El entrenamiento corre en otro proceso con un `TrainWorker`: la interfaz muestra el paso, la loss,
+    las métricas de validación, la velocidad y el tiempo restante, y se puede cancelar.
+    Si un entrenamiento se cancela o se corta, se puede reanudar desde su último checkpoint, también en
+    otra sesión: al abrir la pestaña se busca el último entrenamiento sin terminar y se ofrece reanudarlo.
+
     Attributes:
         train_finished (Signal): Se emite con la ruta del modelo generado al finalizar el entrenamiento.
     """
@@ -32,45 +39,199 @@ class TrainTab(QWidget):
         self.learning_rate = QDoubleSpinBox(minimum=0.0, maximum=1.0, singleStep=0.00001, decimals=5)
         self.learning_rate.setValue(LEARNING_RATE)
         self.button = QPushButton("Comenzar entrenamiento")
+        self.button_cancelar = QPushButton("Cancelar")
+        self.button_cancelar.setVisible(False)
+        self.button_reanudar = QPushButton("Reanudar el entrenamiento anterior")
+        self.button_reanudar.setVisible(False)
         self.progress = QLabel("Esperando para iniciar.")
-    
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        self.metrics_label = QLabel("")
+        self.metrics_label.setVisible(False)
+
         self.button.clicked.connect(self.iniciar_entrenamiento)
+        self.button_cancelar.clicked.connect(self.cancelar_entrenamiento)
+        self.button_reanudar.clicked.connect(self.reanudar_entrenamiento)
 
         layout.addRow("Introduzca el nombre del archivo del dataset", self.line_edit_dataset_file)
         layout.addRow("Introduzca el tamaño del conjunto de validación", self.test_size)
         layout.addRow("Introduzca el número de épocas", self.epochs)
         layout.addRow("Introduzca la tasa de aprendizaje", self.learning_rate)
         layout.addRow(self.button)
+        layout.addRow(self.button_cancelar)
+        layout.addRow(self.button_reanudar)
         layout.addRow(self.progress)
+        layout.addRow(self.progress_bar)
+        layout.addRow(self.metrics_label)
 
         self.setLayout(layout)
 
+        self.worker_thread: Optional[QThread] = None
+        self.worker: Optional[TrainWorker] = None
+        self.ultima_evaluacion = ""
+        self.parametros: Optional[dict] = None
+
+        self.ofrecer_reanudacion()
+
+    def ofrecer_reanudacion(self):
+        """
+        Si quedó un entrenamiento sin terminar de una sesión anterior, carga sus parámetros en el
+        formulario y muestra el botón para reanudarlo.
+        """
+        pendientes = entrenamientos_pendientes()
+        if not pendientes:
+            return
+
+        self.parametros = pendientes[0]
+        self.line_edit_dataset_file.setText(self.parametros["file"])
+        self.test_size.setValue(self.parametros["test_size"])
+        self.epochs.setValue(self.parametros["epochs"])
+        self.learning_rate.setValue(self.parametros["learning_rate"])
+        self.button_reanudar.setVisible(True)
+        self.progress.setText(f"Hay un entrenamiento sin terminar en {self.parametros['output_dir']}; se puede reanudar.")
+
     def iniciar_entrenamiento(self):
         """
-        Recopila los parámetros configurados, crea un directorio con timestamp para el modelo,
-        y ejecuta el proceso de entrenamiento.
-        Nota: Utiliza processEvents para actualizar la UI, aunque el entrenamiento es bloqueante en este hilo.
+        Recopila los parámetros configurados y crea un directorio con timestamp para el modelo
+        antes de lanzar el entrenamiento.
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_dir = f"./{MODEL_DEFAULT_DIR_NAME}_{timestamp}"
-        dataset = self.line_edit_dataset_file.text()
-        test_size = self.test_size.value()
-        epochs = self.epochs.value()
-        lr = self.learning_rate.value()
+        self.parametros = {
+            "file": self.line_edit_dataset_file.text().strip(),
+            "test_size": self.test_size.value(),
+            "epochs": self.epochs.value(),
+            "learning_rate": self.learning_rate.value(),
+            "output_dir": f"./{MODEL_DEFAULT_DIR_NAME}_{timestamp}",
+        }
+        self.lanzar_worker()
+
+    def reanudar_entrenamiento(self):
+        """
+        Vuelve a lanzar el último entrenamiento con los mismos parámetros y el mismo directorio,
+        así sigue desde su último checkpoint.
+        """
+        if self.parametros is not None:
+            self.lanzar_worker()
 
-        self.progress.setText("Entrenamiento en curso...")
+    def lanzar_worker(self):
+        """
+        Bloquea los controles y lanza el `TrainWorker`, que entrena en otro proceso sin bloquear la interfaz.
+        """
+        self.cambiar_estado_controles(False)
+        self.button_reanudar.setVisible(False)
+        self.button.setText("Entrenamiento en curso...")
+        self.button_cancelar.setEnabled(True)
+        self.button_cancelar.setVisible(True)
+        self.progress.setText("Iniciando el proceso de entrenamiento...")
         self.progress.setStyleSheet("color: orange;")
-            
-        self.progress.repaint()  
-        QApplication.processEvents() 
-
-        try:
-            train.entrenar(dataset, test_size, epochs, lr, output_dir)
-            self.train_finished.emit(output_dir)
-            
-            self.progress.setText("Entrenamiento completado.")
-            self.progress.setStyleSheet("color: green; font-weight: bold;")
-                
-        except Exception as e:
-            self.progress.setText("Error en el entrenamiento.")
-            print(f"Error: {e}")
\ No newline at end of file
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.metrics_label.setText("")
+        self.metrics_label.setVisible(True)
+        self.ultima_evaluacion = ""
+
+        self.worker_thread = QThread()
+        self.worker = TrainWorker(self.parametros)
+        self.worker.moveToThread(self.worker_thread)
+
+        self.worker_thread.started.connect(self.worker.run)
+
+        self.worker.signals.log.connect(self.mostrar_estado)
+        self.worker.signals.progress.connect(self.progress_bar.setValue)
+        self.worker.signals.stats_ready.connect(self.mostrar_metricas)
+        self.worker.signals.error.connect(self.mostrar_error)
+        self.worker.signals.file_ready.connect(self.procesar_modelo_guardado)
+        self.worker.signals.finished.connect(self.limpiar_thread)
+        self.worker.signals.finished.connect(self.restaurar_ui)
+
+        self.worker_thread.start()
+
+    def cancelar_entrenamiento(self):
+        """Pide al proceso que se detenga al terminar el paso en curso; el modelo no se guarda."""
+        self.button_cancelar.setEnabled(False)
+        self.progress.setText("Cancelando al terminar el paso en curso...")
+        if self.worker is not None:
+            self.worker.stop()
+
+    def mostrar_estado(self, mensaje: str):
+        """Muestra el último mensaje del entrenamiento."""
+        self.progress.setText(mensaje)
+
+    def mostrar_metricas(self, metricas: dict):
+        """
+        Muestra el avance del entrenamiento: paso, época, loss, velocidad y tiempo restante,
+        y las métricas de la última evaluación sobre el conjunto de validación.
+        """
+        if "eval_loss" in metricas:
+            self.ultima_evaluacion = (f"Validación (época {metricas['epoca']:.2f}): loss {metricas['eval_loss']:.4f} | "
+                                      f"accuracy {metricas.get('eval_accuracy', 0):.3f} | f1 {metricas.get('eval_f1', 0):.3f}")
+
+        lineas = [f"Paso {metricas['paso']} de {metricas['pasos_totales']} (época {metricas['epoca']:.2f})"]
+        if "loss" in metricas:
+            lineas.append(f"Loss: {metricas['loss']:.4f}")
+        if metricas["ejemplos_por_segundo"]:
+            lineas.append(f"Velocidad: {metricas['ejemplos_por_segundo']:.1f} ejemplos/s")
+        if metricas["segundos_restantes"] is not None:
+            minutos, segundos = divmod(int(metricas["segundos_restantes"]), 60)
+            lineas.append(f"Tiempo restante: {minutos} min {segundos} s")
+        if self.ultima_evaluacion:
+            lineas.append(self.ultima_evaluacion)
+
+        self.metrics_label.setText("\n".join(lineas))
+
+    def mostrar_error(self, mensaje_error: str):
+        """Muestra un cuadro de diálogo con el mensaje de error."""
+        self.progress.setText("Error en el entrenamiento.")
+        self.progress.setStyleSheet("color: red;")
+        QMessageBox.critical(self, "Error", mensaje_error)
+
+    def procesar_modelo_guardado(self, output_dir: str):
+        """
+        Callback ejecutado cuando el proceso ya guardó el modelo entrenado: avisa a la pestaña de prueba.
+        """
+        self.train_finished.emit(output_dir)
+        self.progress.setText("Entrenamiento completado.")
+        self.progress.setStyleSheet("color: green; font-weight: bold;")
+
+    def limpiar_thread(self):
+        """Limpia el hilo y el worker de memoria."""
+        if self.worker_thread is not None:
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+            self.worker_thread.deleteLater()
+            self.worker_thread = None
+
+        if self.worker is not None:
+            self.worker.deleteLater()
+            self.worker = None
+
+    def detener_entrenamiento(self):
+        """
+        Cancela el entrenamiento en curso, si hay uno, y espera a que el proceso termine.
+        Se usa al cerrar la aplicación.
+        """
+        if self.worker is not None and self.worker_thread is not None:
+            self.worker.stop()
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+
+    def cambiar_estado_controles(self, habilitados: bool):
+        """Habilita o deshabilita los controles de configuración."""
+        self.line_edit_dataset_file.setEnabled(habilitados)
+        self.test_size.setEnabled(habilitados)
+        self.epochs.setEnabled(habilitados)
+        self.learning_rate.setEnabled(habilitados)
+        self.button.setEnabled(habilitados)
+
+    def restaurar_ui(self):
+        """Reactiva los controles de la interfaz después de finalizar el entrenamiento."""
+        self.cambiar_estado_controles(True)
+        self.button.setText("Comenzar entrenamiento")
+        self.button_cancelar.setVisible(False)
+        self.progress_bar.setVisible(False)
+        if self.progress.styleSheet() == "color: orange;":
+            # terminó sin guardar el modelo (por ejemplo, se canceló)
+            self.progress.setStyleSheet("")
+        if self.parametros is not None:
+            self.button_reanudar.setVisible(ultimo_checkpoint(self.parametros["output_dir"]) is not None)
@@ -0,0 +1,51 @@
+import os
+import json
+import stat
+import pytest
+from archivos import escritura_atomica, descartar_linea_incompleta
+
+sin_permisos_posix = pytest.mark.skipif(os.name == "nt", reason="los permisos POSIX no aplican en Windows")
+
+def _permisos(ruta) -> int:
+    return stat.S_IMODE(os.stat(ruta).st_mode)
+
+@sin_permisos_posix
+def test_archivo_nuevo_tiene_los_permisos_de_open(tmp_path):
+    ruta = tmp_path / "nuevo.json"
+    referencia = tmp_path / "referencia.json"
+    referencia.write_text("{}")
+
+    with escritura_atomica(str(ruta)) as f:
+        f.write("{}")
+
+    assert _permisos(ruta) == _permisos(referencia)
+
+@sin_permisos_posix
+def test_conserva_los_permisos_del_archivo_existente(tmp_path):
+    ruta = tmp_path / "existente.json"
+    ruta.write_text("[]")
+    os.chmod(ruta, 0o640)
+
+    with escritura_atomica(str(ruta)) as f:
+        f.write("{}")
+
+    assert ruta.read_text() == "{}"
+    assert _permisos(ruta) == 0o640
+
+def test_descartar_linea_incompleta_descarta_la_linea_incompleta(tmp_path):
+    ruta = tmp_path / "apps.parcial.jsonl"
+    ruta.write_text('{"appid": 1, "name": "a"}\n{"appid": 2, "na')
+
+    descartar_linea_incompleta(str(ruta))
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write('{"appid": 3, "name": "c"}\n')
+
+    assert [json.loads(linea)["appid"] for linea in ruta.read_text().splitlines()] == [1, 3]
+
+def test_descartar_linea_incompleta_sin_lineas_incompletas(tmp_path):
+    ruta = tmp_path / "apps.parcial.jsonl"
+    ruta.write_text('{"appid": 1, "name": "a"}\n')
+
+    descartar_linea_incompleta(str(ruta))
+
+    assert ruta.read_text() == '{"appid": 1, "name": "a"}\n'
@@ -0,0 +1,17 @@
+import threading
+from barrido import _sigue
+
+def test_poda_solo_compara_pruebas_del_mismo_test_size():
+    escalones, lock = {}, threading.Lock()
+
+    assert _sigue(escalones, lock, 0.2, 1, 0.30, 2)
+    assert not _sigue(escalones, lock, 0.2, 1, 0.50, 2)
+    # con otro split el loss no se compara con el de las pruebas anteriores
+    assert _sigue(escalones, lock, 0.1, 1, 0.90, 2)
+
+def test_fuera_de_los_escalones_siempre_sigue():
+    escalones, lock = {}, threading.Lock()
+
+    assert _sigue(escalones, lock, 0.2, 2, 0.10, 3)
+    assert _sigue(escalones, lock, 0.2, 2, 0.90, 3)
+    assert escalones == {}
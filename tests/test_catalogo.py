@@ -0,0 +1,7 @@
+from catalogo import _iterar_parcial
+
+def test_iterar_parcial_saltea_lineas_a_medio_escribir(tmp_path):
+    ruta = tmp_path / "apps.parcial.jsonl"
+    ruta.write_text('{"appid": 1, "name": "a"}\n{"appid": 2, "na{"appid": 3, "name": "c"}\n{"appid": 4, "name": "d"}\n')
+
+    assert [app["appid"] for app in _iterar_parcial(str(ruta))] == [1, 4]
@@ -0,0 +1,32 @@
+from checkpoint import CheckpointReviews
+
+def _reviews(*ids):
+    return [{"review_id": str(i), "review": f"review {i}"} for i in ids]
+
+def test_reanuda_desde_el_ultimo_cursor(tmp_path):
+    checkpoint = CheckpointReviews(str(tmp_path / "parcial"))
+    assert not checkpoint.existe()
+
+    checkpoint.guardar_pagina(10, "positive", "english", _reviews(1, 2), "c1", 2)
+    checkpoint.guardar_pagina(10, "positive", "english", _reviews(3), "c2", 3, agotado=True)
+
+    cursor, reviews, agotado, cantidad = CheckpointReviews(str(tmp_path / "parcial")).cargar(10, "positive", "english")
+    assert checkpoint.existe()
+    assert (cursor, agotado, cantidad) == ("c2", True, 3)
+    assert [r["review_id"] for r in reviews] == ["1", "2", "3"]
+
+def test_linea_a_medio_escribir_seguida_de_otra_pagina(tmp_path):
+    checkpoint = CheckpointReviews(str(tmp_path / "parcial"))
+    checkpoint.guardar_pagina(10, "negative", "english", _reviews(1), "c1", 1)
+    ruta_reviews, _ = checkpoint._rutas(10, "negative", "english")
+    with open(ruta_reviews, "a", encoding="utf-8") as f:
+        f.write('{"review_id": "2", "rev')
+
+    cursor, reviews, _, _ = checkpoint.cargar(10, "negative", "english")
+    assert cursor == "c1"
+    assert [r["review_id"] for r in reviews] == ["1"]
+
+    checkpoint.guardar_pagina(10, "negative", "english", _reviews(2, 3), "c2", 3)
+    cursor, reviews, _, cantidad = checkpoint.cargar(10, "negative", "english")
+    assert (cursor, cantidad) == ("c2", 3)
+    assert [r["review_id"] for r in reviews] == ["1", "2", "3"]
@@ -0,0 +1,27 @@
+from conteo_tokens import ContadorTokens
+
+class ContadorFalso(ContadorTokens):
+    """Cuenta palabras en vez de tokens, para no cargar un tokenizer real."""
+    def _tokenizar(self, textos):
+        return [len(texto.split()) for texto in textos]
+
+def test_guarda_y_recarga_conteos(tmp_path):
+    contador = ContadorFalso("modelo", str(tmp_path))
+    assert contador.contar(["1", "2"], ["uno dos", "tres"]) == [2, 1]
+
+    recargado = ContadorFalso("modelo", str(tmp_path))
+    assert len(recargado) == 2
+    assert recargado.contar(["2", "1"], ["", ""]) == [1, 2]
+
+def test_registro_a_medio_escribir_seguido_de_agregar(tmp_path):
+    contador = ContadorFalso("modelo", str(tmp_path))
+    contador.contar(["1", "2"], ["uno dos", "tres"])
+    with open(contador.archivo, "ab") as f:
+        f.write(b"\x01\x02\x03\x04\x05")
+
+    retomado = ContadorFalso("modelo", str(tmp_path))
+    assert len(retomado) == 2
+    retomado.contar(["3"], ["cuatro cinco seis"])
+
+    recargado = ContadorFalso("modelo", str(tmp_path))
+    assert recargado.contar(["1", "2", "3"], ["", "", ""]) == [2, 1, 3]
@@ -0,0 +1,105 @@
+import random
+import pytest
+import dataset
+from dataset_manager import DatasetManager
+
+class ClienteFalso:
+    """Imita la API de reviews de Steam: 'disponibles' reviews por tipo, de a 100 por página."""
+    def __init__(self, disponibles, fallar_despues_de=None):
+        self.disponibles = disponibles
+        self.fallar_despues_de = fallar_despues_de
+        self.paginas = 0
+
+    def get_json(self, url, params=None, **kwargs):
+        if params["review_type"] == "all":
+            return {"query_summary": {"total_positive": self.disponibles["positive"],
+                                      "total_negative": self.disponibles["negative"]}, "reviews": []}
+
+        self.paginas += 1
+        if self.fallar_despues_de is not None and self.paginas > self.fallar_despues_de:
+            raise RuntimeError("sin conexión")
+
+        pagina = 0 if params["cursor"] == "*" else int(params["cursor"])
+        base = int(url.rsplit("/", 1)[1]) * 10_000_000 + (0 if params["review_type"] == "positive" else 1_000_000)
+        desde = pagina * 100
+        hasta = min(desde + 100, self.disponibles[params["review_type"]])
+        reviews = [{"recommendationid": str(base + i), "review": f"review {base + i}",
+                    "voted_up": params["review_type"] == "positive"} for i in range(desde, hasta)]
+        return {"reviews": reviews, "cursor": str(pagina + 1) if reviews else params["cursor"]}
+
+    def metricas(self, desde=None):
+        return {"requests": 0, "reintentos": 0, "errores": 0, "aciertos_cache": 0, "segundos": 1,
+                "requests_por_segundo": 0}
+
+@pytest.fixture
+def cliente(monkeypatch):
+    def configurar(**kwargs):
+        falso = ClienteFalso(**kwargs)
+        monkeypatch.setattr(dataset, "obtener_cliente", lambda: falso)
+        return falso
+    return configurar
+
+def test_descargar_jsonl_reanuda_despues_de_una_linea_a_medio_escribir(cliente, tmp_path):
+    archivo = str(tmp_path / "reviews.jsonl")
+    disponibles = {"positive": 300, "negative": 250}
+
+    cliente(disponibles=disponibles, fallar_despues_de=2)
+    with pytest.raises(ConnectionError):
+        dataset.descargar_reviews_jsonl([10], 300, 300, "english", archivo, max_diff=1000, max_workers=1)
+    with open(f"{archivo}.crudo", "a", encoding="utf-8") as f:
+        f.write('{"review_id": "1000200", "rev')
+
+    cliente(disponibles=disponibles)
+    total = dataset.descargar_reviews_jsonl([10], 300, 300, "english", archivo, max_diff=1000, max_workers=1)
+
+    reviews = list(DatasetManager(archivo).iterar_jsonl())
+    assert total == len(reviews) == 550
+    assert len({r["review_id"] for r in reviews}) == 550
+    assert sum(r["voted_up"] for r in reviews) == 300
+
+@pytest.mark.parametrize("cupo, disponibles, esperado", [
+    (300, {1: 1000, 2: 1000, 3: 1000}, {1: 100, 2: 100, 3: 100}),
+    (300, {1: 20, 2: 1000, 3: 1000}, {1: 20, 2: 140, 3: 140}),
+    (300, {1: 20, 2: 0, 3: 50}, {1: 20, 2: 0, 3: 50}),
+    (2, {1: 10, 2: 10, 3: 10}, {1: 1, 2: 1, 3: 0}),
+])
+def test_repartir_cupo(cupo, disponibles, esperado):
+    assert dataset._repartir_cupo(cupo, disponibles) == esperado
+
+def test_mayoritaria_se_muestrea_mas_alla_de_las_mas_recientes(cliente):
+    random.seed(0)
+    cliente(disponibles={"positive": 1000, "negative": 100})
+
+    reviews = dataset.obtener_reviews([1], 1000, 1000, "english", max_diff=50, max_workers=1)
+
+    positivas = sorted(int(r["review_id"]) - 10_000_000 for r in reviews if r["voted_up"])
+    assert len(positivas) == 150
+    assert len(reviews) - len(positivas) == 100
+    assert len(set(positivas)) == 150
+    # se eligen entre las 300 más recientes (2 veces la cuota), no solo entre las 150 más recientes
+    assert positivas[-1] < 300
+    assert any(posicion >= 150 for posicion in positivas)
+
+def test_balancear_jsonl_descarta_repetidas_y_limita_la_mayoritaria(tmp_path):
+    def review(review_id, voted_up, idioma, texto="original"):
+        return {"review_id": str(review_id), "review": texto, "voted_up": voted_up, "language": idioma}
+
+    primera = str(tmp_path / "primera.jsonl")
+    segunda = str(tmp_path / "segunda.jsonl")
+    salida = str(tmp_path / "balanceado.jsonl")
+    DatasetManager(primera).guardar_jsonl([review(i, True, "english") for i in range(100)]
+                                          + [review(i, False, "english") for i in range(100, 120)])
+    DatasetManager(segunda).guardar_jsonl([review(i, True, "english", "repetida") for i in range(10)]
+                                          + [review(i, True, "spanish") for i in range(200, 205)]
+                                          + [review(i, False, "spanish") for i in range(205, 210)])
+
+    total = dataset.balancear_jsonl([primera, segunda], salida, max_diff=10)
+
+    reviews = list(DatasetManager(salida).iterar_jsonl())
+    assert total == len(reviews) == 60
+    assert len({r["review_id"] for r in reviews}) == 60
+    assert all(r["review"] == "original" for r in reviews)
+    cantidades = {}
+    for r in reviews:
+        cantidades[(r["language"], r["voted_up"])] = cantidades.get((r["language"], r["voted_up"]), 0) + 1
+    assert cantidades == {("english", True): 30, ("english", False): 20, ("spanish", True): 5, ("spanish", False): 5}
@@ -0,0 +1,54 @@
+import pytest
+from dataset_manager import AlmacenamientoParquet
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def parquet(monkeypatch):
+    almacenamiento = AlmacenamientoParquet()
+    monkeypatch.setattr(almacenamiento, "FILAS_POR_LOTE", 2)
+    return almacenamiento
+
+def test_parquet_conserva_columnas_que_aparecen_en_lotes_posteriores(parquet, tmp_path):
+    ruta = str(tmp_path / "reviews.parquet")
+    reviews = [{'review_id': '1'}, {'review_id': '2'}, {'review_id': '3', 'language': 'es'}]
+
+    parquet.guardar(ruta, reviews)
+
+    leidas = parquet.cargar(ruta)
+    assert [r['review_id'] for r in leidas] == ['1', '2', '3']
+    assert [r['language'] for r in leidas] == [None, None, 'es']
+    assert list(parquet.iterar(ruta)) == leidas
+    assert parquet.contar(ruta) == 3
+
+def test_parquet_columna_vacia_en_el_primer_lote(parquet, tmp_path):
+    ruta = str(tmp_path / "reviews.parquet")
+    reviews = [
+        {'review_id': '1', 'review': 'bueno', 'voted_up': True, 'language': None},
+        {'review_id': '2', 'review': 'malo', 'voted_up': False, 'language': None},
+        {'review_id': '3', 'review': 'muy bueno', 'voted_up': True, 'language': 'spanish'},
+        {'review_id': '4', 'review': 'aburrido', 'voted_up': False},
+        {'review_id': '5', 'review': 'genial', 'voted_up': True, 'language': 'english'},
+    ]
+
+    parquet.guardar(ruta, reviews)
+
+    leidas = parquet.cargar(ruta)
+    assert [r['language'] for r in leidas] == [None, None, 'spanish', None, 'english']
+    assert [r['voted_up'] for r in leidas] == [True, False, True, False, True]
+    assert [r['review'] for r in leidas] == [r['review'] for r in reviews]
+
+def test_parquet_apps_en_varios_lotes(parquet, tmp_path):
+    ruta = str(tmp_path / "apps.parquet")
+    apps = [{'appid': i, 'name': f"Juego {i}"} for i in range(5)]
+
+    parquet.guardar(ruta, apps)
+
+    assert parquet.cargar(ruta) == apps
+
+def test_parquet_rechaza_columnas_desconocidas_nuevas(parquet, tmp_path):
+    ruta = tmp_path / "datos.parquet"
+
+    with pytest.raises(ValueError):
+        parquet.guardar(str(ruta), [{'a': 1}, {'a': 2}, {'a': 3, 'b': 'x'}])
+    assert not ruta.exists()
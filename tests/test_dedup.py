@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from dedup import DetectorDuplicados, NUM_PERMUTACIONES
+
+RESENIA = ("Un juego excelente, con una historia muy bien contada y personajes memorables. "
+           "Lo recomiendo a cualquiera que busque una aventura larga.")
+
+def test_detecta_duplicado_exacto():
+    detector = DetectorDuplicados()
+
+    assert detector.es_duplicada("Muy buen juego!!") is None
+    assert detector.es_duplicada("muy   buen JUEGO") == "exacta"
+
+def test_detecta_review_casi_identica():
+    detector = DetectorDuplicados()
+
+    assert detector.es_duplicada(RESENIA) is None
+    assert detector.es_duplicada(RESENIA + " 10/10") == "similar"
+
+@pytest.mark.parametrize("primera, segunda", [
+    ("el mejor juego de la vida", "El mejor juego de la historia"),
+    ("10/10 muy buen juego", "muy buen juego"),
+    ("El mejor juego de lego de la historia.", "El mejor juego de la historia"),
+])
+def test_no_descarta_reviews_parecidas_pero_distintas(primera, segunda):
+    detector = DetectorDuplicados()
+
+    assert detector.es_duplicada(primera) is None
+    assert detector.es_duplicada(segunda) is None
+
+def test_coincidir_en_una_banda_no_alcanza():
+    detector = DetectorDuplicados()
+    firma = np.arange(NUM_PERMUTACIONES, dtype=np.uint32)
+    distinta = firma.copy()
+    distinta[8:] += 1
+
+    assert detector.registrar((1, [10, 11], firma)) is None
+    assert detector.registrar((2, [10, 12], distinta)) is None
+    assert detector.registrar((3, [12], distinta)) == "similar"
+
+def test_sin_similares_solo_descarta_exactos():
+    detector = DetectorDuplicados(similares=False)
+
+    assert detector.es_duplicada(RESENIA) is None
+    assert detector.es_duplicada(RESENIA + " 10/10") is None
@@ -0,0 +1,29 @@
+from review_index import IndiceReviews
+
+def test_agregar_y_recargar(tmp_path):
+    ruta = str(tmp_path / "indice.bin")
+    indice = IndiceReviews(ruta)
+
+    assert indice.reservar("100")
+    assert not indice.reservar("100")
+    assert indice.agregar(["100", "200"]) == 2
+    assert indice.agregar(["200"]) == 0
+
+    recargado = IndiceReviews(ruta)
+    assert "100" in recargado and "200" in recargado
+    assert len(recargado) == 2
+
+def test_registro_a_medio_escribir_seguido_de_agregar(tmp_path):
+    ruta = tmp_path / "indice.bin"
+    IndiceReviews(str(ruta)).agregar(["100", "200"])
+    with open(ruta, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    indice = IndiceReviews(str(ruta))
+    assert len(indice) == 2
+    indice.agregar(["300"])
+
+    recargado = IndiceReviews(str(ruta))
+    assert "300" in recargado
+    assert len(recargado) == 3
+    assert ruta.stat().st_size == 3 * 8
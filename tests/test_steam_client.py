@@ -0,0 +1,24 @@
+import threading
+import pytest
+from steam_client import SteamClient
+
+def test_el_backoff_se_corta_al_cancelar():
+    cliente = SteamClient()
+    detener = threading.Event()
+    detener.set()
+
+    with pytest.raises(InterruptedError):
+        cliente._esperar(0, retry_after="30", esperar=detener.wait)
+
+def test_metricas_desde_una_medicion_anterior():
+    cliente = SteamClient()
+    cliente._contar("total_requests")
+    inicio = cliente.metricas()
+    cliente._contar("total_requests")
+    cliente._contar("total_reintentos")
+
+    metricas = cliente.metricas(desde=inicio)
+
+    assert metricas["requests"] == 1
+    assert metricas["reintentos"] == 1
+    assert cliente.metricas()["requests"] == 2
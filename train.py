@@ -1,24 +1,148 @@
 import os
-from datasets import load_dataset
-from const import DATASET_NAME, MODEL_DEFAULT_DIR_PATH
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer
+import glob
+import json
+import math
+import time
+import shutil
+import hashlib
+from dataclasses import fields
+from functools import lru_cache
+from typing import Dict, Any, Optional, List
+from datasets import load_dataset, load_from_disk, Value, Dataset
+from archivos import escritura_atomica
+from avisos import (Callbacks, log as _log, progreso as _progreso, check_stop as _check_stop,
+                    detenido as _detenido)
+from const import (DATASET_NAME, MODEL_DEFAULT_DIR_PATH, BASE_MODEL_NAME, MAX_LENGTH, EVALUACIONES_POR_EPOCA,
+                   PACIENCIA, MAX_CHECKPOINTS)
+from transformers import (AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer,
+                          DataCollatorWithPadding, TrainerCallback, EarlyStoppingCallback)
+from transformers.trainer_utils import get_last_checkpoint
 import numpy as np
 from evaluate import load
 
 os.environ["WANDB_DISABLED"] = "true"  # Desactiva W&B
 
-# convertir true/false -> 1/0
-def convert_label(example):
-    example["label"] = int(example["label"])
-    return example
+DIRECTORIO_CACHE = ".cache_tokenizado" # datasets ya tokenizados, para no volver a tokenizar en cada entrenamiento
+MAX_ENTRADAS_CACHE = 4                 # datasets tokenizados que se conservan (se borran los menos usados)
+VERSION_CACHE = 1                      # cambiarla si cambia cómo se prepara el dataset, para no usar entradas viejas
+SEMILLA_DIVISION = 42                  # semilla de la división train/validation (fija para poder reanudar)
 
-def entrenar(file: str, test_size: float, epochs: int, learning_rate: float, output_dir=MODEL_DEFAULT_DIR_PATH):
-# cargar dataset desde el JSON
-    if not(file.endswith(".json")):
-        print("El archivo no es de tipo json")
-        return
+class ProgresoEntrenamiento(TrainerCallback):
+    """
+    Callback del Trainer que informa el avance del entrenamiento con los callbacks del módulo
+    ('progress', 'log' y 'metrics') y lo detiene al terminar el paso en curso si 'check_stop' lo pide,
+    guardando antes un checkpoint para poder reanudarlo desde ese paso.
 
-    dataset = load_dataset("json", data_files=file)
+    Con cada registro del Trainer ('logging_steps') y cada evaluación envía a 'metrics' un diccionario
+    con el paso, la época, la loss o las métricas de validación, los ejemplos por segundo y el tiempo restante estimado.
+    """
+    def __init__(self, callbacks: Callbacks):
+        """
+        Args:
+            callbacks (Callbacks): Callbacks del entrenamiento.
+        """
+        self.callbacks = callbacks
+        self.inicio = time.monotonic()
+        self.paso_inicial = 0
+        self.porcentaje = -1
+        self.cancelado = False
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.inicio = time.monotonic()
+        self.paso_inicial = state.global_step
+
+    def on_step_end(self, args, state, control, **kwargs):
+        porcentaje = int(state.global_step * 100 / state.max_steps) if state.max_steps else 0
+        if porcentaje != self.porcentaje:
+            self.porcentaje = porcentaje
+            _progreso(self.callbacks, porcentaje)
+
+        if _detenido(self.callbacks):
+            self.cancelado = True
+            control.should_training_stop = True
+            control.should_save = True
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        # al cancelar no tiene sentido evaluar la época cortada (y el checkpoint ya se guardó en el paso)
+        if self.cancelado:
+            control.should_evaluate = False
+            control.should_save = False
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if not logs or not self.callbacks or 'metrics' not in self.callbacks:
+            return
+
+        pasos = state.global_step - self.paso_inicial
+        duracion = time.monotonic() - self.inicio
+        pasos_por_segundo = pasos / duracion if duracion > 0 else 0.0
+        ejemplos_por_paso = args.train_batch_size * args.gradient_accumulation_steps * max(args.world_size, 1)
+
+        self.callbacks['metrics']({
+            "paso": state.global_step,
+            "pasos_totales": state.max_steps,
+            "epoca": state.epoch or 0.0,
+            **{clave: valor for (clave, valor) in logs.items() if isinstance(valor, (int, float))},
+            "ejemplos_por_segundo": pasos_por_segundo * ejemplos_por_paso,
+            "segundos_restantes": (state.max_steps - state.global_step) / pasos_por_segundo if pasos_por_segundo else None,
+        })
+
+# argumentos para que cada batch junte reviews de largo parecido (así casi no hace falta padding).
+# desde transformers 5 'group_by_length' es una de las estrategias de 'train_sampling_strategy'
+def _agrupar_por_largo() -> Dict[str, Any]:
+    if "train_sampling_strategy" in {campo.name for campo in fields(TrainingArguments)}:
+        return {"train_sampling_strategy": "group_by_length"}
+    return {"group_by_length": True}
+
+# hash del contenido del archivo del dataset (no alcanza con la fecha: se puede regenerar igual).
+# se recuerda por fecha y tamaño para no volver a leer el archivo entero dentro del mismo proceso
+def _huella_archivo(ruta: str) -> str:
+    datos = os.stat(ruta)
+    return _huella_contenido(os.path.abspath(ruta), datos.st_mtime_ns, datos.st_size)
+
+@lru_cache(maxsize=8)
+def _huella_contenido(ruta: str, mtime_ns: int, tamanio: int) -> str:
+    resumen = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+# hash del vocabulario y las reglas del tokenizer: cambia si se usa otro modelo u otra revisión del mismo
+def _huella_tokenizer(tokenizer) -> str:
+    if tokenizer.is_fast:
+        contenido = tokenizer.backend_tokenizer.to_str()
+    else:
+        contenido = json.dumps(tokenizer.get_vocab(), sort_keys=True)
+    return hashlib.blake2b(f"{tokenizer.name_or_path}\n{contenido}".encode("utf-8"), digest_size=16).hexdigest()
+
+# borra las entradas del caché que quedaron viejas (mismo archivo y configuración, pero otro contenido
+# u otra versión del tokenizer) y, si quedan más de MAX_ENTRADAS_CACHE, las usadas hace más tiempo.
+# las entradas sin metadatos están incompletas
+def _limpiar_cache(directorio: str, origen: Dict[str, Any], clave_actual: str) -> None:
+    entradas = []
+    for entrada in os.scandir(directorio):
+        if not entrada.is_dir() or entrada.name.startswith("."):
+            continue
+
+        ruta_meta = os.path.join(entrada.path, "meta.json")
+        try:
+            with open(ruta_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+            continue
+
+        if meta == origen and entrada.name != clave_actual:
+            shutil.rmtree(entrada.path, ignore_errors=True)
+        else:
+            entradas.append((os.path.getmtime(ruta_meta), entrada.path))
+
+    for (_, ruta) in sorted(entradas, reverse=True)[MAX_ENTRADAS_CACHE:]:
+        shutil.rmtree(ruta, ignore_errors=True)
+
+# carga el dataset, renombra las columnas, convierte las etiquetas y tokeniza
+def _tokenizar_dataset(file: str, tokenizer, padding_dinamico: bool) -> Dataset:
+    dataset = load_dataset("parquet" if file.endswith(".parquet") else "json", data_files=file)
 
     # renombrar columnas
     dataset = dataset.rename_columns({
@@ -26,30 +150,167 @@ def entrenar(file: str, test_size: float, epochs: int, learning_rate: float, out
         "voted_up": "label"
     })
 
-    dataset = dataset.map(convert_label)
-
-    # cargar tokenizer
-    tokenizer = AutoTokenizer.from_pretrained("distilbert-base-multilingual-cased")
+    # convertir true/false -> 1/0. hay que cambiar el tipo de la columna: si solo se cambian los valores,
+    # 'datasets' los vuelve a guardar como bool y el data collator arma las etiquetas como bool
+    dataset = dataset.cast_column("label", Value("int64"))
 
-    # tokenización
+    # tokenización (con padding dinámico el relleno lo agrega el data collator al armar cada batch)
     def tokenize(example):
         return tokenizer(
             example["text"],
             truncation=True,
-            padding="max_length",
-            max_length=128
+            padding=False if padding_dinamico else "max_length",
+            max_length=MAX_LENGTH
         )
 
-    tokenized_dataset = dataset.map(tokenize, batched=True)
+    return dataset.map(tokenize, batched=True)["train"]
+
+# devuelve el dataset tokenizado y con las etiquetas convertidas, desde el caché si ya se preparó antes
+# con el mismo contenido de archivo, tokenizer, MAX_LENGTH y modo de padding. si no, lo prepara y lo
+# guarda (en formato Arrow, que se carga mapeado en memoria). lo pueden usar varios procesos a la vez
+def cargar_dataset_tokenizado(file: str, tokenizer, padding_dinamico: bool = True,
+                              directorio: str = DIRECTORIO_CACHE, callbacks: Callbacks = None) -> Dataset:
+    partes = [VERSION_CACHE, _huella_archivo(file), _huella_tokenizer(tokenizer), MAX_LENGTH, padding_dinamico]
+    clave = hashlib.blake2b(json.dumps(partes).encode("utf-8"), digest_size=16).hexdigest()
+    ruta = os.path.join(directorio, clave)
+    ruta_meta = os.path.join(ruta, "meta.json")
+    origen = {"archivo": os.path.abspath(file), "tokenizer": tokenizer.name_or_path,
+              "max_length": MAX_LENGTH, "padding_dinamico": padding_dinamico}
 
-    # separar dataset en train/validation
-    tokenized_dataset = tokenized_dataset["train"].train_test_split(test_size=test_size)
+    if os.path.exists(ruta_meta):
+        try:
+            dataset = load_from_disk(ruta)
+            os.utime(ruta_meta) # para que la limpieza sepa que se usó
+            _log(callbacks, f"Usando el dataset tokenizado guardado en {ruta}.")
+            return dataset
+        except (OSError, ValueError, FileNotFoundError):
+            # entrada dañada: se vuelve a generar
+            shutil.rmtree(ruta, ignore_errors=True)
+
+    _log(callbacks, "Tokenizando el dataset...")
+    dataset = _tokenizar_dataset(file, tokenizer, padding_dinamico)
+
+    # se guarda en una carpeta temporal y se renombra, así nunca queda una entrada a medio escribir;
+    # si otro proceso la guardó primero, se descarta la propia
+    os.makedirs(directorio, exist_ok=True)
+    temporal = os.path.join(directorio, f".{clave}.{os.getpid()}.tmp")
+    dataset.save_to_disk(temporal)
+    with open(os.path.join(temporal, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(origen, f)
+    try:
+        os.rename(temporal, ruta)
+    except OSError:
+        shutil.rmtree(temporal, ignore_errors=True)
+
+    _limpiar_cache(directorio, origen, clave)
+    return load_from_disk(ruta)
+
+# carpeta de los checkpoints de un entrenamiento cuyo modelo se guarda en 'output_dir'
+def _carpeta_checkpoints(output_dir: str) -> str:
+    return os.path.join(output_dir, "checkpoints")
+
+# archivo con los parámetros del entrenamiento al que pertenecen los checkpoints de 'output_dir'
+def _ruta_parametros(output_dir: str) -> str:
+    return os.path.join(_carpeta_checkpoints(output_dir), "entrenamiento.json")
+
+# último checkpoint de un entrenamiento que no terminó (cancelado o cortado), desde el que se puede reanudar
+def ultimo_checkpoint(output_dir: str) -> Optional[str]:
+    carpeta = _carpeta_checkpoints(output_dir)
+    return get_last_checkpoint(carpeta) if os.path.isdir(carpeta) else None
+
+# busca en las carpetas de 'directorio' entrenamientos que no terminaron y tienen un checkpoint desde el
+# que reanudar. devuelve, del más reciente al más antiguo, los argumentos para volver a llamar a 'entrenar'
+def entrenamientos_pendientes(directorio: str = ".") -> List[Dict[str, Any]]:
+    pendientes = []
+    for ruta in glob.glob(os.path.join(directorio, "*", "checkpoints", "entrenamiento.json")):
+        output_dir = os.path.dirname(os.path.dirname(ruta))
+        if ultimo_checkpoint(output_dir) is None:
+            continue
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                guardados = json.load(f)
+            parametros = {clave: guardados[clave] for clave in ("file", "test_size", "epochs", "learning_rate",
+                                                                 "padding_dinamico")}
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            # checkpoints de una versión anterior, sin los parámetros del entrenamiento
+            continue
+        # la carpeta puede haberse movido o renombrado: se reanuda donde está ahora
+        parametros["output_dir"] = output_dir
+        pendientes.append((os.path.getmtime(ruta), parametros))
+
+    pendientes.sort(key=lambda pendiente: pendiente[0], reverse=True)
+    return [parametros for (_, parametros) in pendientes]
+
+# indica si 'carpeta' tiene un modelo entrenado y guardado (y no solo checkpoints de un entrenamiento sin terminar)
+def es_modelo_guardado(carpeta: str) -> bool:
+    return os.path.isfile(os.path.join(carpeta, "config.json"))
+
+# con 'padding_dinamico' cada batch se rellena solo hasta la review más larga del batch (en lugar de
+# hasta MAX_LENGTH) y se agrupan reviews de largo parecido, así el cómputo depende de los tokens reales.
+# el dataset tokenizado se reutiliza entre entrenamientos mientras no cambien el archivo ni el tokenizer.
+# se evalúa EVALUACIONES_POR_EPOCA veces por época y el entrenamiento se corta si la loss de validación
+# no mejora en PACIENCIA evaluaciones seguidas; al final se guarda en 'output_dir' el mejor modelo.
+# los checkpoints quedan en '<output_dir>/checkpoints' (a lo sumo MAX_CHECKPOINTS) y se borran al terminar;
+# si el entrenamiento se cancela o se corta, con 'reanudar' la próxima llamada con el mismo 'output_dir'
+# y los mismos parámetros sigue desde el último checkpoint.
+# con 'callbacks' informa el avance y, si 'check_stop' lo pide, se detiene sin guardar el modelo
+# (lanza InterruptedError). devuelve True si el modelo quedó guardado en 'output_dir'
+def entrenar(file: str, test_size: float, epochs: int, learning_rate: float, output_dir=MODEL_DEFAULT_DIR_PATH,
+             padding_dinamico: bool = True, callbacks: Callbacks = None, reanudar: bool = True) -> bool:
+# cargar dataset desde el JSON (o Parquet, que se lee mapeado en memoria sin parsear texto)
+    if not(file.endswith((".json", ".jsonl", ".parquet"))):
+        error = "El archivo no es de tipo json o parquet"
+    elif not os.path.exists(file):
+        error = f"No se encontró el archivo de dataset: {file}"
+    else:
+        error = None
+
+    if error:
+        if callbacks and 'error' in callbacks:
+            callbacks['error'](error)
+        else:
+            print(error)
+        return False
+
+    # cargar tokenizer
+    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL_NAME)
+
+    tokenized_dataset = cargar_dataset_tokenizado(file, tokenizer, padding_dinamico, callbacks=callbacks)
+    _check_stop(callbacks)
+
+    # solo se reanuda un entrenamiento con el mismo dataset y los mismos parámetros
+    carpeta_checkpoints = _carpeta_checkpoints(output_dir)
+    ruta_parametros = _ruta_parametros(output_dir)
+    # se guardan también el archivo y la carpeta para poder ofrecer reanudarlo en otra sesión
+    # (ver 'entrenamientos_pendientes'); la carpeta no se compara porque se puede haber movido
+    parametros = {"dataset": _huella_archivo(file), "modelo": BASE_MODEL_NAME, "file": file, "test_size": test_size,
+                  "epochs": epochs, "learning_rate": learning_rate, "padding_dinamico": padding_dinamico,
+                  "output_dir": output_dir}
+    checkpoint = ultimo_checkpoint(output_dir) if reanudar else None
+    if checkpoint:
+        try:
+            with open(ruta_parametros, "r", encoding="utf-8") as f:
+                guardados = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            guardados = None
+        if not isinstance(guardados, dict) or {**guardados, "output_dir": output_dir} != parametros:
+            _log(callbacks, "Los checkpoints guardados son de otro entrenamiento; se empieza de cero.")
+            checkpoint = None
+    if not checkpoint and os.path.isdir(carpeta_checkpoints):
+        shutil.rmtree(carpeta_checkpoints)
+    os.makedirs(carpeta_checkpoints, exist_ok=True)
+    # se reemplaza de forma atómica: un archivo a medio escribir impediría reanudar este entrenamiento
+    with escritura_atomica(ruta_parametros) as f:
+        json.dump(parametros, f)
+
+    # separar dataset en train/validation (siempre igual, para que al reanudar no se mezclen)
+    tokenized_dataset = tokenized_dataset.train_test_split(test_size=test_size, seed=SEMILLA_DIVISION)
     train_ds = tokenized_dataset["train"]
     val_ds = tokenized_dataset["test"]
 
     # cargar modelo pre-entrenado
     model = AutoModelForSequenceClassification.from_pretrained(
-        "distilbert-base-multilingual-cased",
+        BASE_MODEL_NAME,
         num_labels=2
     )
 
@@ -71,18 +332,25 @@ def entrenar(file: str, test_size: float, epochs: int, learning_rate: float, out
         }
 
 # configuración del entrenamiento
+    tamanio_lote = 16
+    pasos_evaluacion = max(1, math.ceil(len(train_ds) / tamanio_lote / EVALUACIONES_POR_EPOCA))
     training_args = TrainingArguments(
-        output_dir=MODEL_DEFAULT_DIR_PATH,
-        per_device_train_batch_size=16,
-        per_device_eval_batch_size=16,
+        output_dir=carpeta_checkpoints,
+        per_device_train_batch_size=tamanio_lote,
+        per_device_eval_batch_size=tamanio_lote,
         num_train_epochs=epochs,
         learning_rate=learning_rate,
         weight_decay=0.1,
-        eval_strategy="epoch",
-        save_strategy="epoch",
+        eval_strategy="steps",
+        eval_steps=pasos_evaluacion,
+        save_strategy="steps",
+        save_steps=pasos_evaluacion,
+        save_total_limit=MAX_CHECKPOINTS,
+        load_best_model_at_end=True,
         metric_for_best_model="loss",
         logging_steps=10,
-        report_to="none"
+        report_to="none",
+        **(_agrupar_por_largo() if padding_dinamico else {})
     )
 
     # entrenador
@@ -92,15 +360,54 @@ def entrenar(file: str, test_size: float, epochs: int, learning_rate: float, out
         train_dataset=train_ds,
         eval_dataset=val_ds,
         compute_metrics=compute_metrics,
+        data_collator=DataCollatorWithPadding(tokenizer) if padding_dinamico else None,
+        callbacks=[EarlyStoppingCallback(early_stopping_patience=PACIENCIA)]
+                  + ([ProgresoEntrenamiento(callbacks)] if callbacks else []),
     )
 
     # entrenar
-    trainer.train()
+    if checkpoint:
+        _log(callbacks, f"Reanudando el entrenamiento desde {checkpoint}...")
+    else:
+        _log(callbacks, "Entrenando...")
+    trainer.train(resume_from_checkpoint=checkpoint)
+    _check_stop(callbacks)
 
-    # guardar modelo entrenado
+    # guardar el mejor modelo (ya cargado por 'load_best_model_at_end') y borrar los checkpoints
     trainer.save_model(output_dir)
     tokenizer.save_pretrained(output_dir)
-    print("Entrenamiento completado y modelo guardado.")
+    shutil.rmtree(carpeta_checkpoints, ignore_errors=True)
+    mensaje = "Entrenamiento completado y modelo guardado"
+    if trainer.state.best_metric is not None:
+        mensaje += f" (mejor loss de validación: {trainer.state.best_metric:.4f})"
+    if trainer.state.global_step < trainer.state.max_steps:
+        mensaje = (f"La loss de validación dejó de mejorar en el paso {trainer.state.global_step} "
+                   f"de {trainer.state.max_steps}. {mensaje}")
+    _log(callbacks, mensaje + ".")
+    _progreso(callbacks, 100)
+    return True
+
+# punto de entrada del proceso de entrenamiento que lanza la interfaz (ver 'TrainWorker').
+# entrena con 'parametros' (los argumentos de 'entrenar') y envía cada callback por 'cola' como una
+# tupla (tipo, dato); el último mensaje es ("fin", None). 'detener' es un evento que pide cancelar
+def entrenar_en_proceso(cola, detener, parametros: Dict[str, Any]) -> None:
+    callbacks = {
+        'progress': lambda valor: cola.put(("progress", valor)),
+        'log': lambda msg: cola.put(("log", msg)),
+        'metrics': lambda metricas: cola.put(("metrics", metricas)),
+        'error': lambda msg: cola.put(("error", msg)),
+        'check_stop': detener.is_set,
+    }
+
+    try:
+        if entrenar(callbacks=callbacks, **parametros):
+            cola.put(("file_ready", parametros["output_dir"]))
+    except InterruptedError:
+        cola.put(("log", "Entrenamiento cancelado. Se puede reanudar desde el último checkpoint."))
+    except Exception as e:
+        cola.put(("error", str(e)))
+    finally:
+        cola.put(("fin", None))
 
 if __name__ == "__main__":
     entrenar(file=DATASET_NAME, test_size=0.2, epochs=3, learning_rate=3e-5)
\ No newline at end of file
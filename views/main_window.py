@@ -1,10 +1,13 @@
 from PySide6.QtWidgets import QMainWindow, QTabWidget
+from PySide6.QtCore import QThread
+from typing import Optional
 from tabs.dataset_tab import DatasetTab
 from tabs.clean_tab import CleanTab
 from dataset_manager import DatasetManager
 from const import *
 from tabs.test_tab import TestTab
 from tabs.train_tab import TrainTab
+from workers import SteamWorker
 
 class MainWindow(QMainWindow):
     """
@@ -17,6 +20,7 @@ class MainWindow(QMainWindow):
         """
         Inicializa la ventana principal, instancia el gestor de datos y configura
         las pestañas de la aplicación. Conecta señales entre pestañas dependientes.
+        Si hay una API Key configurada, actualiza la lista de apps de Steam en segundo plano.
         """
         super().__init__()
 
@@ -41,4 +45,54 @@ class MainWindow(QMainWindow):
         # Conectar señal: cuando termina el entrenamiento, actualizar el modelo en la pestaña de prueba
         self.train_tab.train_finished.connect(self.test_tab.update_model)
         
-        self.setCentralWidget(self.tabs)
\ No newline at end of file
+        self.setCentralWidget(self.tabs)
+
+        self.steam_thread: Optional[QThread] = None
+        self.steam_worker: Optional[SteamWorker] = None
+        if STEAM_API_KEY:
+            self.actualizar_catalogo()
+
+    def actualizar_catalogo(self) -> None:
+        """
+        Lanza un `SteamWorker` que trae solo las apps modificadas desde la última sincronización
+        y, al terminar, recarga la lista de juegos de la pestaña de dataset.
+        """
+        self.steam_thread = QThread()
+        self.steam_worker = SteamWorker(STEAM_API_KEY, STEAM_APPS_CACHE)
+        self.steam_worker.moveToThread(self.steam_thread)
+
+        self.steam_thread.started.connect(self.steam_worker.run)
+
+        self.steam_worker.signals.log.connect(self.statusBar().showMessage)
+        self.steam_worker.signals.error.connect(
+            lambda error: self.statusBar().showMessage(f"No se pudo actualizar la lista de apps: {error}"))
+        self.steam_worker.signals.file_ready.connect(lambda _: self.dataset_tab.cargar_datos())
+        self.steam_worker.signals.finished.connect(self.limpiar_thread_catalogo)
+
+        self.steam_thread.start()
+
+    def limpiar_thread_catalogo(self) -> None:
+        """Limpia el hilo y el worker de la actualización de apps."""
+        if self.steam_thread is not None:
+            self.steam_thread.quit()
+            self.steam_thread.wait()
+            self.steam_thread.deleteLater()
+            self.steam_thread = None
+
+        if self.steam_worker is not None:
+            self.steam_worker.deleteLater()
+            self.steam_worker = None
+
+    def closeEvent(self, event) -> None:
+        """
+        Si la actualización de apps sigue en curso, la detiene (se retoma en el próximo inicio)
+        y espera a que termine la página actual antes de cerrar. También detiene el hilo del autocompletado
+        y cancela el entrenamiento en curso, si hay uno.
+        """
+        if self.steam_worker is not None and self.steam_thread is not None:
+            self.steam_worker.stop()
+            self.steam_thread.quit()
+            self.steam_thread.wait()
+        self.dataset_tab.detener_busquedas()
+        self.train_tab.detener_entrenamiento()
+        super().closeEvent(event)
\ No newline at end of file
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (QMainWindow, QLineEdit, QPushButton, QFormLayout,
 from PySide6.QtCore import Signal, Qt, QThread
 from workers import SteamWorker
 from dataset_manager import DatasetManager
-from structs import SteamApps
+from const import STEAM_API_KEY
 from typing import Optional
 
 class SteamAppsWindow(QMainWindow):
@@ -37,7 +37,7 @@ class SteamAppsWindow(QMainWindow):
         self.setWindowTitle("Inicialización")
 
         self.desc = QLabel("Esto solo se hace la primera vez para crear el cache de las apps de steam")
-        self.line_edit_apikey = QLineEdit()
+        self.line_edit_apikey = QLineEdit(STEAM_API_KEY)
         self.button = QPushButton("Ingresar")
         self.progress_bar = QProgressBar()
         
@@ -88,13 +88,14 @@ class SteamAppsWindow(QMainWindow):
         self.progress_bar.show()
 
         self.worker_thread = QThread()
-        self.worker = SteamWorker(api_key)
+        self.worker = SteamWorker(api_key, self.dataset_manager.archivo_json)
         self.worker.moveToThread(self.worker_thread)
 
         self.worker_thread.started.connect(self.worker.run)
         
         self.worker.signals.error.connect(self.mostrar_error)
-        self.worker.signals.data_ready.connect(self.procesar_datos_exitosos)
+        self.worker.signals.file_ready.connect(self.procesar_archivo_guardado)
+        self.worker.signals.log.connect(self.status_bar.showMessage)
         self.worker.signals.progress.connect(self.actualizar_barra_progreso)
         self.worker.signals.finished.connect(self.limpiar_thread)
         self.worker.signals.finished.connect(self.restaurar_ui)
@@ -110,15 +111,14 @@ class SteamAppsWindow(QMainWindow):
         """
         QMessageBox.critical(self, "Error", mensaje_error)
 
-    def procesar_datos_exitosos(self, datos: SteamApps) -> None:
+    def procesar_archivo_guardado(self, archivo: str) -> None:
         """
-        Maneja la recepción exitosa de datos desde el worker.
-        Guarda los datos en caché y emite la señal para cambiar a la ventana principal.
+        Maneja la finalización exitosa del worker, que ya guardó el caché en disco.
+        Emite la señal para cambiar a la ventana principal.
 
         Args:
-            datos (SteamApps): Lista de diccionarios con la información de las apps.
+            archivo (str): Ruta del caché de apps guardado.
         """
-        self.dataset_manager.guardar_datos(datos)
         QMessageBox.information(self, "Éxito", "Juegos de steam descargados")
         self.entrar_main_window.emit()
 
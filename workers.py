@@ -1,9 +1,18 @@
-import requests
 import time
+import queue
+import multiprocessing
+import requests
 import dataset
-from typing import List, Dict, Any, Optional, cast
-from PySide6.QtCore import QObject, Signal
-from structs import SteamApps, Dataset
+import clean
+import catalogo
+import train
+from review_index import IndiceReviews
+from indice_juegos import IndiceJuegos, cargar_indice
+from const import STEAM_APPS_CACHE
+from typing import List, Optional, Tuple, Dict, Any
+from PySide6.QtCore import QObject, Signal, Slot
+
+ESPERA_CANCELACION = 60   # segundos que se espera a que el entrenamiento termine el paso en curso antes de cortarlo
 
 class WorkerSignals(QObject):
     """
@@ -15,84 +24,67 @@ class WorkerSignals(QObject):
         log (Signal): Se emite para enviar mensajes de registro o estado.
         progress (Signal): Se emite para actualizar barras de progreso (0-100).
         data_ready (Signal): Se emite cuando los datos han sido procesados y están listos para enviarse.
+        file_ready (Signal): Se emite con la ruta del archivo cuando el worker ya guardó el resultado en disco.
+        stats_ready (Signal): Se emite con las estadísticas del proceso (por ejemplo, reviews leídas y descartadas,
+                              o el paso, la loss y las métricas del entrenamiento).
+        suggestions_ready (Signal): Se emite con el número de consulta y las sugerencias encontradas para ella.
+        index_ready (Signal): Se emite con la cantidad de elementos indexados cuando un índice queda listo para consultarse.
     """
     finished = Signal()
     error = Signal(str)
     log = Signal(str)
     progress = Signal(int)
     data_ready = Signal(list)
+    file_ready = Signal(str)
+    stats_ready = Signal(dict)
+    suggestions_ready = Signal(int, list)
+    index_ready = Signal(int)
 
 class SteamWorker(QObject):
     """
-    Worker encargado de interactuar con la API de Steam para obtener la lista de aplicaciones.
+    Worker encargado de sincronizar el caché local de aplicaciones de Steam con la API.
+    La primera vez descarga el catálogo completo y después solo las apps modificadas.
     Se ejecuta en un hilo separado para no bloquear la interfaz.
     """
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, archivo: str = STEAM_APPS_CACHE):
         """
         Inicializa el worker con la API Key necesaria.
 
         Args:
             api_key (str): La clave de API de Steam proporcionada por el usuario.
+            archivo (str): Archivo del caché de apps que se crea o actualiza.
         """
         super().__init__()
         self.signals = WorkerSignals()
         self.is_running: bool = True
-        self.url: str = "https://api.steampowered.com/IStoreService/GetAppList/v1/"
-        self.todas_las_apps: SteamApps = []
-        self.last_appid: int = 0
         self.api_key: str = api_key
+        self.archivo: str = archivo
 
     def run(self) -> None:
         """
-        Ejecuta la lógica principal de obtención de datos.
-        Realiza peticiones paginadas a la API de Steam, procesa la respuesta JSON
-        y emite señales de progreso o error según corresponda.
+        Ejecuta la sincronización con el módulo 'catalogo', que recorre todas las páginas de la API
+        y va guardando cada una en disco a medida que llega.
+        Al terminar emite 'file_ready' con el archivo del caché, o un error si algo falló.
         """
         if not self.api_key:
             self.signals.error.emit("Por favor, coloca una API Key válida.")
             self.signals.finished.emit()
             return
 
-        try:
-            for i in range(3): 
-                if not self.is_running: break
-
-                params = {
-                    'key': self.api_key,
-                    'max_results': 50000,
-                    'last_appid': self.last_appid,
-                    'include_games': 'true'
-                }
-
-                response = requests.get(self.url, params=params, timeout=10)
-                
-                if response.status_code == 403:
-                    self.signals.error.emit("La API Key es incorrecta o ha sido revocada (Error 403).")
-                    return
-                
-                response.raise_for_status()
-                
-                data = response.json()
-
-                if 'response' in data and 'apps' in data['response']:
-                    apps = data['response']['apps']
-                    
-                    apps_optimizado = cast(SteamApps, [
-                        {'appid': app['appid'], 'name': app['name']} for app in apps
-                    ])
-                    
-                    self.todas_las_apps.extend(apps_optimizado)
-                    
-                    if apps_optimizado:
-                        self.last_appid = apps_optimizado[-1]['appid']
-
-                    self.signals.progress.emit((i + 1) * 33)
-                    time.sleep(1)
-                else:
-                    break
+        callbacks = {
+            'check_stop': lambda: not self.is_running,
+            'progress': self.signals.progress.emit,
+            'log': self.signals.log.emit
+        }
 
-            self.signals.data_ready.emit(self.todas_las_apps)
+        try:
+            catalogo.sincronizar_apps(self.api_key, self.archivo, callbacks)
+            self.signals.file_ready.emit(self.archivo)
 
+        except InterruptedError:
+            self.signals.log.emit("Sincronización cancelada. Se retomará desde la última página recibida.")
+        except PermissionError as e:
+            self.signals.error.emit(str(e))
         except requests.exceptions.RequestException as e:
             self.signals.error.emit(f"Error de conexión: {str(e)}")
         except Exception as e:
@@ -100,12 +92,21 @@ class SteamWorker(QObject):
         finally:
             self.signals.finished.emit()
 
+    def stop(self) -> None:
+        """
+        Señaliza al worker para que detenga su ejecución de manera segura.
+        """
+        self.is_running = False
+
 class DatasetWorker(QObject):
     """
     Worker encargado de la generación o recuperación del dataset de reseñas.
     Gestiona la obtención de reviews positivas y negativas en segundo plano.
     """
-    def __init__(self, app_ids: List[int], pos_limit: int, neg_limit: int, filename: str, max_diff: int):
+    def __init__(self, app_ids: List[int], pos_limit: int, neg_limit: int, filename: str, max_diff: int,
+                 max_workers: int = dataset.MAX_WORKERS, refrescar: bool = False,
+                 rango_palabras: Optional[Tuple[int, int]] = None, idiomas: Optional[List[str]] = None,
+                 limites_idiomas: Optional[dataset.LimitesIdiomas] = None, usar_indice: bool = False):
         """
         Configura los parámetros para la creación del dataset.
 
@@ -115,6 +116,15 @@ class DatasetWorker(QObject):
             neg_limit (int): Límite de reseñas negativas a obtener.
             filename (str): Nombre del archivo donde se guardará o leerá el caché.
             max_diff (int): Diferencia máxima permitida entre cantidad de reseñas positivas y negativas.
+            max_workers (int): Cantidad máxima de descargas simultáneas (juego, tipo de reseña).
+            refrescar (bool): Si el archivo ya existe, descarga solo las reseñas nuevas y las agrega.
+            rango_palabras (Optional[Tuple[int, int]]): Si se indica (mínimo, máximo), solo se conservan
+                                                        y cuentan para los límites las reseñas con esa cantidad de palabras.
+            idiomas (Optional[List[str]]): Idiomas a descargar en paralelo (por defecto solo español).
+            limites_idiomas (Optional[dataset.LimitesIdiomas]): Límites (positivas, negativas) propios de algunos idiomas;
+                                                                el resto usa pos_limit y neg_limit.
+            usar_indice (bool): Si se consulta y actualiza el índice global de reseñas, para no repetir
+                                reseñas que ya están en otros datasets.
         """
         super().__init__()
         self.signals = WorkerSignals()
@@ -123,12 +133,20 @@ class DatasetWorker(QObject):
         self.neg_limit = neg_limit
         self.filename = filename
         self.max_diff = max_diff
+        self.max_workers = max_workers
+        self.refrescar = refrescar
+        self.filtro = clean.filtro_por_longitud(*rango_palabras) if rango_palabras else None
+        self.idiomas = idiomas or [dataset.IDIOMA_POR_DEFECTO]
+        self.limites_idiomas = limites_idiomas
+        self.usar_indice = usar_indice
         self.is_running = True
 
     def run(self) -> None:
         """
         Ejecuta la lógica de obtención de reviews llamando al módulo 'dataset'.
         Utiliza callbacks para comunicar el progreso y estado a la GUI.
+        El dataset se guarda en disco desde este hilo (si el archivo destino es '.jsonl', a medida
+        que llegan las reviews) y al terminar se emite 'file_ready' con el archivo.
         """
         callbacks = {
             'check_stop': lambda: not self.is_running,
@@ -138,17 +156,46 @@ class DatasetWorker(QObject):
         }
 
         try:
-            data: Dataset = dataset.obtener_reviews_cache(
+            # el índice se carga acá y no en el constructor para no bloquear la interfaz
+            indice = IndiceReviews() if self.usar_indice else None
+
+            if self.filename.endswith(".jsonl"):
+                dataset.descargar_reviews_jsonl(
+                    app_ids=self.app_ids,
+                    pos_limit=self.pos_limit,
+                    neg_limit=self.neg_limit,
+                    archivo=self.filename,
+                    max_diff=self.max_diff,
+                    callbacks=callbacks,
+                    max_workers=self.max_workers,
+                    refrescar=self.refrescar,
+                    filtro=self.filtro,
+                    idioma=self.idiomas,
+                    limites_idiomas=self.limites_idiomas,
+                    indice=indice
+                )
+
+                if self.is_running:
+                    self.signals.file_ready.emit(self.filename)
+                return
+
+            dataset.obtener_reviews_cache(
                 app_ids=self.app_ids,
                 pos_limit=self.pos_limit,
                 neg_limit=self.neg_limit,
                 archivo=self.filename,
                 max_diff=self.max_diff,
-                callbacks=callbacks
+                callbacks=callbacks,
+                max_workers=self.max_workers,
+                refrescar=self.refrescar,
+                filtro=self.filtro,
+                idioma=self.idiomas,
+                limites_idiomas=self.limites_idiomas,
+                indice=indice
             )
 
-            if self.is_running and data:
-                self.signals.data_ready.emit(data)
+            if self.is_running:
+                self.signals.file_ready.emit(self.filename)
 
         except Exception as e:
             self.signals.error.emit(str(e))
@@ -159,4 +206,191 @@ class DatasetWorker(QObject):
         """
         Señaliza al worker para que detenga su ejecución de manera segura.
         """
-        self.is_running = False
\ No newline at end of file
+        self.is_running = False
+
+class CleanWorker(QObject):
+    """
+    Worker encargado de limpiar un dataset en segundo plano con el módulo 'clean'.
+    Lee el archivo elegido de a lotes y guarda el resultado en el archivo de salida indicado.
+    """
+    def __init__(self, entrada: str, salida: str, min_words: int, max_words: int,
+                 procesos: int = clean.MAX_PROCESOS, deduplicar: bool = False,
+                 rango_tokens: Optional[Tuple[int, int]] = None):
+        """
+        Configura los parámetros de la limpieza.
+
+        Args:
+            entrada (str): Archivo del dataset a limpiar (.json, .jsonl o .parquet).
+            salida (str): Archivo donde se guarda el dataset limpio. Puede ser el mismo que 'entrada'.
+            min_words (int): Cantidad mínima de palabras de cada reseña.
+            max_words (int): Cantidad máxima de palabras de cada reseña.
+            procesos (int): Cantidad de procesos entre los que se reparten los lotes.
+            deduplicar (bool): Si se descartan también las reseñas repetidas o casi idénticas.
+            rango_tokens (Optional[Tuple[int, int]]): Si se indica (mínimo, máximo), se descartan además
+                                                      las reseñas con otra cantidad de tokens del modelo.
+        """
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.entrada = entrada
+        self.salida = salida
+        self.min_words = min_words
+        self.max_words = max_words
+        self.procesos = procesos
+        self.deduplicar = deduplicar
+        self.rango_tokens = rango_tokens
+        self.is_running = True
+
+    def run(self) -> None:
+        """
+        Ejecuta la limpieza llamando al módulo 'clean', informando el progreso con callbacks.
+        Al terminar emite las estadísticas y 'file_ready' con el archivo de salida.
+        Si se cancela, el archivo de salida queda como estaba.
+        """
+        callbacks = {
+            'check_stop': lambda: not self.is_running,
+            'progress': self.signals.progress.emit,
+            'error': self.signals.error.emit,
+            'log': self.signals.log.emit
+        }
+        min_tokens, max_tokens = self.rango_tokens or (None, None)
+
+        try:
+            estadisticas = clean.ejecutar_limpieza(
+                self.min_words,
+                self.max_words,
+                archivo=self.entrada,
+                salida=self.salida,
+                callbacks=callbacks,
+                procesos=self.procesos,
+                deduplicar=self.deduplicar,
+                min_tokens=min_tokens,
+                max_tokens=max_tokens
+            )
+
+            if estadisticas is not None:
+                self.signals.stats_ready.emit(estadisticas)
+                self.signals.file_ready.emit(self.salida)
+
+        except InterruptedError:
+            self.signals.log.emit("Limpieza cancelada. El archivo de salida no se modificó.")
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+
+    def stop(self) -> None:
+        """
+        Señaliza al worker para que detenga su ejecución de manera segura.
+        """
+        self.is_running = False
+
+class TrainWorker(QObject):
+    """
+    Worker que entrena el modelo en un proceso aparte (con 'train.entrenar_en_proceso'), así el
+    entrenamiento no compite por el GIL con la interfaz. Desde su hilo lee los mensajes que envía
+    el proceso por una cola y los reemite como señales: progreso, mensajes, métricas y el modelo guardado.
+    """
+    def __init__(self, parametros: Dict[str, Any]):
+        """
+        Args:
+            parametros (Dict[str, Any]): Argumentos de 'train.entrenar' (file, test_size, epochs,
+                                         learning_rate y output_dir, entre otros).
+        """
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.parametros = parametros
+        # 'spawn' en lugar de 'fork': el proceso no hereda los hilos de Qt ni de torch
+        self.contexto = multiprocessing.get_context("spawn")
+        self.detener = self.contexto.Event()
+        self.cancelado_en: Optional[float] = None
+
+    def run(self) -> None:
+        """
+        Lanza el proceso de entrenamiento y reemite sus mensajes hasta que termina.
+        Si el proceso termina sin avisar (por ejemplo, por falta de memoria) se emite un error.
+        """
+        emitir = {
+            'progress': self.signals.progress.emit,
+            'log': self.signals.log.emit,
+            'metrics': self.signals.stats_ready.emit,
+            'error': self.signals.error.emit,
+            'file_ready': self.signals.file_ready.emit,
+        }
+        cola = self.contexto.Queue()
+        proceso = self.contexto.Process(target=train.entrenar_en_proceso, args=(cola, self.detener, self.parametros))
+
+        try:
+            proceso.start()
+            while True:
+                try:
+                    (tipo, dato) = cola.get(timeout=0.5)
+                except queue.Empty:
+                    if not proceso.is_alive() and cola.empty():
+                        self.signals.error.emit(f"El proceso de entrenamiento terminó inesperadamente (código {proceso.exitcode}).")
+                        break
+                    if self.cancelado_en is not None and time.monotonic() - self.cancelado_en > ESPERA_CANCELACION:
+                        proceso.terminate()
+                        self.signals.log.emit("Entrenamiento cancelado. No se guardó el modelo.")
+                        break
+                    continue
+
+                if tipo == "fin":
+                    break
+                emitir[tipo](dato)
+
+            proceso.join()
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            cola.close()
+            self.signals.finished.emit()
+
+    def stop(self) -> None:
+        """
+        Pide al proceso que detenga el entrenamiento al terminar el paso en curso, sin guardar el modelo.
+        """
+        if self.cancelado_en is None:
+            self.cancelado_en = time.monotonic()
+        self.detener.set()
+
+class BuscadorJuegos(QObject):
+    """
+    Worker que carga el índice del catálogo de juegos y responde las búsquedas del autocompletado
+    en un hilo separado, para que ni el inicio de la aplicación ni escribir el nombre de un juego
+    traben la interfaz.
+    A diferencia del resto de los workers no termina después de una tarea: vive mientras la pestaña
+    esté abierta y atiende cada pedido (una señal conectada a 'cargar' o 'buscar') en su hilo.
+    """
+    def __init__(self):
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.indice: Optional[IndiceJuegos] = None
+
+    @Slot(str)
+    def cargar(self, archivo: str) -> None:
+        """
+        Carga el índice de búsqueda del caché de apps (armado de antemano si el caché no cambió),
+        reemplazando el anterior, y emite 'index_ready' con la cantidad de juegos.
+
+        Args:
+            archivo (str): Archivo del caché de apps de Steam.
+        """
+        try:
+            self.indice = cargar_indice(archivo)
+            self.signals.index_ready.emit(len(self.indice))
+        except Exception as e:
+            self.signals.error.emit(f"No se pudo cargar la lista de juegos: {str(e)}")
+
+    @Slot(int, str, list)
+    def buscar(self, consulta: int, texto: str, excluir: List[str]) -> None:
+        """
+        Busca los juegos que coinciden con el texto y emite las sugerencias con 'suggestions_ready'.
+        Mientras el índice no esté listo no hay sugerencias.
+
+        Args:
+            consulta (int): Número de la consulta, para que la interfaz descarte respuestas viejas.
+            texto (str): Texto escrito por el usuario.
+            excluir (List[str]): Juegos ya elegidos, que no se sugieren.
+        """
+        sugerencias = self.indice.buscar(texto, excluir=set(excluir)) if self.indice else []
+        self.signals.suggestions_ready.emit(consulta, sugerencias)